@@ -0,0 +1,150 @@
+"""
+Controle de admissão - Pool compartilhado e limitado para chamadas aos provedores (Single Responsibility)
+
+Um único pool por processo executa as chamadas aos provedores. Cada busca
+reserva, de uma vez, uma vaga por provedor; as vagas somam os workers e uma
+fila limitada. Sem vagas, a busca é recusada imediatamente (503 com
+Retry-After) em vez de empilhar threads. As buscas expandidas (pares de
+aeroportos, trechos) passam antes por pools limitados do mesmo tipo. Um limite por cliente (429) evita
+que um único consumidor ocupe todo o pool.
+"""
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from metrics import EXECUTOR_TASKS, ADMISSION_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Requisição recusada por falta de capacidade"""
+
+    def __init__(self, message: str, retry_after: int, status: int = 503):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+
+class BoundedExecutor:
+    """ThreadPoolExecutor com número máximo de tarefas admitidas (em execução + na fila)"""
+
+    def __init__(self, max_workers: int = 32, max_queue: int = 64, name: str = 'provider-pool'):
+        """
+        Args:
+            max_workers: Chamadas simultâneas aos provedores
+            max_queue: Chamadas que podem aguardar um worker livre
+            name: Prefixo das threads do pool
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+        self._avg_task_seconds = 1.0
+
+        EXECUTOR_TASKS.set_function(lambda: self._running, pool=name, state='running')
+        EXECUTOR_TASKS.set_function(lambda: self.queue_depth, pool=name, state='queued')
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self._admitted - self._running, 0)
+
+    def retry_after(self) -> int:
+        """Estimativa, em segundos, até a fila atual ser drenada"""
+        waves = (self._admitted + 1) / self.max_workers
+        return max(1, math.ceil(waves * self._avg_task_seconds))
+
+    def submit_all(self, calls: Sequence[Tuple[Callable, tuple]]) -> List[Future]:
+        """
+        Admite todas as chamadas ou nenhuma
+
+        Args:
+            calls: Pares (função, argumentos)
+
+        Returns:
+            Futures na mesma ordem das chamadas
+
+        Raises:
+            Overloaded: Se não houver vagas para todas as chamadas
+        """
+        with self._lock:
+            if self._admitted + len(calls) > self.capacity:
+                ADMISSION_REJECTIONS.inc(reason='queue_full', pool=self.name)
+                raise Overloaded(f'Fila do pool {self.name} cheia', self.retry_after())
+            self._admitted += len(calls)
+
+        return [self._executor.submit(self._run, func, args) for func, args in calls]
+
+    def _run(self, func: Callable, args: tuple):
+        with self._lock:
+            self._running += 1
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._running -= 1
+                self._admitted -= 1
+                # Média móvel exponencial da duração, usada no Retry-After
+                self._avg_task_seconds += 0.1 * (elapsed - self._avg_task_seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'fila_maxima': self.max_queue,
+                'em_execucao': self._running,
+                'na_fila': max(self._admitted - self._running, 0),
+                'duracao_media_ms': round(self._avg_task_seconds * 1000, 1)
+            }
+
+
+class ClientLimiter:
+    """Limite de buscas simultâneas por cliente"""
+
+    def __init__(self, max_per_client: int = 4, retry_after: int = 1):
+        """
+        Args:
+            max_per_client: Buscas em andamento permitidas por cliente
+            retry_after: Valor do Retry-After das recusas, em segundos
+        """
+        self.max_per_client = max_per_client
+        self.retry_after = retry_after
+        self._active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, client: str) -> Iterator[None]:
+        """
+        Ocupa uma vaga do cliente durante o bloco
+
+        Raises:
+            Overloaded: (429) se o cliente já estiver no limite
+        """
+        with self._lock:
+            active = self._active.get(client, 0)
+            if active >= self.max_per_client:
+                ADMISSION_REJECTIONS.inc(reason='client_limit', pool='client')
+                raise Overloaded('Muitas buscas simultâneas deste cliente', self.retry_after, status=429)
+            self._active[client] = active + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                remaining = self._active[client] - 1
+                if remaining:
+                    self._active[client] = remaining
+                else:
+                    del self._active[client]
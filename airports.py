@@ -0,0 +1,288 @@
+"""
+Base de aeroportos - Dados locais com índices espacial e de prefixos (Single Responsibility)
+
+Os aeroportos vêm de um CSV distribuído com a aplicação (data/airports.csv)
+e ficam em memória com três índices: código de cidade/metrópole (SAO ->
+GRU, CGH, VCP); uma grade de células de 1 grau de latitude/longitude, que
+limita a busca por aeroportos próximos às células vizinhas do ponto; e uma
+lista ordenada de chaves normalizadas (sem acentos) para o autocomplete,
+consultada por busca binária do prefixo.
+"""
+import bisect
+import csv
+import logging
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from interfaces import Airport
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.2
+
+
+@dataclass(frozen=True)
+class AirportInfo:
+    """Aeroporto da base local"""
+    code: str
+    name: str
+    city: str
+    metro: str
+    country: str
+    latitude: float
+    longitude: float
+
+
+def load_airports(path: str) -> List[AirportInfo]:
+    """
+    Lê a base de aeroportos
+
+    Formato (CSV com cabeçalho): iata,name,city,metro,country,latitude,longitude
+    """
+    with open(path, encoding='utf-8', newline='') as handle:
+        return [
+            AirportInfo(
+                code=row['iata'].upper(),
+                name=row['name'],
+                city=row['city'],
+                metro=row['metro'].upper(),
+                country=row['country'].upper(),
+                latitude=float(row['latitude']),
+                longitude=float(row['longitude'])
+            )
+            for row in csv.DictReader(handle)
+        ]
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços no lugar de pontuação ("São Paulo/Guarulhos" -> "sao paulo guarulhos")"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', stripped.lower()).split())
+
+
+class AirportSearchIndex:
+    """
+    Índice de prefixos para o autocomplete
+
+    Cada aeroporto contribui com chaves para o código, a cidade, o nome e
+    cada palavra deles; as chaves ficam em uma lista ordenada, e todas as
+    que começam com o prefixo pedido ocupam um intervalo contíguo dela.
+    """
+
+    # Relevância por campo da chave (menor é melhor)
+    RANK_CODE, RANK_CITY, RANK_NAME = 0, 1, 2
+
+    def __init__(self, airports: List[AirportInfo], max_scan: int = 500):
+        """
+        Args:
+            airports: Registros da base
+            max_scan: Chaves examinadas no máximo por consulta (prefixos muito curtos)
+        """
+        self.max_scan = max_scan
+        entries = set()
+        for position, airport in enumerate(airports):
+            entries.add((normalize(airport.code), self.RANK_CODE, position))
+            if airport.metro:
+                entries.add((normalize(airport.metro), self.RANK_CODE, position))
+            for rank, text in ((self.RANK_CITY, airport.city), (self.RANK_NAME, airport.name)):
+                key = normalize(text)
+                entries.add((key, rank, position))
+                for word in key.split()[1:]:
+                    entries.add((word, rank, position))
+        ordered = sorted(entries)
+        self._keys = [key for key, _, _ in ordered]
+        self._refs = [(rank, position) for _, rank, position in ordered]
+
+    def search(self, query: str, limit: int = 8) -> List[int]:
+        """
+        Posições dos aeroportos cujas chaves começam com a consulta
+
+        Ordem: código exato, melhor campo (código, cidade, nome), chave mais
+        curta (correspondência mais completa) e ordem da base.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        best: Dict[int, Tuple[int, int, int]] = {}
+        start = bisect.bisect_left(self._keys, prefix)
+        for i in range(start, min(start + self.max_scan, len(self._keys))):
+            key = self._keys[i]
+            if not key.startswith(prefix):
+                break
+            rank, position = self._refs[i]
+            exact_code = 0 if rank == self.RANK_CODE and key == prefix else 1
+            score = (exact_code, rank, len(key))
+            if position not in best or score < best[position]:
+                best[position] = score
+
+        return sorted(best, key=lambda position: (best[position], position))[:limit]
+
+
+def distance_km(a: AirportInfo, b: AirportInfo) -> float:
+    """Distância em linha reta (haversine)"""
+    lat1, lat2 = math.radians(a.latitude), math.radians(b.latitude)
+    dlat = lat2 - lat1
+    dlon = math.radians(b.longitude - a.longitude)
+    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class AirportDirectory:
+    """Consulta por código, por metrópole e por proximidade"""
+
+    def __init__(self, airports: List[AirportInfo], cell_degrees: float = 1.0,
+                 max_radius_km: float = 500):
+        """
+        Args:
+            airports: Registros da base
+            cell_degrees: Tamanho das células da grade espacial, em graus
+            max_radius_km: Maior raio aceito em nearby (limita as células varridas)
+        """
+        self.cell_degrees = cell_degrees
+        self.max_radius_km = max_radius_km
+        self._airports = airports
+        self._index = AirportSearchIndex(airports)
+        self._airport_objects: Dict[str, Airport] = {}
+        self._by_code: Dict[str, AirportInfo] = {airport.code: airport for airport in airports}
+        self._by_metro: Dict[str, List[str]] = defaultdict(list)
+        self._grid: Dict[Tuple[int, int], List[AirportInfo]] = defaultdict(list)
+        for airport in airports:
+            if airport.metro:
+                self._by_metro[airport.metro].append(airport.code)
+            self._grid[self._cell(airport.latitude, airport.longitude)].append(airport)
+        logger.info(f"Base de aeroportos carregada: {len(self._by_code)} aeroportos, {len(self._by_metro)} metrópoles")
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'AirportDirectory':
+        return cls(load_airports(path), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def get(self, code: str) -> Optional[AirportInfo]:
+        return self._by_code.get(code.upper())
+
+    def to_airport(self, code: str) -> Optional[Airport]:
+        """Airport com nome, cidade e país (ISO) da base; None se o código não estiver nela"""
+        airport = self._airport_objects.get(code)
+        if airport is None:
+            info = self._by_code.get(code)
+            if info is None:
+                return None
+            airport = Airport(code=info.code, name=info.name, city=info.city, country=info.country)
+            self._airport_objects[code] = airport
+        return airport
+
+    def search(self, query: str, limit: int = 8) -> List[Dict]:
+        """
+        Sugestões do autocomplete: metrópoles (todos os aeroportos da cidade) e aeroportos
+
+        Uma metrópole aparece junto do seu primeiro aeroporto sugerido que fica
+        na cidade principal (Campinas não sugere "SAO"): antes dele, ou depois
+        se a consulta for exatamente o código do aeroporto.
+        """
+        exact_code = normalize(query).upper()
+        suggestions, seen_metros = [], set()
+        for position in self._index.search(query, limit):
+            info = self._airports[position]
+            airport = {
+                'codigo': info.code,
+                'tipo': 'aeroporto',
+                'nome': info.name,
+                'cidade': info.city,
+                'pais': info.country
+            }
+            if (info.metro and info.metro not in seen_metros and info.metro not in self._by_code
+                    and self._by_code[self._by_metro[info.metro][0]].city == info.city):
+                seen_metros.add(info.metro)
+                metro = {
+                    'codigo': info.metro,
+                    'tipo': 'cidade',
+                    'cidade': info.city,
+                    'pais': info.country,
+                    'aeroportos': self.metro_airports(info.metro)
+                }
+                suggestions.extend([airport, metro] if info.code == exact_code else [metro, airport])
+            else:
+                suggestions.append(airport)
+        return suggestions[:limit]
+
+    def metro_airports(self, code: str) -> List[str]:
+        """Aeroportos de um código de cidade (vazio se o código não for de metrópole)"""
+        return list(self._by_metro.get(code.upper(), []))
+
+    def nearby(self, code: str, radius_km: float) -> List[Tuple[str, float]]:
+        """
+        Aeroportos a até radius_km do aeroporto informado, do mais próximo ao mais distante
+
+        O raio é limitado a max_radius_km, para que a varredura da grade não
+        cresça sem limite.
+
+        Returns:
+            Pares (código, distância em km), sem o próprio aeroporto
+        """
+        center = self.get(code)
+        if center is None:
+            return []
+        radius_km = min(radius_km, self.max_radius_km)
+
+        # Células cobertas pelo raio; a largura em longitude cresce com a latitude
+        lat_cells = math.ceil(radius_km / (KM_PER_DEGREE * self.cell_degrees))
+        cos_lat = max(math.cos(math.radians(center.latitude)), 0.01)
+        lon_cells = math.ceil(radius_km / (KM_PER_DEGREE * cos_lat * self.cell_degrees))
+        row, col = self._cell(center.latitude, center.longitude)
+
+        found = []
+        for dr in range(-lat_cells, lat_cells + 1):
+            for dc in range(-lon_cells, lon_cells + 1):
+                for airport in self._grid.get((row + dr, col + dc), ()):
+                    if airport.code == center.code:
+                        continue
+                    distance = distance_km(center, airport)
+                    if distance <= radius_km:
+                        found.append((airport.code, distance))
+        return sorted(found, key=lambda item: item[1])
+
+    def expand(self, code: str, include_nearby: bool = False, radius_km: float = 100,
+               max_airports: int = 3) -> List[str]:
+        """
+        Aeroportos a consultar para um código informado pelo usuário
+
+        Um código de aeroporto conhecido vale por si mesmo; um código de
+        metrópole (SAO, RIO, NYC...) vira todos os aeroportos da cidade. Com
+        include_nearby, os aeroportos no raio de cada um são acrescentados,
+        dos mais próximos aos mais distantes, enquanto o total não passar de
+        max_airports (o limite vale só para os próximos: uma metrópole nunca
+        perde aeroportos). Códigos fora da base são mantidos como estão (o
+        provedor decide se são válidos).
+        """
+        code = code.upper()
+        if code in self._by_code:
+            airports = [code]
+        else:
+            airports = self.metro_airports(code) or [code]
+
+        if include_nearby:
+            candidates = sorted(
+                (distance, nearby_code)
+                for base in airports
+                for nearby_code, distance in self.nearby(base, radius_km)
+                if nearby_code not in airports
+            )
+            for _, nearby_code in candidates:
+                if len(airports) >= max_airports:
+                    break
+                if nearby_code not in airports:
+                    airports.append(nearby_code)
+
+        return airports
@@ -0,0 +1,227 @@
+"""
+Parser de ofertas Amadeus - Conversão otimizada da resposta para o modelo padronizado (Single Responsibility)
+"""
+import re
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from interfaces import Flight, Airport, FlightSegment
+from metrics import PARSER_CACHE_HIT_RATIO, lru_hit_ratio
+from airports import AirportDirectory
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PATTERN = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+(?:\.\d+)?S)?)?$')
+
+
+@lru_cache(maxsize=8192)
+def parse_iso_datetime(value: str) -> datetime:
+    """
+    Converte data/hora ISO 8601 em datetime, com cache
+
+    Respostas Amadeus repetem os mesmos horários em muitas ofertas
+    (o mesmo voo aparece combinado com tarifas diferentes).
+
+    Args:
+        value: Data/hora no formato ISO 8601 (ex: 2025-11-01T08:00:00)
+
+    Returns:
+        Objeto datetime correspondente
+    """
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+@lru_cache(maxsize=1024)
+def parse_iso_duration(value: str) -> int:
+    """
+    Converte duração ISO 8601 (ex: PT2H30M, P1DT2H) para minutos, com cache
+
+    Args:
+        value: Duração no formato ISO 8601
+
+    Returns:
+        Duração em minutos (0 se o formato for inválido)
+    """
+    match = _DURATION_PATTERN.match(value or '')
+    if not match:
+        return 0
+
+    days, hours, minutes = (int(group) if group else 0 for group in match.groups())
+    return days * 1440 + hours * 60 + minutes
+
+
+PARSER_CACHE_HIT_RATIO.set_function(lambda: lru_hit_ratio(parse_iso_datetime), cache='amadeus_datetime')
+PARSER_CACHE_HIT_RATIO.set_function(lambda: lru_hit_ratio(parse_iso_duration), cache='amadeus_duration')
+
+
+class AmadeusOfferParser:
+    """Converte respostas de /v2/shopping/flight-offers em objetos Flight"""
+
+    PROVIDER_NAME = 'Amadeus'
+
+    def __init__(self, airports: Optional[AirportDirectory] = None):
+        """
+        Args:
+            airports: Base local usada para preencher nome, cidade e país dos aeroportos
+        """
+        self.airports = airports
+
+    def parse(self, data: dict) -> List[Flight]:
+        """
+        Converte resposta da API para modelo padronizado
+
+        Args:
+            data: Corpo JSON da resposta (com 'data' e 'dictionaries')
+
+        Returns:
+            Lista de voos parseados
+        """
+        dictionaries = data.get('dictionaries') or {}
+        carriers: Dict[str, str] = dictionaries.get('carriers') or {}
+        aircraft: Dict[str, str] = dictionaries.get('aircraft') or {}
+        locations: Dict[str, dict] = dictionaries.get('locations') or {}
+
+        # Aeroportos são compartilhados entre ofertas da mesma resposta
+        seen: Dict[str, Airport] = {}
+
+        flights = []
+        for offer in data.get('data', []):
+            try:
+                flights.append(self._parse_offer(offer, carriers, aircraft, locations, seen))
+            except Exception as e:
+                logger.error(f"Erro ao parsear voo Amadeus: {str(e)}")
+                continue
+
+        return flights
+
+    def _parse_offer(self, offer: dict, carriers: Dict[str, str], aircraft: Dict[str, str],
+                     locations: Dict[str, dict], seen: Dict[str, Airport]) -> Flight:
+        """Converte uma única oferta"""
+        itineraries = offer['itineraries']
+        outbound = itineraries[0]
+
+        segments, stops = self._parse_segments(outbound['segments'], aircraft, is_return=False)
+        first_segment = segments[0]
+        last_segment = segments[-1]
+
+        return_departure_dt = None
+        return_arrival_dt = None
+        if len(itineraries) > 1:
+            return_segments, _ = self._parse_segments(itineraries[1]['segments'], aircraft, is_return=True)
+            return_departure_dt = return_segments[0].departure_datetime
+            return_arrival_dt = return_segments[-1].arrival_datetime
+            segments.extend(return_segments)
+
+        duration_minutes = parse_iso_duration(outbound.get('duration', ''))
+        if not duration_minutes:
+            elapsed = last_segment.arrival_datetime - first_segment.departure_datetime
+            duration_minutes = max(int(elapsed.total_seconds() // 60), 0)
+
+        cabin_class, baggage_included, baggage_weight = self._parse_fare_details(offer)
+        price = offer['price']
+        carrier_code = first_segment.carrier
+
+        return Flight(
+            id=offer['id'],
+            provider=self.PROVIDER_NAME,
+            airline=carrier_code,
+            airline_name=carriers.get(carrier_code),
+            airline_logo=None,
+            origin=self._get_airport(first_segment.origin, locations, seen),
+            destination=self._get_airport(last_segment.destination, locations, seen),
+            departure_datetime=first_segment.departure_datetime,
+            arrival_datetime=last_segment.arrival_datetime,
+            return_departure_datetime=return_departure_dt,
+            return_arrival_datetime=return_arrival_dt,
+            price=float(price['total']),
+            currency=price['currency'],
+            stops=stops,
+            duration_minutes=duration_minutes,
+            available_seats=offer.get('numberOfBookableSeats', 9),
+            booking_url='',
+            cabin_class=cabin_class,
+            baggage_included=baggage_included,
+            baggage_weight=baggage_weight,
+            flight_number=first_segment.flight_number,
+            aircraft_type=first_segment.aircraft_type,
+            segments=segments
+        )
+
+    def _parse_segments(self, raw_segments: List[dict], aircraft: Dict[str, str],
+                        is_return: bool) -> Tuple[List[FlightSegment], int]:
+        """
+        Converte todos os trechos de um itinerário
+
+        Returns:
+            Tupla (trechos, número de paradas incluindo escalas técnicas)
+        """
+        segments = []
+        stops = len(raw_segments) - 1
+
+        for raw in raw_segments:
+            departure = raw['departure']
+            arrival = raw['arrival']
+            carrier = raw['carrierCode']
+            aircraft_code = (raw.get('aircraft') or {}).get('code')
+            operating = (raw.get('operating') or {}).get('carrierCode')
+
+            stops += raw.get('numberOfStops', 0)
+            segments.append(FlightSegment(
+                carrier=carrier,
+                flight_number=f"{carrier}{raw['number']}",
+                origin=departure['iataCode'],
+                destination=arrival['iataCode'],
+                departure_datetime=parse_iso_datetime(departure['at']),
+                arrival_datetime=parse_iso_datetime(arrival['at']),
+                duration_minutes=parse_iso_duration(raw.get('duration', '')),
+                aircraft_type=aircraft.get(aircraft_code, aircraft_code),
+                operating_carrier=operating if operating != carrier else None,
+                is_return=is_return
+            ))
+
+        return segments, stops
+
+    def _parse_fare_details(self, offer: dict) -> Tuple[str, bool, Optional[str]]:
+        """
+        Extrai cabine e franquia de bagagem do primeiro viajante
+
+        Returns:
+            Tupla (cabine, bagagem incluída, peso da bagagem)
+        """
+        traveler_pricings = offer.get('travelerPricings') or []
+        if not traveler_pricings:
+            return 'ECONOMY', False, None
+
+        fare_details = traveler_pricings[0].get('fareDetailsBySegment') or []
+        if not fare_details:
+            return 'ECONOMY', False, None
+
+        first_fare = fare_details[0]
+        bags = first_fare.get('includedCheckedBags') or {}
+        baggage_weight = None
+        if bags.get('weight'):
+            baggage_weight = f"{bags['weight']}{bags.get('weightUnit', 'KG').lower()}"
+
+        baggage_included = bool(bags.get('quantity') or bags.get('weight'))
+        return first_fare.get('cabin', 'ECONOMY'), baggage_included, baggage_weight
+
+    def _get_airport(self, code: str, locations: Dict[str, dict], seen: Dict[str, Airport]) -> Airport:
+        """Resolve aeroporto pela base local ou, fora dela, pelo dicionário de localizações da resposta"""
+        airport = seen.get(code)
+        if airport is not None:
+            return airport
+        if self.airports is not None:
+            airport = self.airports.to_airport(code)
+        if airport is None:
+            location = locations.get(code) or {}
+            airport = Airport(
+                code=code,
+                name=code,
+                city=location.get('cityCode', ''),
+                country=location.get('countryCode', '')
+            )
+        seen[code] = airport
+        return airport
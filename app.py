@@ -2,18 +2,34 @@
 API Flight Crawler - Versão profissional com dados reais
 Aplicação principal seguindo princípios SOLID e padrões de projeto
 """
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context, make_response
+from functools import wraps
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, date
+import contextvars
 import logging
 
 # Importações dos módulos criados
 from config import Config
-from interfaces import FlightSearchParams, CabinClass
+from interfaces import FlightSearchParams, MultiCitySearchParams, CabinClass, SORT_OPTIONS
 from provider_kiwi import KiwiFlightProvider
 from provider_amadeus import AmadeusFlightProvider
 from flight_service import FlightSearchService
 from repository import SearchRepository
+from cache_backends import create_cache_backend, InMemoryLRUCache
+from fare_calendar import LowestFareIndex
+from currency import FxRateTable, file_rates_loader
+from watch import WatchManager
+from archive import ResultArchive
+from result_set import FlightResultSet
+from admission import BoundedExecutor, ClientLimiter, Overloaded
+from tiering import TierPolicyResolver, parse_route_strategies
+from airports import AirportDirectory
+from recording import FixtureStore, RecordReplayProvider
+from compression import ResponseCompressor, make_etag, if_none_match_tag
+from metrics import REGISTRY, SEARCH_STAGE_SECONDS, CACHE_REQUESTS
+from tracing import start_trace, end_trace, span
+from profiler import profiler, profiled
 
 # Configuração de logging
 logging.basicConfig(
@@ -27,15 +43,458 @@ app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
 
+# Compressão gzip/brotli negociada por Accept-Encoding
+if Config.COMPRESSION_ENABLED:
+    ResponseCompressor(
+        app,
+        min_size=Config.COMPRESSION_MIN_SIZE,
+        level=Config.COMPRESSION_LEVEL,
+        cache_entries=Config.COMPRESSION_CACHE_ENTRIES
+    )
+
+# Base local de aeroportos: autocomplete, dados dos aeroportos nos voos e expansão de metrópoles
+airport_directory = AirportDirectory.from_file(Config.AIRPORTS_FILE, max_radius_km=Config.MAX_NEARBY_RADIUS_KM)
+
 # Inicialização dos provedores (Strategy Pattern)
 providers = [
-    KiwiFlightProvider(),
-    AmadeusFlightProvider(),
+    KiwiFlightProvider(airport_directory),
+    AmadeusFlightProvider(airport_directory),
 ]
 
+# Gravação/reprodução das respostas dos provedores para benchmarks e testes offline (ver recording.py)
+if Config.PROVIDER_RECORDING_MODE:
+    fixture_store = FixtureStore(Config.PROVIDER_FIXTURES_DIR)
+    providers = [
+        RecordReplayProvider(provider, fixture_store, Config.PROVIDER_RECORDING_MODE, Config.PROVIDER_REPLAY_LATENCY)
+        for provider in providers
+    ]
+
+# Cache compartilhado entre workers (memory, sqlite ou redis - ver Config.CACHE_BACKEND)
+cache_backend = create_cache_backend()
+
+# Tabela de câmbio local, recarregada do arquivo quando expira
+fx_rates = FxRateTable(file_rates_loader(Config.FX_RATES_FILE), ttl=Config.FX_RATES_TTL)
+
+# Pool único e limitado para as chamadas aos provedores; o excesso é recusado em vez de enfileirado
+provider_executor = BoundedExecutor(Config.PROVIDER_MAX_WORKERS, Config.PROVIDER_MAX_QUEUE)
+client_limiter = ClientLimiter(Config.MAX_SEARCHES_PER_CLIENT)
+
+# Provedores gratuitos primeiro; os pagos só quando o nível anterior não basta
+tier_resolver = TierPolicyResolver(
+    Config.SEARCH_STRATEGY,
+    min_results=Config.TIER_MIN_RESULTS,
+    deadline=Config.TIER_DEADLINE,
+    routes=parse_route_strategies(Config.ROUTE_SEARCH_STRATEGIES)
+)
+
 # Inicialização dos serviços (Dependency Injection)
-flight_service = FlightSearchService(providers)
-search_repository = SearchRepository()
+flight_service = FlightSearchService(
+    providers,
+    cache=cache_backend,
+    cache_ttl=Config.CACHE_TTL,
+    fx=fx_rates,
+    canonical_currency=Config.CANONICAL_CURRENCY,
+    best_value_weights={
+        'price': Config.BEST_VALUE_WEIGHT_PRICE,
+        'duration': Config.BEST_VALUE_WEIGHT_DURATION,
+        'stops': Config.BEST_VALUE_WEIGHT_STOPS
+    },
+    vectorize_threshold=Config.VECTORIZE_MIN_RESULTS,
+    executor=provider_executor,
+    provider_timeout=Config.PROVIDER_TIMEOUT,
+    tier_resolver=tier_resolver,
+    negative_ttls={
+        'empty': Config.NEGATIVE_CACHE_EMPTY_TTL,
+        'rejected': Config.NEGATIVE_CACHE_REJECTED_TTL,
+        'error': Config.NEGATIVE_CACHE_ERROR_TTL
+    },
+    pair_workers=Config.PAIR_SEARCH_WORKERS,
+    pair_queue=Config.PAIR_SEARCH_QUEUE,
+    min_connection_minutes=Config.MIN_CONNECTION_MINUTES
+)
+search_repository = SearchRepository(
+    backend=cache_backend if cache_backend.get_backend_name() != 'memory' else None,
+    retention_seconds=Config.SEARCH_RETENTION_SECONDS,
+    write_behind=Config.REPOSITORY_WRITE_BEHIND,
+    max_pending=Config.REPOSITORY_MAX_PENDING,
+    batch_size=Config.REPOSITORY_BATCH_SIZE,
+    flush_interval=Config.REPOSITORY_FLUSH_INTERVAL,
+    hot_offers=Config.REPOSITORY_HOT_OFFERS,
+    recent_searches=Config.REPOSITORY_RECENT_SEARCHES
+)
+search_repository.register_exit_flush()
+
+# Índice de menor tarifa por rota/data, alimentado por todas as buscas concluídas
+fare_index = LowestFareIndex(Config.FARE_CALENDAR_MAX_AGE)
+fare_index.load_from_repository(search_repository, Config.FARE_CALENDAR_LOAD_SEARCHES,
+                                Config.FARE_CALENDAR_LOAD_MAX_AGE)
+flight_service.add_listener(fare_index.record_search, include_cached=False)
+
+# Arquivo histórico para análises: apenas respostas reais dos provedores
+if Config.ARCHIVE_ENABLED:
+    result_archive = ResultArchive(Config.ARCHIVE_DIR, Config.ARCHIVE_CHUNK_ROWS, Config.ARCHIVE_FLUSH_SECONDS)
+    result_archive.register_exit_flush()
+    flight_service.add_listener(result_archive.record_search, include_cached=False)
+
+# Monitoramento de preços: assinaturas idênticas compartilham o mesmo polling
+watch_manager = WatchManager(
+    flight_service,
+    search_repository,
+    default_interval=Config.WATCH_DEFAULT_INTERVAL,
+    min_interval=Config.WATCH_MIN_INTERVAL,
+    ttl=Config.WATCH_TTL,
+    max_events=Config.WATCH_MAX_EVENTS,
+    max_concurrent_polls=Config.WATCH_MAX_CONCURRENT_POLLS
+)
+
+
+def overloaded_response(e: Overloaded):
+    """Resposta 503/429 com Retry-After para uma busca recusada pelo controle de admissão"""
+    response = jsonify({
+        'erro': 'Serviço sobrecarregado' if e.status == 503 else 'Muitas requisições',
+        'mensagem': str(e),
+        'tentar_novamente_em': e.retry_after
+    })
+    response.status_code = e.status
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+def parse_max_results(value, maximum: int):
+    """
+    Valida "max_resultados": inteiro a partir de 1; acima do máximo vale o máximo
+
+    Returns:
+        (quantidade, None) ou (None, corpo do erro 400)
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        value = None
+    try:
+        quantidade = int(value)
+    except (TypeError, ValueError):
+        quantidade = 0
+    if quantidade < 1:
+        return None, {
+            'erro': 'max_resultados inválido',
+            'mensagem': f'Informe max_resultados como um inteiro entre 1 e {maximum}'
+        }
+    return min(quantidade, maximum), None
+
+
+def parse_search_request(data: dict):
+    """
+    Valida o corpo JSON de uma busca (POST /consulta, POST /watch)
+
+    Returns:
+        (FlightSearchParams, None) ou (None, corpo do erro 400)
+    """
+    if not data:
+        return None, {
+            'erro': 'Dados não fornecidos',
+            'mensagem': 'É necessário enviar um JSON no corpo da requisição'
+        }
+
+    # Validação de campos obrigatórios
+    campos_obrigatorios = ['origem', 'destino', 'data_ida', 'passageiros']
+    campos_faltando = [campo for campo in campos_obrigatorios if campo not in data]
+
+    if campos_faltando:
+        return None, {
+            'erro': 'Campos obrigatórios faltando',
+            'campos_faltando': campos_faltando
+        }
+
+    # Extrai e valida parâmetros
+    origem = data['origem'].upper()
+    destino = data['destino'].upper()
+    data_ida_str = data['data_ida']
+    data_volta_str = data.get('data_volta')
+    passageiros = data.get('passageiros', 1)
+    criancas = data.get('criancas', 0)
+    classe = data.get('classe', 'ECONOMY').upper()
+    moeda = data.get('moeda', 'BRL').upper()
+    max_resultados, erro = parse_max_results(data.get('max_resultados', Config.MAX_RESULTS_PER_PROVIDER),
+                                             Config.MAX_RESULTS_PER_PROVIDER)
+    if erro:
+        return None, erro
+    max_paradas = data.get('max_paradas')
+    ordenar = data.get('ordenar', 'price')
+
+    # Validação de códigos de aeroporto
+    if len(origem) != 3 or len(destino) != 3:
+        return None, {
+            'erro': 'Códigos de aeroporto inválidos',
+            'mensagem': 'Use códigos IATA de 3 letras (ex: GRU, GIG)'
+        }
+
+    # Validação de datas
+    try:
+        data_ida = datetime.strptime(data_ida_str, '%Y-%m-%d')
+        data_volta = datetime.strptime(data_volta_str, '%Y-%m-%d') if data_volta_str else None
+    except ValueError:
+        return None, {
+            'erro': 'Formato de data inválido',
+            'mensagem': 'Use o formato YYYY-MM-DD'
+        }
+
+    # Validação de classe
+    try:
+        cabin_class = CabinClass[classe]
+    except KeyError:
+        return None, {
+            'erro': 'Classe de cabine inválida',
+            'mensagem': 'Use: ECONOMY, PREMIUM_ECONOMY, BUSINESS ou FIRST'
+        }
+
+    # Cria parâmetros de busca
+    try:
+        params = FlightSearchParams(
+            origin=origem,
+            destination=destino,
+            departure_date=data_ida,
+            return_date=data_volta,
+            adults=passageiros,
+            children=criancas,
+            cabin_class=cabin_class,
+            currency=moeda,
+            max_results=max_resultados,
+            max_stops=int(max_paradas) if max_paradas is not None else None,
+            sort_by=ordenar
+        )
+    except (ValueError, TypeError) as e:
+        return None, {
+            'erro': 'Erro de validação',
+            'mensagem': str(e)
+        }
+
+    return params, None
+
+
+def parse_tier_request(data: dict, params: FlightSearchParams):
+    """
+    Política de escalonamento da busca: a da rota, com as sobrescritas de "escalonamento"
+
+    Returns:
+        (TierPolicy, None), (None, None) sem sobrescritas (vale a política da rota de
+        cada par de aeroportos) ou (None, corpo do erro 400)
+    """
+    opcoes = data.get('escalonamento')
+    if opcoes is None:
+        return None, None
+    if not isinstance(opcoes, dict):
+        return None, {
+            'erro': 'Escalonamento inválido',
+            'mensagem': 'Use um objeto com estrategia, min_resultados e/ou prazo'
+        }
+    try:
+        return tier_resolver.resolve(params.origin, params.destination, opcoes), None
+    except (ValueError, TypeError) as e:
+        return None, {
+            'erro': 'Escalonamento inválido',
+            'mensagem': str(e)
+        }
+
+
+def parse_airport_expansion(data: dict, params: FlightSearchParams):
+    """
+    Aeroportos consultados para a origem e o destino da busca
+
+    Códigos de metrópole (SAO, RIO, NYC...) viram os aeroportos da cidade; com
+    "aeroportos_proximos", entram também os aeroportos a até "raio_km" (no
+    máximo Config.MAX_NEARBY_RADIUS_KM).
+
+    Returns:
+        (origens, destinos, None) ou (None, None, corpo do erro 400)
+    """
+    proximos = bool(data.get('aeroportos_proximos', False))
+    try:
+        raio_km = float(data.get('raio_km', Config.NEARBY_RADIUS_KM))
+    except (TypeError, ValueError):
+        raio_km = -1
+    if not 0 < raio_km <= Config.MAX_NEARBY_RADIUS_KM:
+        return None, None, {
+            'erro': 'Raio inválido',
+            'mensagem': f'Informe raio_km entre 0 e {Config.MAX_NEARBY_RADIUS_KM:g} quilômetros'
+        }
+
+    origens, destinos = (
+        airport_directory.expand(code, proximos, raio_km, Config.MAX_AIRPORTS_PER_SIDE)
+        for code in (params.origin, params.destination)
+    )
+    return origens, destinos, None
+
+
+ROUND_TRIP_MODES = {'nativa': 'native', 'combinada': 'combined'}
+
+
+def parse_round_trip_mode(data: dict):
+    """
+    Como a ida e volta é montada: "nativa" (ofertas de ida e volta dos provedores)
+    ou "combinada" (dois trechos só de ida, reaproveitando o cache de cada trecho)
+
+    Returns:
+        (True se combinada, None) ou (None, corpo do erro 400)
+    """
+    modo = data.get('ida_volta')
+    if modo is None:
+        return Config.ROUND_TRIP_MODE == 'combined', None
+    if modo not in ROUND_TRIP_MODES:
+        return None, {
+            'erro': 'Modo de ida e volta inválido',
+            'mensagem': f"Use: {', '.join(ROUND_TRIP_MODES)}"
+        }
+    return ROUND_TRIP_MODES[modo] == 'combined', None
+
+
+def parse_multi_city_request(data: dict):
+    """
+    Valida o corpo JSON de uma busca de múltiplos destinos (POST /consulta/multidestino)
+
+    Cada trecho é validado como uma busca só de ida, com os campos comuns
+    (passageiros, classe, moeda, max_paradas...) do corpo principal.
+
+    Returns:
+        (MultiCitySearchParams, None) ou (None, corpo do erro 400)
+    """
+    trechos = (data or {}).get('trechos')
+    if not isinstance(trechos, list) or not all(isinstance(trecho, dict) for trecho in trechos):
+        return None, {
+            'erro': 'Trechos inválidos',
+            'mensagem': 'Informe "trechos" como uma lista de objetos com origem, destino e data_ida'
+        }
+
+    comuns = {campo: valor for campo, valor in data.items() if campo not in ('trechos', 'data_volta', 'max_resultados')}
+    legs = []
+    for numero, trecho in enumerate(trechos, start=1):
+        params, erro = parse_search_request({**comuns, **trecho, 'data_volta': None})
+        if erro:
+            return None, {**erro, 'trecho': numero}
+        legs.append(params)
+
+    max_resultados, erro = parse_max_results(data.get('max_resultados', Config.MAX_MULTI_CITY_RESULTS),
+                                             Config.MAX_MULTI_CITY_RESULTS)
+    if erro:
+        return None, erro
+
+    try:
+        return MultiCitySearchParams(
+            legs=legs,
+            max_results=max_resultados,
+            sort_by=data.get('ordenar', 'price')
+        ), None
+    except (ValueError, TypeError) as e:
+        return None, {
+            'erro': 'Erro de validação',
+            'mensagem': str(e)
+        }
+
+
+def describe_search(params: FlightSearchParams) -> dict:
+    """Parâmetros da busca no formato devolvido pela API"""
+    return {
+        'origem': params.origin,
+        'destino': params.destination,
+        'data_ida': params.departure_date.strftime('%Y-%m-%d'),
+        'data_volta': params.return_date.strftime('%Y-%m-%d') if params.return_date else None,
+        'passageiros': params.adults,
+        'criancas': params.children,
+        'classe': params.cabin_class.value,
+        'moeda': params.currency,
+        'max_resultados': params.max_results,
+        'max_paradas': params.max_stops,
+        'ordenar': params.sort_by
+    }
+
+
+# Conjuntos de resultados já indexados por busca (resultados são imutáveis)
+result_sets = InMemoryLRUCache(Config.RESULT_SET_CACHE_ENTRIES)
+
+# Versão da ordenação das páginas: entra nas ETags e nas páginas em cache para
+# que representações geradas com outra ordem de desempate não sejam reaproveitadas
+PAGE_ORDER_VERSION = 2
+
+
+def parse_page_request(args) -> tuple:
+    """
+    Lê os parâmetros de paginação, ordenação e filtro da query string
+
+    Returns:
+        (dicionário normalizado, None) ou (None, corpo do erro 400)
+    """
+    # Valores não numéricos são ignorados pelo type=int e caem no padrão
+    page = args.get('page', 1, type=int)
+    page_size = args.get('page_size', Config.DEFAULT_PAGE_SIZE, type=int)
+    max_stops = args.get('max_stops', type=int)
+
+    sort = args.get('sort', 'price')
+    if sort not in SORT_OPTIONS:
+        return None, {
+            'erro': 'Ordenação inválida',
+            'mensagem': f"Use: {', '.join(SORT_OPTIONS)}"
+        }
+
+    if page < 1 or not 1 <= page_size <= Config.MAX_PAGE_SIZE or (max_stops is not None and max_stops < 0):
+        return None, {
+            'erro': 'Parâmetros de paginação inválidos',
+            'mensagem': f'page >= 1, 1 <= page_size <= {Config.MAX_PAGE_SIZE} e max_stops >= 0'
+        }
+
+    airlines = sorted({code.strip().upper() for code in args.get('airline', '').split(',') if code.strip()})
+    return {
+        'page': page,
+        'page_size': page_size,
+        'sort': sort,
+        'max_stops': max_stops,
+        'airline': ','.join(airlines) or None
+    }, None
+
+
+def paginate_results(search_id: str, results: list, pagina: dict) -> dict:
+    """
+    Filtra, ordena e recorta os resultados armazenados de uma busca
+
+    Só os voos da página são devolvidos (como dicionários já serializáveis).
+    """
+    result_set = result_sets.get(search_id)
+    if result_set is None:
+        result_set = FlightResultSet.from_dicts(results or [])
+        result_sets.set(search_id, result_set)
+
+    selected = result_set.filter(
+        max_stops=pagina['max_stops'],
+        airlines=pagina['airline'].split(',') if pagina['airline'] else None
+    )
+    # ranked(limit=...) devolve o mesmo prefixo da ordenação completa (empates desfeitos por
+    # preço e posição original): as páginas se somam sem repetir nem pular voos
+    offset = (pagina['page'] - 1) * pagina['page_size']
+    ranked = selected.ranked(pagina['sort'], limit=offset + pagina['page_size'],
+                             weights=flight_service.best_value_weights)
+    total_filtrado = len(selected)
+
+    return {
+        'voos': ranked.rows(offset, pagina['page_size']),
+        'paginacao': {
+            'pagina': pagina['page'],
+            'tamanho_pagina': pagina['page_size'],
+            'total_filtrado': total_filtrado,
+            'total_paginas': max((total_filtrado + pagina['page_size'] - 1) // pagina['page_size'], 1)
+        },
+        'filtros': {
+            'sort': pagina['sort'],
+            'max_stops': pagina['max_stops'],
+            'airline': pagina['airline']
+        },
+        'companhias': result_set.airline_counts()
+    }
+
+
+def immutable_response(response: Response, etag: str) -> Response:
+    """Marca uma representação de resultados armazenados como cacheável por navegadores e CDNs"""
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = Config.RESULTS_HTTP_MAX_AGE
+    response.cache_control.immutable = True
+    return response
 
 
 @app.route('/')
@@ -60,11 +519,22 @@ def api_info():
             'GET /': 'Página inicial com formulário',
             'GET /api': 'Informações da API',
             'POST /consulta': 'Buscar voos com dados reais',
-            'GET /consulta/<search_id>': 'Recuperar busca anterior',
-            'GET /consulta/<search_id>/view': 'Ver resultados em HTML',
+            'POST /consulta/multidestino': 'Itinerários de múltiplos trechos (A→B, B→C, C→A)',
+            'GET /consulta/<search_id>': 'Recuperar busca anterior (?page=&page_size=&sort=&max_stops=&airline=)',
+            'GET /consulta/<search_id>/view': 'Ver resultados em HTML (mesmos parâmetros de paginação)',
             'GET /historico': 'Listar histórico de buscas',
             'GET /stats': 'Estatísticas de buscas',
-            'GET /health': 'Status da API'
+            'GET /health': 'Status da API',
+            'GET /calendario': 'Menor tarifa por dia de um mês (?origem=&destino=&mes=YYYY-MM)',
+            'GET /aeroportos': 'Autocomplete de aeroportos e cidades (?q=&limite=)',
+            'POST /watch': 'Monitorar uma busca (mesmo corpo de /consulta + intervalo em segundos)',
+            'GET /watch/<watch_id>': 'Estado da assinatura',
+            'GET /watch/<watch_id>/changes': 'Mudanças desde o cursor, por long-poll (?cursor=&timeout=)',
+            'GET /watch/<watch_id>/stream': 'Mudanças via Server-Sent Events',
+            'DELETE /watch/<watch_id>': 'Cancelar assinatura',
+            'GET /metrics': 'Métricas no formato Prometheus',
+            'GET|POST /admin/profiler': 'Status/controle do profiler (requer X-Admin-Token)',
+            'GET /admin/profiler/flamegraph': 'Pilhas agregadas no formato collapsed (requer X-Admin-Token)'
         },
         'example_request': {
             'origem': 'GRU',
@@ -95,11 +565,13 @@ def health():
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'providers': available_providers,
+        'pool_provedores': provider_executor.stats(),
         'database': 'connected'
     }), 200
 
 
 @app.route('/consulta', methods=['POST'])
+@profiled
 def consulta():
     """
     Endpoint para buscar passagens aéreas com dados reais
@@ -113,143 +585,197 @@ def consulta():
         "passageiros": 2,
         "criancas": 0,
         "classe": "ECONOMY",
-        "moeda": "BRL"
+        "moeda": "BRL",
+        "max_resultados": 50,     (opcional, por provedor)
+        "max_paradas": 1,         (opcional)
+        "ordenar": "price",       (opcional: price, duration, departure ou best)
+        "escalonamento": {        (opcional; padrão da rota em ROUTE_SEARCH_STRATEGIES)
+            "estrategia": "tiered",   (tiered: provedores por prioridade; all: todos de uma vez)
+            "min_resultados": 10,     (voos abaixo dos quais o próximo nível é consultado)
+            "prazo": 5                (segundos de espera por nível)
+        },
+        "aeroportos_proximos": true,  (opcional: inclui aeroportos a até raio_km)
+        "raio_km": 100,               (opcional)
+        "ida_volta": "combinada"      (opcional: nativa ou combinada, montada com dois trechos só de ida)
     }
 
+    Códigos de metrópole (SAO, RIO, NYC, LON...) buscam todos os aeroportos da cidade.
+
     Query Params:
     ?format=html - Retorna página HTML ao invés de JSON
+    ?debug=timing - Inclui o tempo de cada etapa da busca na resposta
     """
     try:
-        data = request.get_json()
+        trace = start_trace('consulta')
 
-        if not data:
-            return jsonify({
-                'erro': 'Dados não fornecidos',
-                'mensagem': 'É necessário enviar um JSON no corpo da requisição'
-            }), 400
+        with span('validation', SEARCH_STAGE_SECONDS, stage='validation'):
+            data = request.get_json()
+            params, erro = parse_search_request(data)
+            if erro:
+                return jsonify(erro), 400
+            tier_policy, erro = parse_tier_request(data, params)
+            if erro:
+                return jsonify(erro), 400
+            origens, destinos, erro = parse_airport_expansion(data, params)
+            if erro:
+                return jsonify(erro), 400
+            combinada, erro = parse_round_trip_mode(data)
+            if erro:
+                return jsonify(erro), 400
+            # Página HTML: paginação validada antes de buscar e gravar a busca
+            html = request.args.get('format') == 'html'
+            if html:
+                pagina, erro = parse_page_request(request.args)
+                if erro:
+                    return jsonify(erro), 400
 
-        # Validação de campos obrigatórios
-        campos_obrigatorios = ['origem', 'destino', 'data_ida', 'passageiros']
-        campos_faltando = [campo for campo in campos_obrigatorios if campo not in data]
+        logger.info(f"Iniciando busca: {params.origin} -> {params.destination} em {data['data_ida']}")
 
-        if campos_faltando:
-            return jsonify({
-                'erro': 'Campos obrigatórios faltando',
-                'campos_faltando': campos_faltando
-            }), 400
-
-        # Extrai e valida parâmetros
-        origem = data['origem'].upper()
-        destino = data['destino'].upper()
-        data_ida_str = data['data_ida']
-        data_volta_str = data.get('data_volta')
-        passageiros = data.get('passageiros', 1)
-        criancas = data.get('criancas', 0)
-        classe = data.get('classe', 'ECONOMY').upper()
-        moeda = data.get('moeda', 'BRL').upper()
-
-        # Validação de códigos de aeroporto
-        if len(origem) != 3 or len(destino) != 3:
-            return jsonify({
-                'erro': 'Códigos de aeroporto inválidos',
-                'mensagem': 'Use códigos IATA de 3 letras (ex: GRU, GIG)'
-            }), 400
+        # Busca voos usando o serviço
+        with client_limiter.slot(request.remote_addr or 'anonimo'):
+            flights = flight_service.search_airport_pairs(params, origens, destinos, tier_policy=tier_policy,
+                                                          combine_round_trip=combinada)
 
-        # Validação de datas
-        try:
-            data_ida = datetime.strptime(data_ida_str, '%Y-%m-%d')
-            data_volta = datetime.strptime(data_volta_str, '%Y-%m-%d') if data_volta_str else None
-        except ValueError:
-            return jsonify({
-                'erro': 'Formato de data inválido',
-                'mensagem': 'Use o formato YYYY-MM-DD'
-            }), 400
+        with span('to_dict', SEARCH_STAGE_SECONDS, stage='to_dict'):
+            flights_dict = [flight.to_dict() for flight in flights]
 
-        # Validação de classe
-        try:
-            cabin_class = CabinClass[classe]
-        except KeyError:
-            return jsonify({
-                'erro': 'Classe de cabine inválida',
-                'mensagem': 'Use: ECONOMY, PREMIUM_ECONOMY, BUSINESS ou FIRST'
-            }), 400
+        # Salva a busca no repositório
+        with span('persistence', SEARCH_STAGE_SECONDS, stage='repository_write'):
+            search_id = search_repository.save_search(data)
+            search_repository.save_results(search_id, flights_dict)
 
-        # Cria parâmetros de busca
-        try:
-            params = FlightSearchParams(
-                origin=origem,
-                destination=destino,
-                departure_date=data_ida,
-                return_date=data_volta,
-                adults=passageiros,
-                children=criancas,
-                cabin_class=cabin_class,
-                currency=moeda
-            )
-        except ValueError as e:
-            return jsonify({
-                'erro': 'Erro de validação',
-                'mensagem': str(e)
-            }), 400
+        parametros = describe_search(params)
+        if origens != [params.origin] or destinos != [params.destination]:
+            parametros['aeroportos_origem'] = origens
+            parametros['aeroportos_destino'] = destinos
+        if params.return_date:
+            parametros['ida_volta'] = 'combinada' if combinada else 'nativa'
 
-        logger.info(f"Iniciando busca: {origem} -> {destino} em {data_ida_str}")
+        debug_timing = request.args.get('debug') == 'timing'
 
-        # Busca voos usando o serviço
-        flights = flight_service.search_flights(params)
+        # Verifica se deve retornar HTML
+        if html:
+            # Renderiza só a primeira página; as demais são servidas por /consulta/<id>/view
+            with span('serialization', SEARCH_STAGE_SECONDS, stage='serialization'):
+                response = render_template('results.html',
+                    search_id=search_id,
+                    timestamp=datetime.now().isoformat(),
+                    parametros=parametros,
+                    total_resultados=len(flights),
+                    timing=trace.breakdown() if debug_timing else None,
+                    **paginate_results(search_id, flights_dict, pagina)
+                )
+        else:
+            body = {
+                'sucesso': True,
+                'search_id': search_id,
+                'timestamp': datetime.now().isoformat(),
+                'parametros': parametros,
+                'total_resultados': len(flights),
+                'voos': flights_dict
+            }
+            if debug_timing:
+                body['timing'] = trace.breakdown()
 
-        # Salva a busca no repositório
-        search_id = search_repository.save_search(data)
-        flights_dict = [flight.to_dict() for flight in flights]
-        search_repository.save_results(search_id, flights_dict)
+            with span('serialization', SEARCH_STAGE_SECONDS, stage='serialization'):
+                response = jsonify(body)
 
-        # Verifica se deve retornar HTML
-        if request.args.get('format') == 'html':
-            return render_template('results.html',
-                search_id=search_id,
-                timestamp=datetime.now().isoformat(),
-                parametros={
-                    'origem': origem,
-                    'destino': destino,
-                    'data_ida': data_ida_str,
-                    'data_volta': data_volta_str,
-                    'passageiros': passageiros,
-                    'criancas': criancas,
-                    'classe': classe,
-                    'moeda': moeda
-                },
-                total_resultados=len(flights),
-                voos=flights_dict
-            )
+        # O breakdown persistido inclui a serialização da resposta
+        search_repository.save_timing(search_id, trace.breakdown())
+        return response, 200
 
+    except Overloaded as e:
+        logger.warning(f"Busca recusada ({e.status}): {str(e)}")
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Erro na consulta: {str(e)}", exc_info=True)
         return jsonify({
+            'erro': 'Erro interno do servidor',
+            'mensagem': str(e)
+        }), 500
+    finally:
+        end_trace()
+
+
+@app.route('/consulta/multidestino', methods=['POST'])
+def consulta_multidestino():
+    """
+    Busca de múltiplos destinos (A→B, B→C, C→A) em uma única requisição
+
+    Os trechos são buscados em paralelo (cada um com o cache das buscas só de
+    ida) e combinados nos itinerários mais baratos que respeitam a conexão
+    mínima entre trechos (Config.MIN_CONNECTION_MINUTES).
+
+    Body JSON:
+    {
+        "trechos": [
+            {"origem": "GRU", "destino": "LIS", "data_ida": "2025-03-01"},
+            {"origem": "LIS", "destino": "MAD", "data_ida": "2025-03-05"},
+            {"origem": "MAD", "destino": "GRU", "data_ida": "2025-03-12"}
+        ],
+        "passageiros": 1,
+        "criancas": 0,
+        "classe": "ECONOMY",
+        "moeda": "BRL",
+        "max_resultados": 20,     (opcional, itinerários)
+        "max_paradas": 1,         (opcional, por trecho)
+        "ordenar": "price"        (opcional: price, duration, departure ou best)
+    }
+
+    Query Params:
+    ?debug=timing - Inclui o tempo de cada etapa da busca na resposta
+    """
+    try:
+        trace = start_trace('consulta_multidestino')
+
+        with span('validation', SEARCH_STAGE_SECONDS, stage='validation'):
+            params, erro = parse_multi_city_request(request.get_json(silent=True))
+            if erro:
+                return jsonify(erro), 400
+
+        with client_limiter.slot(request.remote_addr or 'anonimo'):
+            itineraries = flight_service.search_multi_city(params)
+
+        with span('to_dict', SEARCH_STAGE_SECONDS, stage='to_dict'):
+            itinerarios = [itinerary.to_dict() for itinerary in itineraries]
+
+        body = {
             'sucesso': True,
-            'search_id': search_id,
             'timestamp': datetime.now().isoformat(),
             'parametros': {
-                'origem': origem,
-                'destino': destino,
-                'data_ida': data_ida_str,
-                'data_volta': data_volta_str,
-                'passageiros': passageiros,
-                'criancas': criancas,
-                'classe': classe,
-                'moeda': moeda
+                'trechos': [describe_search(leg) for leg in params.legs],
+                'max_resultados': params.max_results,
+                'ordenar': params.sort_by
             },
-            'total_resultados': len(flights),
-            'voos': flights_dict
-        }), 200
+            'total_resultados': len(itinerarios),
+            'itinerarios': itinerarios
+        }
+        if request.args.get('debug') == 'timing':
+            body['timing'] = trace.breakdown()
+
+        with span('serialization', SEARCH_STAGE_SECONDS, stage='serialization'):
+            return jsonify(body), 200
 
+    except Overloaded as e:
+        logger.warning(f"Busca recusada ({e.status}): {str(e)}")
+        return overloaded_response(e)
     except Exception as e:
-        logger.error(f"Erro na consulta: {str(e)}", exc_info=True)
+        logger.error(f"Erro na consulta de múltiplos destinos: {str(e)}", exc_info=True)
         return jsonify({
             'erro': 'Erro interno do servidor',
             'mensagem': str(e)
         }), 500
+    finally:
+        end_trace()
 
 
 @app.route('/consulta/<search_id>/view', methods=['GET'])
 def view_consulta(search_id):
-    """Renderiza os resultados de uma busca em HTML"""
+    """
+    Renderiza uma página dos resultados de uma busca em HTML
+
+    Query Params: page, page_size, sort, max_stops, airline (ver GET /consulta/<search_id>)
+    """
     search = search_repository.get_search(search_id)
 
     if not search:
@@ -258,20 +784,49 @@ def view_consulta(search_id):
             mensagem=f'Nenhuma busca encontrada com o ID {search_id}'
         ), 404
 
+    pagina, erro = parse_page_request(request.args)
+    if erro:
+        return render_template('error.html', **erro), 400
+
+    etag = make_etag('view', PAGE_ORDER_VERSION, search_id, *pagina.values())
+    cached_tag = if_none_match_tag(etag)
+    if cached_tag:
+        return immutable_response(Response(status=304), cached_tag)
+
+    # Resultados de uma busca são imutáveis: cada página renderizada pode ser reaproveitada
+    page_key = 'page:v{}:{}:{page}:{page_size}:{sort}:{max_stops}:{airline}'.format(PAGE_ORDER_VERSION, search_id, **pagina)
+    html = cache_backend.get(page_key)
+    if html is not None:
+        CACHE_REQUESTS.inc(cache='page', result='hit')
+        return immutable_response(make_response(html), etag)
+    CACHE_REQUESTS.inc(cache='page', result='miss')
+
     results = search_repository.get_results(search_id)
 
-    return render_template('results.html',
+    html = render_template('results.html',
         search_id=search_id,
         timestamp=search['timestamp'],
         parametros=search['data'],
         total_resultados=len(results) if results else 0,
-        voos=results
+        **paginate_results(search_id, results, pagina)
     )
+    cache_backend.set(page_key, html, Config.PAGE_CACHE_TTL)
+    return immutable_response(make_response(html), etag)
 
 
 @app.route('/consulta/<search_id>', methods=['GET'])
 def get_consulta(search_id):
-    """Recupera uma busca anterior pelo ID"""
+    """
+    Recupera uma página dos resultados de uma busca anterior pelo ID
+
+    Query Params:
+    ?page=1 - Página (a partir de 1)
+    ?page_size=20 - Voos por página (máximo Config.MAX_PAGE_SIZE)
+    ?sort=price - price, duration, departure ou best
+    ?max_stops=N - Número máximo de paradas
+    ?airline=LA,G3 - Apenas as companhias informadas
+    ?debug=timing - Inclui o tempo de cada etapa da busca original
+    """
     search = search_repository.get_search(search_id)
 
     if not search:
@@ -280,19 +835,283 @@ def get_consulta(search_id):
             'mensagem': f'Nenhuma busca encontrada com o ID {search_id}'
         }), 404
 
+    pagina, erro = parse_page_request(request.args)
+    if erro:
+        return jsonify(erro), 400
+
+    # Resultados armazenados não mudam: a ETag depende só da busca e dos parâmetros da página
+    debug_timing = request.args.get('debug') == 'timing'
+    etag = make_etag('json', PAGE_ORDER_VERSION, search_id, *pagina.values(), debug_timing)
+    cached_tag = if_none_match_tag(etag)
+    if cached_tag:
+        return immutable_response(Response(status=304), cached_tag)
+
     results = search_repository.get_results(search_id)
 
-    return jsonify({
+    response = jsonify({
         'sucesso': True,
         'search_id': search_id,
         'timestamp': search['timestamp'],
         'status': search['status'],
         'parametros': search['data'],
         'total_resultados': len(results) if results else 0,
-        'voos': results
+        **paginate_results(search_id, results, pagina),
+        **({'timing': search.get('timing')} if debug_timing else {})
+    })
+    return immutable_response(response, etag), 200
+
+
+@app.route('/aeroportos', methods=['GET'])
+def aeroportos():
+    """
+    Autocomplete de aeroportos e cidades pela base local (sem acentos, por prefixo)
+
+    Query Params:
+    ?q=sao - Código, cidade ou nome do aeroporto (prefixo)
+    &limite=8 - Máximo de sugestões
+    """
+    q = request.args.get('q', '').strip()
+    limite = max(1, min(request.args.get('limite', Config.AUTOCOMPLETE_LIMIT, type=int), Config.AUTOCOMPLETE_MAX_LIMIT))
+
+    response = jsonify({
+        'sucesso': True,
+        'q': q,
+        'resultados': airport_directory.search(q, limite) if q else []
+    })
+    # A base é estática durante a vida do processo
+    response.cache_control.public = True
+    response.cache_control.max_age = Config.AUTOCOMPLETE_HTTP_MAX_AGE
+    return response, 200
+
+
+@app.route('/calendario', methods=['GET'])
+def calendario():
+    """
+    Menor tarifa por passageiro para cada dia de um mês, a partir do índice de tarifas
+
+    Query Params:
+    ?origem=GRU&destino=LIS&mes=2026-03 - Obrigatórios
+    &classe=ECONOMY&moeda=BRL - Opcionais
+    &max_buscas=5 - Buscas ao vivo permitidas para dias sem tarifa ou desatualizados (0 = só o índice)
+    """
+    origem = request.args.get('origem', '').upper()
+    destino = request.args.get('destino', '').upper()
+    mes = request.args.get('mes', '')
+    classe = request.args.get('classe', 'ECONOMY').upper()
+    moeda = request.args.get('moeda', Config.DEFAULT_CURRENCY).upper()
+    max_buscas = min(request.args.get('max_buscas', Config.CALENDAR_MAX_LIVE_SEARCHES, type=int),
+                     Config.CALENDAR_MAX_LIVE_SEARCHES)
+
+    if len(origem) != 3 or len(destino) != 3:
+        return jsonify({
+            'erro': 'Códigos de aeroporto inválidos',
+            'mensagem': 'Use códigos IATA de 3 letras (ex: GRU, GIG)'
+        }), 400
+
+    try:
+        mes_inicio = datetime.strptime(mes, '%Y-%m')
+    except ValueError:
+        return jsonify({
+            'erro': 'Formato de mês inválido',
+            'mensagem': 'Use o formato YYYY-MM'
+        }), 400
+
+    try:
+        cabin_class = CabinClass[classe]
+    except KeyError:
+        return jsonify({
+            'erro': 'Classe de cabine inválida',
+            'mensagem': 'Use: ECONOMY, PREMIUM_ECONOMY, BUSINESS ou FIRST'
+        }), 400
+
+    view = fare_index.month_view(origem, destino, mes_inicio.year, mes_inicio.month, classe)
+
+    # Busca ao vivo apenas os dias futuros sem tarifa ou com tarifa desatualizada
+    hoje = date.today().isoformat()
+    pendentes = [
+        dia for dia, cell in view.items()
+        if dia > hoje and (cell is None
+                          or cell.is_stale(fare_index.max_age_seconds)
+                          or fx_rates.rate(cell.currency, moeda) is None)
+    ][:max(max_buscas, 0)]
+
+    if pendentes:
+        def buscar_dia(dia: str):
+            params = FlightSearchParams(
+                origin=origem,
+                destination=destino,
+                departure_date=datetime.strptime(dia, '%Y-%m-%d'),
+                cabin_class=cabin_class,
+                currency=moeda
+            )
+            # Buscas do calendário são oportunistas: sem capacidade ou com falha, o dia fica com o valor indexado
+            try:
+                flight_service.search_flights(params)
+            except Overloaded:
+                logger.warning(f"Calendário {origem} -> {destino}: busca de {dia} recusada por sobrecarga")
+            except Exception as e:
+                logger.warning(f"Calendário {origem} -> {destino}: busca de {dia} falhou: {e}")
+
+        # Cada dia ocupa uma vaga do pool limitado de trechos (o mesmo das buscas
+        # expandidas); dias sem vaga ficam com o valor indexado
+        logger.info(f"Calendário {origem} -> {destino} {mes}: {len(pendentes)} buscas ao vivo")
+        futures = []
+        for dia in pendentes:
+            try:
+                futures.extend(flight_service.leg_executor.submit_all(
+                    [(contextvars.copy_context().run, (buscar_dia, dia))]))
+            except Overloaded:
+                logger.warning(f"Calendário {origem} -> {destino}: busca de {dia} recusada por sobrecarga")
+        for future in futures:
+            future.result()
+
+        view = fare_index.month_view(origem, destino, mes_inicio.year, mes_inicio.month, classe)
+
+    dias = []
+    for dia, cell in view.items():
+        entrada = {'data': dia}
+        if cell is not None:
+            entrada.update(cell.to_dict(fare_index.max_age_seconds))
+            preco = fx_rates.convert(cell.price, cell.currency, moeda)
+            if preco is not None:
+                entrada['price'], entrada['currency'] = preco, moeda
+        else:
+            entrada['price'] = None
+        dias.append(entrada)
+
+    com_preco = [d for d in dias if d['price'] is not None and d['currency'] == moeda]
+    mais_barato = min(com_preco, key=lambda d: d['price']) if com_preco else None
+
+    return jsonify({
+        'sucesso': True,
+        'rota': {'origem': origem, 'destino': destino, 'classe': classe},
+        'mes': mes,
+        'moeda': moeda,
+        'buscas_ao_vivo': len(pendentes),
+        'mais_barato': mais_barato,
+        'dias': dias
     }), 200
 
 
+@app.route('/watch', methods=['POST'])
+def criar_watch():
+    """
+    Cria uma assinatura de monitoramento de preços
+
+    Body JSON: o mesmo de POST /consulta, mais "intervalo" (segundos entre buscas).
+    Retorna o snapshot completo atual e o cursor; depois disso o cliente recebe
+    apenas as mudanças por /watch/<id>/changes ou /watch/<id>/stream.
+    Disponível só com CACHE_BACKEND=memory (501 nos demais backends).
+    """
+    if Config.CACHE_BACKEND != 'memory':
+        # As assinaturas vivem na memória de um processo; com vários workers, as demais rotas dariam 404
+        return jsonify({
+            'erro': 'Monitoramento indisponível',
+            'mensagem': 'As assinaturas exigem CACHE_BACKEND=memory (um único processo)'
+        }), 501
+
+    data = request.get_json(silent=True)
+    params, erro = parse_search_request(data)
+    if erro:
+        return jsonify(erro), 400
+    origens, destinos, erro = parse_airport_expansion(data, params)
+    if erro:
+        return jsonify(erro), 400
+    combinada, erro = parse_round_trip_mode(data)
+    if erro:
+        return jsonify(erro), 400
+
+    try:
+        intervalo = int(data['intervalo']) if data.get('intervalo') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({
+            'erro': 'Intervalo inválido',
+            'mensagem': 'Informe o intervalo em segundos'
+        }), 400
+
+    busca = {campo: valor for campo, valor in data.items() if campo != 'intervalo'}
+    try:
+        watch, snapshot = watch_manager.subscribe(params, busca, intervalo, origens, destinos, combinada)
+    except Overloaded as e:
+        return overloaded_response(e)
+
+    parametros = describe_search(params)
+    if origens != [params.origin] or destinos != [params.destination]:
+        parametros['aeroportos_origem'] = origens
+        parametros['aeroportos_destino'] = destinos
+
+    return jsonify({
+        'sucesso': True,
+        **watch.to_dict(),
+        'parametros': parametros,
+        **snapshot
+    }), 201
+
+
+def _watch_nao_encontrado(watch_id):
+    return jsonify({
+        'erro': 'Assinatura não encontrada',
+        'mensagem': f'Nenhuma assinatura ativa com o ID {watch_id}'
+    }), 404
+
+
+@app.route('/watch/<watch_id>', methods=['GET'])
+def get_watch(watch_id):
+    """Estado da assinatura (cursor atual, última e próxima busca)"""
+    info = watch_manager.get_watch(watch_id)
+    if info is None:
+        return _watch_nao_encontrado(watch_id)
+    return jsonify(info), 200
+
+
+@app.route('/watch/<watch_id>', methods=['DELETE'])
+def delete_watch(watch_id):
+    """Cancela a assinatura"""
+    if not watch_manager.unsubscribe(watch_id):
+        return _watch_nao_encontrado(watch_id)
+    return jsonify({'sucesso': True}), 200
+
+
+@app.route('/watch/<watch_id>/changes', methods=['GET'])
+def watch_changes(watch_id):
+    """
+    Long-poll: devolve as mudanças posteriores ao cursor assim que existirem
+
+    Query Params:
+    ?cursor=N - Último evento recebido (padrão: 0)
+    ?timeout=S - Espera máxima em segundos (padrão e limite: Config.WATCH_LONG_POLL_TIMEOUT)
+    """
+    cursor = request.args.get('cursor', 0, type=int)
+    timeout = request.args.get('timeout', Config.WATCH_LONG_POLL_TIMEOUT, type=float)
+    timeout = min(max(timeout, 0), Config.WATCH_LONG_POLL_TIMEOUT)
+
+    result = watch_manager.changes(watch_id, cursor, timeout)
+    if result is None:
+        return _watch_nao_encontrado(watch_id)
+    return jsonify(result), 200
+
+
+@app.route('/watch/<watch_id>/stream', methods=['GET'])
+def watch_stream(watch_id):
+    """
+    Server-Sent Events com as mudanças da assinatura
+
+    Retoma do cabeçalho Last-Event-ID (reconexão do EventSource) ou de ?cursor=N.
+    """
+    if watch_manager.get_watch(watch_id) is None:
+        return _watch_nao_encontrado(watch_id)
+
+    cursor = request.headers.get('Last-Event-ID', type=int)
+    if cursor is None:
+        cursor = request.args.get('cursor', 0, type=int)
+
+    return Response(
+        stream_with_context(watch_manager.stream(watch_id, cursor)),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/historico', methods=['GET'])
 def historico():
     """Lista todas as buscas realizadas"""
@@ -319,6 +1138,68 @@ def stats():
     }), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expõe as métricas no formato texto do Prometheus"""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def admin_required(view):
+    """Exige o header X-Admin-Token igual a Config.ADMIN_TOKEN"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not Config.ADMIN_TOKEN or request.headers.get('X-Admin-Token') != Config.ADMIN_TOKEN:
+            return jsonify({
+                'erro': 'Acesso negado',
+                'mensagem': 'Endpoint administrativo requer X-Admin-Token válido'
+            }), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.route('/admin/profiler', methods=['GET', 'POST'])
+@admin_required
+def admin_profiler():
+    """
+    Consulta ou altera o estado do profiler
+
+    Body JSON (POST):
+    {
+        "enabled": true,
+        "sample_rate": 0.1
+    }
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        sample_rate = data.get('sample_rate')
+
+        try:
+            sample_rate = float(sample_rate) if sample_rate is not None else None
+        except (TypeError, ValueError):
+            return jsonify({
+                'erro': 'Parâmetro inválido',
+                'mensagem': 'sample_rate deve ser um número entre 0 e 1'
+            }), 400
+
+        if data.get('enabled', True):
+            profiler.start(sample_rate)
+        else:
+            profiler.stop()
+
+    return jsonify({
+        'sucesso': True,
+        'profiler': profiler.status()
+    }), 200
+
+
+@app.route('/admin/profiler/flamegraph', methods=['GET'])
+@admin_required
+def admin_flamegraph():
+    """Retorna as pilhas dos últimos ?seconds=N segundos (padrão 60) no formato collapsed"""
+    seconds = request.args.get('seconds', 60, type=int)
+    return Response(profiler.collapsed(seconds), content_type='text/plain; charset=utf-8')
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handler para rotas não encontradas"""
@@ -0,0 +1,273 @@
+"""
+Arquivo histórico - Resultados de buscas em blocos colunares comprimidos (Single Responsibility)
+
+Cada busca concluída nos provedores (acertos de cache não são repetidos)
+vira linhas em colunas: códigos de companhia, aeroporto, provedor, moeda e
+cabine são codificados por dicionário; datas viram epochs inteiros e
+preços float32. Os blocos são gravados em arquivos .npz comprimidos, com o
+intervalo de tempo coberto no nome, e podem ser varridos com filtros
+vetorizados sem reconstruir dicionários de voos. Uma thread própria grava o
+buffer quando as linhas mais antigas atingem flush_seconds, mesmo sem novas
+buscas.
+"""
+import atexit
+import glob
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from interfaces import Flight, FlightSearchParams
+
+logger = logging.getLogger(__name__)
+
+# Colunas codificadas por dicionário (cada bloco guarda o seu em "<coluna>_dict")
+CATEGORICAL_COLUMNS = ('provider', 'airline', 'origin', 'destination', 'currency', 'cabin')
+
+NUMERIC_COLUMNS = {
+    'searched_at': np.int64,
+    'departure': np.int64,
+    'arrival': np.int64,
+    'price': np.float32,
+    'duration_minutes': np.int32,
+    'stops': np.int8,
+    'passengers': np.int8,
+    'round_trip': np.bool_,
+}
+
+
+class ResultArchive:
+    """Acumula linhas em memória e grava um bloco .npz a cada chunk_rows (ou flush_seconds)"""
+
+    def __init__(self, directory: str, chunk_rows: int = 50000, flush_seconds: int = 300):
+        """
+        Args:
+            directory: Diretório dos blocos
+            chunk_rows: Linhas por bloco
+            flush_seconds: Idade máxima de linhas ainda não gravadas (0 grava só por tamanho)
+        """
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.flush_seconds = flush_seconds
+        self._columns: Dict[str, list] = self._empty_buffer()
+        self._first_row_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        self._thread = None
+        if flush_seconds > 0:
+            self._thread = threading.Thread(target=self._run, name='archive-flush', daemon=True)
+            self._thread.start()
+        logger.info(f"Arquivo histórico em {directory}")
+
+    @staticmethod
+    def _empty_buffer() -> Dict[str, list]:
+        return {name: [] for name in (*CATEGORICAL_COLUMNS, *NUMERIC_COLUMNS)}
+
+    def record_search(self, params: FlightSearchParams, flights: List[Flight]) -> None:
+        """Listener do FlightSearchService: acrescenta os voos de uma busca ao buffer"""
+        if not flights:
+            return
+
+        searched_at = int(time.time())
+        passengers = params.adults + params.children
+        round_trip = params.return_date is not None
+
+        with self._lock:
+            columns = self._columns
+            for flight in flights:
+                columns['provider'].append(flight.provider)
+                columns['airline'].append(flight.airline)
+                columns['origin'].append(flight.origin.code)
+                columns['destination'].append(flight.destination.code)
+                columns['currency'].append(flight.currency)
+                columns['cabin'].append(flight.cabin_class or params.cabin_class.value)
+                columns['searched_at'].append(searched_at)
+                columns['departure'].append(int(flight.departure_datetime.timestamp()))
+                columns['arrival'].append(int(flight.arrival_datetime.timestamp()))
+                columns['price'].append(flight.price)
+                columns['duration_minutes'].append(flight.duration_minutes)
+                columns['stops'].append(flight.stops)
+                columns['passengers'].append(passengers)
+                columns['round_trip'].append(round_trip)
+
+            if self._first_row_at is None:
+                self._first_row_at = time.time()
+            due = len(columns['price']) >= self.chunk_rows
+
+        if due:
+            self.flush()
+
+    def _run(self) -> None:
+        """Grava o buffer quando a linha mais antiga completa flush_seconds"""
+        delay = self.flush_seconds
+        while not self._stopped.wait(delay):
+            with self._lock:
+                first_row_at = self._first_row_at
+            remaining = first_row_at + self.flush_seconds - time.time() if first_row_at is not None else None
+            if remaining is not None and remaining <= 0:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Erro ao gravar bloco do arquivo histórico: {str(e)}")
+                remaining = None
+            delay = self.flush_seconds if remaining is None else remaining
+
+    def flush(self) -> Optional[str]:
+        """
+        Grava as linhas pendentes em um novo bloco
+
+        Returns:
+            Caminho do arquivo gravado ou None se não havia linhas
+        """
+        with self._lock:
+            columns, self._columns = self._columns, self._empty_buffer()
+            self._first_row_at = None
+
+        if not columns['price']:
+            return None
+
+        arrays = {}
+        for name in CATEGORICAL_COLUMNS:
+            values, codes = np.unique(np.array(columns[name], dtype=str), return_inverse=True)
+            arrays[f'{name}_dict'] = values
+            arrays[name] = codes.astype(np.uint16 if len(values) <= np.iinfo(np.uint16).max else np.uint32)
+        for name, dtype in NUMERIC_COLUMNS.items():
+            arrays[name] = np.array(columns[name], dtype=dtype)
+
+        searched_at = arrays['searched_at']
+        filename = f"results-{searched_at.min()}-{searched_at.max()}-{uuid.uuid4().hex[:8]}.npz"
+        path = os.path.join(self.directory, filename)
+
+        # Grava em arquivo temporário e renomeia, para leitores nunca verem um bloco incompleto
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as handle:
+            np.savez_compressed(handle, **arrays)
+        os.replace(temp_path, path)
+
+        logger.info(f"Bloco do arquivo histórico gravado: {filename} ({len(searched_at)} linhas)")
+        return path
+
+    def close(self) -> None:
+        """Encerra a gravação periódica e grava o buffer pendente"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def register_exit_flush(self) -> None:
+        """Grava o buffer pendente quando o processo termina"""
+        atexit.register(self.close)
+
+
+def _chunk_paths(directory: str, since: Optional[int], until: Optional[int]) -> List[str]:
+    """Blocos cujo intervalo de busca (no nome do arquivo) cruza a janela pedida"""
+    paths = []
+    for path in sorted(glob.glob(os.path.join(directory, 'results-*.npz'))):
+        _, first, last, _ = os.path.basename(path)[:-len('.npz')].split('-')
+        if since is not None and int(last) < since:
+            continue
+        if until is not None and int(first) > until:
+            continue
+        paths.append(path)
+    return paths
+
+
+def scan(directory: str, origin: Optional[str] = None, destination: Optional[str] = None,
+         airline: Optional[str] = None, provider: Optional[str] = None, cabin: Optional[str] = None,
+         since: Optional[int] = None, until: Optional[int] = None,
+         departure_from: Optional[int] = None, departure_to: Optional[int] = None,
+         max_stops: Optional[int] = None, round_trip: Optional[bool] = None) -> Dict[str, np.ndarray]:
+    """
+    Varre os blocos aplicando filtros vetorizados
+
+    Args:
+        directory: Diretório dos blocos
+        origin, destination, airline, provider, cabin: Igualdade sobre as colunas codificadas,
+            sem diferenciar maiúsculas ('GRU' e 'gru', 'Amadeus' e 'AMADEUS')
+        since, until: Janela do momento da busca (epoch, inclusivo)
+        departure_from, departure_to: Janela da partida (epoch, inclusivo)
+        max_stops: Limite de paradas
+        round_trip: Apenas ida e volta (True) ou apenas só ida (False)
+
+    Returns:
+        Dicionário coluna -> array com as linhas selecionadas de todos os blocos;
+        colunas categóricas já decodificadas para strings
+    """
+    equals = {'origin': origin, 'destination': destination, 'airline': airline,
+              'provider': provider, 'cabin': cabin}
+    parts: Dict[str, List[np.ndarray]] = {name: [] for name in (*CATEGORICAL_COLUMNS, *NUMERIC_COLUMNS)}
+
+    for path in _chunk_paths(directory, since, until):
+        with np.load(path) as chunk:
+            mask = np.ones(len(chunk['price']), dtype=bool)
+
+            skip = False
+            for name, value in equals.items():
+                if value is None:
+                    continue
+                # O valor é procurado uma vez no dicionário do bloco; a comparação é feita sobre os códigos
+                matches = np.flatnonzero(np.char.upper(chunk[f'{name}_dict']) == value.upper())
+                if not len(matches):
+                    skip = True
+                    break
+                mask &= np.isin(chunk[name], matches)
+            if skip:
+                continue
+
+            if since is not None:
+                mask &= chunk['searched_at'] >= since
+            if until is not None:
+                mask &= chunk['searched_at'] <= until
+            if departure_from is not None:
+                mask &= chunk['departure'] >= departure_from
+            if departure_to is not None:
+                mask &= chunk['departure'] <= departure_to
+            if max_stops is not None:
+                mask &= chunk['stops'] <= max_stops
+            if round_trip is not None:
+                mask &= chunk['round_trip'] == round_trip
+
+            if not mask.any():
+                continue
+
+            for name in CATEGORICAL_COLUMNS:
+                parts[name].append(chunk[f'{name}_dict'][chunk[name][mask]])
+            for name in NUMERIC_COLUMNS:
+                parts[name].append(chunk[name][mask])
+
+    return {
+        name: np.concatenate(arrays) if arrays else np.array([], dtype=NUMERIC_COLUMNS.get(name, str))
+        for name, arrays in parts.items()
+    }
+
+
+def daily_price_summary(rows: Dict[str, np.ndarray]) -> List[Dict]:
+    """
+    Menor, mediana e quantidade de preços por passageiro agrupados pelo dia da busca
+
+    Args:
+        rows: Resultado de scan() (de preferência filtrado em uma rota e uma moeda)
+    """
+    if not len(rows['price']):
+        return []
+
+    per_passenger = rows['price'] / np.maximum(rows['passengers'], 1)
+    days = rows['searched_at'] // 86400
+    order = np.argsort(days, kind='stable')
+    days, per_passenger = days[order], per_passenger[order]
+    unique_days, starts = np.unique(days, return_index=True)
+
+    summary = []
+    for day, prices in zip(unique_days, np.split(per_passenger, starts[1:])):
+        summary.append({
+            'dia': time.strftime('%Y-%m-%d', time.gmtime(int(day) * 86400)),
+            'minimo': round(float(prices.min()), 2),
+            'mediana': round(float(np.median(prices)), 2),
+            'ofertas': int(len(prices))
+        })
+    return summary
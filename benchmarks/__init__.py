@@ -0,0 +1,3 @@
+"""
+Benchmarks de desempenho - Fixtures, servidores simulados e medições do pipeline de busca
+"""
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark do parser de ofertas Amadeus
+
+Uso:
+    python -m benchmarks.bench_amadeus_parser
+    python -m benchmarks.bench_amadeus_parser --fixture gravacao.json.gz --repeat 50
+"""
+import argparse
+import json
+import statistics
+import time
+
+from amadeus_parser import AmadeusOfferParser, parse_iso_datetime, parse_iso_duration
+from benchmarks.fixtures import build_amadeus_response, load_fixture
+
+
+def run(payload: dict, repeat: int) -> dict:
+    """Executa o parser `repeat` vezes e retorna as estatísticas em milissegundos"""
+    parser = AmadeusOfferParser()
+    offers = len(payload.get('data', []))
+
+    # Primeira passada com caches frios
+    parse_iso_datetime.cache_clear()
+    parse_iso_duration.cache_clear()
+    start = time.perf_counter()
+    flights = parser.parse(payload)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser.parse(payload)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    median_ms = statistics.median(timings)
+    return {
+        'benchmark': 'amadeus_parser',
+        'offers': offers,
+        'flights': len(flights),
+        'repeat': repeat,
+        'cold_ms': round(cold_ms, 3),
+        'median_ms': round(median_ms, 3),
+        'min_ms': round(min(timings), 3),
+        'offers_per_second': round(offers / (median_ms / 1000)) if median_ms else None,
+        'datetime_cache': parse_iso_datetime.cache_info()._asdict(),
+        'duration_cache': parse_iso_duration.cache_info()._asdict()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark do parser Amadeus')
+    parser.add_argument('--fixture', help='Resposta gravada (JSON ou .json.gz); padrão: 250 ofertas geradas')
+    parser.add_argument('--offers', type=int, default=250, help='Ofertas da fixture gerada')
+    parser.add_argument('--repeat', type=int, default=20, help='Repetições medidas')
+    args = parser.parse_args()
+
+    payload = load_fixture(args.fixture) if args.fixture else build_amadeus_response(args.offers, round_trip=True)
+    print(json.dumps(run(payload, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Servidores HTTP locais que simulam as APIs Kiwi.com e Amadeus
+
+Permitem executar benchmarks com os provedores reais (requests + parse)
+sem acesso à rede e sem API keys.
+"""
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks.fixtures import build_amadeus_response, build_kiwi_response
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class FakeProviderServer:
+    """Servidor HTTP em thread própria que responde como Kiwi (/v2/search) e Amadeus (/v2/shopping/flight-offers)"""
+
+    def __init__(self, kiwi_payload: Optional[dict] = None, amadeus_payload: Optional[dict] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            kiwi_payload: Resposta servida em /v2/search
+            amadeus_payload: Resposta servida em /v2/shopping/flight-offers
+            host: Interface de escuta
+            port: Porta (0 escolhe uma porta livre)
+        """
+        self.kiwi_body = b''
+        self.amadeus_body = b''
+        self.set_payloads(kiwi_payload or {'data': []}, amadeus_payload or {'data': []})
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._build_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_payloads(self, kiwi_payload: dict, amadeus_payload: dict) -> None:
+        """Troca os payloads servidos (serializados uma única vez)"""
+        self.kiwi_body = json.dumps(kiwi_payload).encode('utf-8')
+        self.amadeus_body = json.dumps(amadeus_payload).encode('utf-8')
+
+    def respond(self, path: str, query: dict) -> tuple:
+        """
+        Decide a resposta para uma requisição
+
+        Returns:
+            Tupla (status HTTP, corpo em bytes)
+        """
+        if path == '/v2/search':
+            return 200, self.kiwi_body
+        if path == '/v2/shopping/flight-offers':
+            return 200, self.amadeus_body
+        if path == '/v1/security/oauth2/token':
+            return 200, json.dumps({'access_token': 'fake-token', 'expires_in': 1800}).encode('utf-8')
+        return 404, b'{"error": "not found"}'
+
+    def _build_handler(self) -> Callable:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Cabeçalhos e corpo saem em escritas separadas: com Nagle, o corpo esperaria o
+            # ACK atrasado do cliente (~40 ms) em conexões keep-alive
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                parsed = urlparse(self.path)
+                with server._lock:
+                    server.request_count += 1
+                status, body = server.respond(parsed.path, parse_qs(parsed.query))
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FakeProviderServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeProviderServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Converte uma especificação textual em distribuição de latência (segundos)
+
+    Formatos aceitos:
+        fixed:0.2           -> sempre 200 ms
+        uniform:0.1,0.5     -> uniforme entre 100 e 500 ms
+        exp:0.3             -> exponencial com média de 300 ms
+        lognormal:-1.5,0.6  -> lognormal (mu, sigma), cauda longa como em APIs reais
+    """
+    kind, _, args = spec.partition(':')
+    values = [float(value) for value in args.split(',') if value]
+
+    if kind == 'fixed':
+        return lambda rng: values[0]
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'exp':
+        return lambda rng: rng.expovariate(1 / values[0])
+    if kind == 'lognormal':
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Distribuição de latência desconhecida: {spec}")
+
+
+@dataclass
+class ProviderProfile:
+    """Comportamento simulado de um provedor"""
+    latency: str = 'fixed:0'
+    error_rate: float = 0.0
+    error_status: int = 503
+    payload_size: int = 50
+
+
+class SimulatedProviderServer(FakeProviderServer):
+    """Servidor simulado com latência, taxa de erro e tamanho de payload configuráveis por provedor"""
+
+    def __init__(self, kiwi: ProviderProfile, amadeus: ProviderProfile, seed: int = 1, **kwargs):
+        self.profiles = {'/v2/search': kiwi, '/v2/shopping/flight-offers': amadeus}
+        self._latency = {path: parse_latency(profile.latency) for path, profile in self.profiles.items()}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        super().__init__(
+            kiwi_payload=build_kiwi_response(kiwi.payload_size),
+            amadeus_payload=build_amadeus_response(amadeus.payload_size),
+            **kwargs
+        )
+
+    def respond(self, path: str, query: dict) -> tuple:
+        profile = self.profiles.get(path)
+        if profile is None:
+            return super().respond(path, query)
+
+        with self._rng_lock:
+            delay = self._latency[path](self._rng)
+            failed = self._rng.random() < profile.error_rate
+
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            return profile.error_status, b'{"error": "simulated failure"}'
+        return super().respond(path, query)
+
+
+def point_providers_to(server: FakeProviderServer, *providers) -> None:
+    """Redireciona provedores reais para o servidor simulado, com credenciais fictícias"""
+    for provider in providers:
+        provider.base_url = server.url
+        if hasattr(provider, 'api_secret'):
+            provider.api_secret = 'fake-secret'
+        provider.api_key = 'fake-key'
@@ -0,0 +1,155 @@
+"""
+Servidor local que fala o protocolo Redis (RESP2) - Substituto para testes do RedisCache
+
+Implementa apenas os comandos usados pela aplicação: PING, AUTH, SELECT,
+GET, SET (com EX), DEL, SCAN (MATCH), FLUSHDB e MULTI/EXEC.
+"""
+import re
+import socketserver
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+def _glob_to_regex(pattern: str) -> re.Pattern:
+    """Converte um padrão glob do Redis (com escapes por barra invertida) em regex"""
+    regex = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\' and index + 1 < len(pattern):
+            index += 1
+            regex.append(re.escape(pattern[index]))
+        elif char == '*':
+            regex.append('.*')
+        elif char == '?':
+            regex.append('.')
+        else:
+            regex.append(re.escape(char))
+        index += 1
+    return re.compile(''.join(regex) + r'\Z', re.DOTALL)
+
+
+class FakeRedisServer:
+    """Servidor RESP em thread própria, com dados em memória"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                queued = None  # Comandos entre MULTI e EXEC
+                while True:
+                    try:
+                        command = self._read_command()
+                    except (ConnectionError, ValueError):
+                        return
+                    if command is None:
+                        return
+                    name = command[0].upper()
+                    if name == b'MULTI':
+                        queued, reply = [], b'+OK\r\n'
+                    elif name == b'EXEC' and queued is not None:
+                        reply = server.execute_transaction(queued)
+                        queued = None
+                    elif queued is not None:
+                        queued.append(command)
+                        reply = b'+QUEUED\r\n'
+                    else:
+                        reply = server.execute(command)
+                    self.wfile.write(reply)
+                    self.wfile.flush()
+
+            def _read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                count = int(line[1:-2])
+                args = []
+                for _ in range(count):
+                    length = int(self.rfile.readline()[1:-2])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server((host, port), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def _alive(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args) -> bytes:
+        with self.lock:
+            return self._apply(args)
+
+    def execute_transaction(self, commands) -> bytes:
+        """Aplica os comandos enfileirados por MULTI de forma atômica"""
+        with self.lock:
+            replies = [self._apply(args) for args in commands]
+        return b'*%d\r\n%s' % (len(replies), b''.join(replies))
+
+    def _apply(self, args) -> bytes:
+        name = args[0].upper()
+        if name == b'PING':
+            return b'+PONG\r\n'
+        if name in (b'AUTH', b'SELECT'):
+            return b'+OK\r\n'
+        if name == b'FLUSHDB':
+            self.data.clear()
+            return b'+OK\r\n'
+        if name == b'GET':
+            value = self._alive(args[1])
+            return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+        if name == b'SET':
+            expires_at = None
+            if len(args) >= 5 and args[3].upper() == b'EX':
+                if int(args[4]) <= 0:
+                    return b"-ERR invalid expire time in 'set' command\r\n"
+                expires_at = time.time() + int(args[4])
+            self.data[args[1]] = (args[2], expires_at)
+            return b'+OK\r\n'
+        if name == b'DEL':
+            removed = sum(1 for key in args[1:] if self._alive(key) is not None and self.data.pop(key))
+            return b':%d\r\n' % removed
+        if name == b'SCAN':
+            pattern = b'*'
+            if b'MATCH' in [arg.upper() for arg in args]:
+                pattern = args[[arg.upper() for arg in args].index(b'MATCH') + 1]
+            regex = _glob_to_regex(pattern.decode('utf-8'))
+            keys = [key for key in list(self.data) if self._alive(key) is not None
+                    and regex.match(key.decode('utf-8'))]
+            body = b''.join(b'$%d\r\n%s\r\n' % (len(key), key) for key in keys)
+            return b'*2\r\n$1\r\n0\r\n*%d\r\n%s' % (len(keys), body)
+        return b'-ERR unknown command\r\n'
+
+    def start(self) -> 'FakeRedisServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeRedisServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,212 @@
+"""
+Fixtures de respostas dos provedores - Gera e carrega payloads no formato das APIs reais
+
+Os geradores são determinísticos (semente fixa) para que execuções diferentes
+meçam exatamente o mesmo trabalho. Respostas gravadas de verdade podem ser
+usadas no lugar através de load_fixture().
+"""
+import gzip
+import json
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+AIRPORTS = [
+    ('GRU', 'SAO', 'BR', 'São Paulo', 'Brazil'),
+    ('GIG', 'RIO', 'BR', 'Rio de Janeiro', 'Brazil'),
+    ('BSB', 'BSB', 'BR', 'Brasília', 'Brazil'),
+    ('LIS', 'LIS', 'PT', 'Lisboa', 'Portugal'),
+    ('MAD', 'MAD', 'ES', 'Madrid', 'Spain'),
+    ('CDG', 'PAR', 'FR', 'Paris', 'France'),
+    ('JFK', 'NYC', 'US', 'New York', 'United States'),
+    ('MIA', 'MIA', 'US', 'Miami', 'United States'),
+]
+
+CARRIERS = {
+    'LA': 'LATAM AIRLINES GROUP',
+    'G3': 'GOL LINHAS AEREAS',
+    'AD': 'AZUL LINHAS AEREAS',
+    'TP': 'TAP PORTUGAL',
+    'IB': 'IBERIA',
+    'AF': 'AIR FRANCE',
+    'AA': 'AMERICAN AIRLINES',
+}
+
+AIRCRAFT = {
+    '320': 'AIRBUS A320',
+    '321': 'AIRBUS A321',
+    '339': 'AIRBUS A330-900',
+    '738': 'BOEING 737-800',
+    '789': 'BOEING 787-9',
+}
+
+
+def _default_departure() -> datetime:
+    return (datetime.now() + timedelta(days=30)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _iso_duration(minutes: int) -> str:
+    return f"PT{minutes // 60}H{minutes % 60}M"
+
+
+def build_amadeus_response(count: int, origin: str = 'GRU', destination: str = 'LIS',
+                           departure: Optional[datetime] = None, round_trip: bool = False,
+                           currency: str = 'BRL', seed: int = 42) -> dict:
+    """
+    Gera uma resposta de /v2/shopping/flight-offers com `count` ofertas
+
+    Inclui o bloco 'dictionaries' e itinerários com 1 a 3 trechos,
+    como nas respostas reais do ambiente de teste Amadeus.
+    """
+    rng = random.Random(seed)
+    departure = departure or _default_departure()
+    hubs = [code for code, *_ in AIRPORTS if code not in (origin, destination)]
+    carrier_codes = list(CARRIERS)
+    aircraft_codes = list(AIRCRAFT)
+
+    def build_itinerary(start: str, end: str, day: datetime, segment_id: int):
+        route = [start] + rng.sample(hubs, rng.choice([0, 0, 1, 1, 2])) + [end]
+        carrier = rng.choice(carrier_codes)
+        current = day + timedelta(minutes=rng.randrange(0, 24 * 60, 5))
+        first_departure = current
+        segments = []
+        for leg_origin, leg_destination in zip(route, route[1:]):
+            minutes = rng.randrange(55, 12 * 60, 5)
+            arrival = current + timedelta(minutes=minutes)
+            segments.append({
+                'departure': {'iataCode': leg_origin, 'terminal': str(rng.randint(1, 3)), 'at': current.isoformat()},
+                'arrival': {'iataCode': leg_destination, 'terminal': str(rng.randint(1, 3)), 'at': arrival.isoformat()},
+                'carrierCode': carrier,
+                'number': str(rng.randint(10, 9999)),
+                'aircraft': {'code': rng.choice(aircraft_codes)},
+                'operating': {'carrierCode': carrier},
+                'duration': _iso_duration(minutes),
+                'id': str(segment_id),
+                'numberOfStops': 0,
+                'blacklistedInEU': False
+            })
+            segment_id += 1
+            current = arrival + timedelta(minutes=rng.randrange(60, 300, 5))
+        elapsed = int((arrival - first_departure).total_seconds() // 60)
+        return {'duration': _iso_duration(elapsed), 'segments': segments}, segment_id
+
+    offers = []
+    for index in range(count):
+        itineraries = []
+        itinerary, segment_id = build_itinerary(origin, destination, departure, 1)
+        itineraries.append(itinerary)
+        if round_trip:
+            itinerary, segment_id = build_itinerary(destination, origin, departure + timedelta(days=7), segment_id)
+            itineraries.append(itinerary)
+
+        total = f"{rng.uniform(300, 9000):.2f}"
+        fare_details = [
+            {
+                'segmentId': segment['id'],
+                'cabin': 'ECONOMY',
+                'fareBasis': 'YLOWBR',
+                'class': 'Y',
+                'includedCheckedBags': {'quantity': rng.choice([0, 1, 2])}
+            }
+            for itinerary in itineraries for segment in itinerary['segments']
+        ]
+        offers.append({
+            'type': 'flight-offer',
+            'id': str(index + 1),
+            'source': 'GDS',
+            'instantTicketingRequired': False,
+            'nonHomogeneous': False,
+            'oneWay': False,
+            'lastTicketingDate': departure.strftime('%Y-%m-%d'),
+            'numberOfBookableSeats': rng.randint(1, 9),
+            'itineraries': itineraries,
+            'price': {'currency': currency, 'total': total, 'base': total, 'grandTotal': total},
+            'pricingOptions': {'fareType': ['PUBLISHED'], 'includedCheckedBagsOnly': False},
+            'validatingAirlineCodes': [itineraries[0]['segments'][0]['carrierCode']],
+            'travelerPricings': [{
+                'travelerId': '1',
+                'fareOption': 'STANDARD',
+                'travelerType': 'ADULT',
+                'price': {'currency': currency, 'total': total, 'base': total},
+                'fareDetailsBySegment': fare_details
+            }]
+        })
+
+    return {
+        'meta': {'count': count},
+        'data': offers,
+        'dictionaries': {
+            'locations': {code: {'cityCode': city, 'countryCode': country} for code, city, country, *_ in AIRPORTS},
+            'aircraft': dict(AIRCRAFT),
+            'currencies': {currency: currency},
+            'carriers': dict(CARRIERS)
+        }
+    }
+
+
+def build_kiwi_response(count: int, origin: str = 'GRU', destination: str = 'LIS',
+                        departure: Optional[datetime] = None, round_trip: bool = False,
+                        currency: str = 'BRL', seed: int = 7) -> dict:
+    """Gera uma resposta de /v2/search (Tequila) com `count` itinerários"""
+    rng = random.Random(seed)
+    departure = departure or _default_departure()
+    names = {code: (city, country) for code, _, _, city, country in AIRPORTS}
+    hubs = [code for code, *_ in AIRPORTS if code not in (origin, destination)]
+    carrier_codes = list(CARRIERS)
+
+    def build_route(start: str, end: str, day: datetime, is_return: int) -> List[dict]:
+        stops = [start] + rng.sample(hubs, rng.choice([0, 0, 1, 2])) + [end]
+        current = day + timedelta(minutes=rng.randrange(0, 24 * 60, 5))
+        route = []
+        for leg_origin, leg_destination in zip(stops, stops[1:]):
+            arrival = current + timedelta(minutes=rng.randrange(55, 12 * 60, 5))
+            route.append({
+                'flyFrom': leg_origin,
+                'flyTo': leg_destination,
+                'cityFrom': names.get(leg_origin, (leg_origin, ''))[0],
+                'cityTo': names.get(leg_destination, (leg_destination, ''))[0],
+                'countryFrom': {'code': '', 'name': names.get(leg_origin, ('', ''))[1]},
+                'countryTo': {'code': '', 'name': names.get(leg_destination, ('', ''))[1]},
+                'airline': rng.choice(carrier_codes),
+                'flight_no': rng.randint(10, 9999),
+                'dTime': int(current.timestamp()),
+                'aTime': int(arrival.timestamp()),
+                'vehicle_type': 'aircraft',
+                'return': is_return
+            })
+            current = arrival + timedelta(minutes=rng.randrange(60, 300, 5))
+        return route
+
+    items = []
+    for index in range(count):
+        route = build_route(origin, destination, departure, 0)
+        total = route[-1]['aTime'] - route[0]['dTime']
+        if round_trip:
+            route += build_route(destination, origin, departure + timedelta(days=7), 1)
+        items.append({
+            'id': f"kiwi-{seed}-{index}",
+            'flyFrom': origin,
+            'flyTo': destination,
+            'price': round(rng.uniform(250, 8000), 2),
+            'currency': currency,
+            'duration': {'departure': total, 'return': 0, 'total': total},
+            'availability': {'seats': rng.randint(1, 9)},
+            'baglimit': {'hand_weight': rng.choice([0, 7, 10])},
+            'deep_link': f"https://www.kiwi.com/deep?booking_token={seed}-{index}",
+            'route': route
+        })
+
+    return {'search_id': f"bench-{seed}", 'currency': currency, 'data': items}
+
+
+def save_fixture(payload: dict, path: str) -> None:
+    """Grava um payload em JSON compactado com gzip"""
+    with gzip.open(path, 'wt', encoding='utf-8') as handle:
+        json.dump(payload, handle)
+
+
+def load_fixture(path: str) -> dict:
+    """Carrega um payload gravado (JSON puro ou .gz)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as handle:
+        return json.load(handle)
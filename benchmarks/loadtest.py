@@ -0,0 +1,276 @@
+"""
+Teste de carga do endpoint /consulta com provedores simulados
+
+Sobe o app Flask em processo (servidor WSGI com threads), redireciona os
+provedores para servidores Kiwi/Amadeus simulados e aumenta a concorrência
+em degraus. Para cada degrau reporta vazão, latências p50/p95/p99, erros,
+pico de threads e RSS. Roda totalmente offline.
+
+Por padrão cada requisição é uma busca diferente (destino, data e
+passageiros variam), para medir o caminho até os provedores e não o cache;
+--distinct N alterna N buscas e --distinct 1 repete sempre a mesma.
+
+Uso:
+    python -m benchmarks.loadtest
+    python -m benchmarks.loadtest --steps 1,8,32,128 --duration 10 \\
+        --kiwi-latency lognormal:-1.2,0.5 --amadeus-latency uniform:0.3,1.2 \\
+        --amadeus-error-rate 0.05 --payload-size 200 --output carga.json
+
+Com respostas reais gravadas (PROVIDER_RECORDING_MODE=record, ver recording.py),
+o mesmo corpo de busca pode ser reproduzido sem rede nem credenciais:
+    python -m benchmarks.loadtest --replay data/fixtures --payload busca.json --replay-latency 1
+(com --payload, o padrão é --distinct 1: o corpo é usado como está)
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+import requests
+from werkzeug.serving import make_server
+
+from benchmarks.fake_providers import ProviderProfile, SimulatedProviderServer, point_providers_to
+
+# Variações usadas para que requisições diferentes não sejam respondidas pelo cache
+DESTINATIONS = ('LIS', 'MAD', 'CDG', 'LHR', 'FCO', 'JFK', 'MIA', 'EZE', 'SCL', 'BOG')
+DATE_SPREAD_DAYS = 300
+MAX_PASSENGERS = 4
+
+
+def current_rss_bytes() -> int:
+    """RSS atual do processo (Linux via /proc; nos demais, o pico informado por getrusage)"""
+    try:
+        with open('/proc/self/statm') as handle:
+            pages = int(handle.read().split()[1])
+        return pages * resource.getpagesize()
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por interpolação linear sobre uma lista já ordenada"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class ResourceSampler:
+    """Amostra contagem de threads e RSS em segundo plano durante um degrau"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_provider_threads = 0
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            threads = threading.enumerate()
+            provider_threads = sum(1 for t in threads if t.name.startswith(('provider-pool', 'ThreadPoolExecutor')))
+            self.peak_threads = max(self.peak_threads, len(threads))
+            self.peak_provider_threads = max(self.peak_provider_threads, provider_threads)
+            self.peak_rss = max(self.peak_rss, current_rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> 'ResourceSampler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def search_payloads(base: dict, distinct: int) -> Callable[[], dict]:
+    """
+    Fonte dos corpos de busca enviados pelos clientes
+
+    Args:
+        base: Corpo de referência
+        distinct: Buscas diferentes alternadas (1 repete o corpo base; 0 faz cada
+                  requisição uma busca nova, até o número de combinações disponíveis)
+    """
+    if distinct == 1:
+        return lambda: base
+
+    destinations = [code for code in DESTINATIONS if code != base['origem'].upper()]
+    departure = datetime.strptime(base['data_ida'], '%Y-%m-%d')
+    return_offset = None
+    if base.get('data_volta'):
+        return_offset = datetime.strptime(base['data_volta'], '%Y-%m-%d') - departure
+    counter = itertools.count()
+
+    def next_payload() -> dict:
+        number = next(counter)
+        if distinct:
+            number %= distinct
+        destination = destinations[number % len(destinations)]
+        number //= len(destinations)
+        date = departure + timedelta(days=number % DATE_SPREAD_DAYS)
+        payload = dict(base, destino=destination, data_ida=date.strftime('%Y-%m-%d'),
+                       passageiros=1 + (number // DATE_SPREAD_DAYS) % MAX_PASSENGERS)
+        if return_offset is not None:
+            payload['data_volta'] = (date + return_offset).strftime('%Y-%m-%d')
+        return payload
+
+    return next_payload
+
+
+def run_step(url: str, next_payload: Callable[[], dict], concurrency: int, duration: float,
+             timeout: float) -> Dict:
+    """Mantém `concurrency` clientes em laço fechado contra /consulta por `duration` segundos"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = str(session.post(f"{url}/consulta", json=next_payload(), timeout=timeout).status_code)
+            except requests.exceptions.RequestException as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+        session.close()
+
+    with ResourceSampler() as sampler:
+        started = time.perf_counter()
+        clients = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    ok = statuses.get('200', 0)
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'ok': ok,
+        'errors': len(latencies) - ok,
+        'statuses': statuses,
+        'throughput_rps': round(ok / wall, 2) if wall else 0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'peak_threads': sampler.peak_threads,
+        'peak_provider_threads': sampler.peak_provider_threads,
+        'peak_rss_mb': round(sampler.peak_rss / (1024 * 1024), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga do /consulta com provedores simulados')
+    parser.add_argument('--steps', default='1,2,4,8,16,32,64', help='Níveis de concorrência')
+    parser.add_argument('--duration', type=float, default=5.0, help='Segundos por degrau')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Timeout de cada requisição do cliente')
+    parser.add_argument('--kiwi-latency', default='lognormal:-1.6,0.5')
+    parser.add_argument('--amadeus-latency', default='lognormal:-1.0,0.6')
+    parser.add_argument('--kiwi-error-rate', type=float, default=0.0)
+    parser.add_argument('--amadeus-error-rate', type=float, default=0.0)
+    parser.add_argument('--payload-size', type=int, default=50, help='Ofertas por resposta de provedor')
+    parser.add_argument('--stop-p99-ms', type=float, default=0,
+                        help='Interrompe a rampa quando o p99 passar deste valor (0 = nunca)')
+    parser.add_argument('--replay', help='Diretório de gravações dos provedores (no lugar dos servidores simulados)')
+    parser.add_argument('--replay-latency', type=float, default=1.0,
+                        help='Fração da latência gravada reproduzida com --replay')
+    parser.add_argument('--payload', help='Corpo JSON da busca (com --replay, o mesmo usado na gravação)')
+    parser.add_argument('--distinct', type=int,
+                        help='Buscas diferentes alternadas pelos clientes (0 = cada requisição é nova, '
+                             '1 = sempre a mesma; padrão: 1 com --payload, 0 sem)')
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+
+    if args.replay:
+        # Lido pelo Config na importação do app
+        os.environ['PROVIDER_RECORDING_MODE'] = 'replay'
+        os.environ['PROVIDER_FIXTURES_DIR'] = args.replay
+        os.environ['PROVIDER_REPLAY_LATENCY'] = str(args.replay_latency)
+
+    # Erros simulados dos provedores geram um log por requisição
+    logging.disable(logging.ERROR)
+
+    # Importado aqui para que o logging do app já nasça desabilitado
+    import app as flight_app
+
+    kiwi = ProviderProfile(args.kiwi_latency, args.kiwi_error_rate, payload_size=args.payload_size)
+    amadeus = ProviderProfile(args.amadeus_latency, args.amadeus_error_rate, payload_size=args.payload_size)
+
+    if args.payload:
+        with open(args.payload, encoding='utf-8') as handle:
+            payload = json.load(handle)
+    else:
+        payload = {
+            'origem': 'GRU',
+            'destino': 'LIS',
+            'data_ida': (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d'),
+            'passageiros': 1
+        }
+
+    distinct = args.distinct if args.distinct is not None else (1 if args.payload else 0)
+    next_payload = search_payloads(payload, distinct)
+
+    steps = []
+    with contextlib.ExitStack() as stack:
+        if not args.replay:
+            simulator = stack.enter_context(SimulatedProviderServer(kiwi, amadeus))
+            point_providers_to(simulator, *flight_app.providers)
+        app_server = make_server('127.0.0.1', 0, flight_app.app, threaded=True)
+        app_thread = threading.Thread(target=app_server.serve_forever, daemon=True)
+        app_thread.start()
+        url = f"http://127.0.0.1:{app_server.server_port}"
+
+        try:
+            for concurrency in (int(step) for step in args.steps.split(',') if step):
+                step = run_step(url, next_payload, concurrency, args.duration, args.timeout)
+                steps.append(step)
+                print(f"c={step['concurrency']:<4} rps={step['throughput_rps']:<8} "
+                      f"p50={step['p50_ms']:<8} p95={step['p95_ms']:<8} p99={step['p99_ms']:<8} "
+                      f"erros={step['errors']:<5} threads={step['peak_threads']:<5} "
+                      f"rss={step['peak_rss_mb']}MB", file=sys.stderr)
+                if args.stop_p99_ms and step['p99_ms'] > args.stop_p99_ms:
+                    break
+        finally:
+            app_server.shutdown()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'duration_per_step_s': args.duration,
+            'kiwi': vars(kiwi),
+            'amadeus': vars(amadeus),
+            'replay': args.replay,
+            'distinct': distinct
+        },
+        'steps': steps
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Suíte de benchmarks do pipeline de busca
+
+Reproduz fixtures Kiwi e Amadeus através de servidores HTTP locais e mede
+cada etapa separadamente: busca+parse de cada provedor, parse isolado,
+_remove_duplicates, ordenação, to_dict, serialização JSON e
+SearchRepository (save/load). O resultado é um JSON que pode ser comparado
+entre versões.
+
+Uso:
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --sizes 10,100 --compare bench.json --threshold 0.25
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from interfaces import FlightSearchParams
+from provider_kiwi import KiwiFlightProvider
+from provider_amadeus import AmadeusFlightProvider
+from flight_service import FlightSearchService
+from repository import SearchRepository
+from benchmarks.fixtures import build_amadeus_response, build_kiwi_response
+from benchmarks.fake_providers import FakeProviderServer, point_providers_to
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+
+def measure(func: Callable, repeat: int) -> Dict:
+    """Executa `func` `repeat` vezes e retorna estatísticas em milissegundos"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'repeat': repeat,
+        'median_ms': round(statistics.median(timings), 4),
+        'min_ms': round(min(timings), 4),
+        'max_ms': round(max(timings), 4)
+    }
+
+
+def repeat_for(size: int) -> int:
+    """Menos repetições para volumes grandes, mantendo o tempo total razoável"""
+    if size >= 10000:
+        return 3
+    if size >= 1000:
+        return 10
+    return 30
+
+
+def run_size(size: int, server: FakeProviderServer) -> List[Dict]:
+    """Mede todas as etapas para um volume de `size` resultados (metade por provedor)"""
+    params = FlightSearchParams(
+        origin='GRU',
+        destination='LIS',
+        departure_date=datetime.now() + timedelta(days=30),
+        max_results=size
+    )
+    kiwi_payload = build_kiwi_response(size // 2 or 1)
+    amadeus_payload = build_amadeus_response(size - size // 2)
+    server.set_payloads(kiwi_payload, amadeus_payload)
+
+    kiwi = KiwiFlightProvider()
+    amadeus = AmadeusFlightProvider()
+    point_providers_to(server, kiwi, amadeus)
+    service = FlightSearchService([kiwi, amadeus])
+    repeat = repeat_for(size)
+
+    flights = kiwi.search_flights(params) + amadeus.search_flights(params)
+    unique_flights = service._remove_duplicates(flights)
+    flights_dict = [flight.to_dict() for flight in unique_flights]
+
+    def repository_cycle():
+        repository = SearchRepository()
+        search_id = repository.save_search({'origem': 'GRU', 'destino': 'LIS'})
+        repository.save_results(search_id, flights_dict)
+        repository.get_search(search_id)
+        repository.get_results(search_id)
+
+    stages = {
+        'kiwi_fetch_parse': lambda: kiwi.search_flights(params),
+        'amadeus_fetch_parse': lambda: amadeus.search_flights(params),
+        'kiwi_parse': lambda: kiwi._parse_flights(kiwi_payload, params),
+        'amadeus_parse': lambda: amadeus._parse_flights(amadeus_payload),
+        'remove_duplicates': lambda: service._remove_duplicates(flights),
+        'sort': lambda: sorted(unique_flights, key=lambda x: x.price),
+        'to_dict': lambda: [flight.to_dict() for flight in unique_flights],
+        'json_encode': lambda: json.dumps(flights_dict),
+        'repository_save_load': repository_cycle,
+    }
+
+    results = []
+    for stage, func in stages.items():
+        result = {'stage': stage, 'size': size, 'flights': len(flights)}
+        result.update(measure(func, repeat))
+        results.append(result)
+        print(f"  {stage:<22} n={size:<6} median={result['median_ms']:>10.3f} ms", file=sys.stderr)
+
+    return results
+
+
+def compare(current: List[Dict], baseline_path: str, threshold: float) -> List[Dict]:
+    """
+    Compara os resultados atuais com um arquivo anterior
+
+    Returns:
+        Lista de etapas cuja mediana piorou mais que `threshold` (fração)
+    """
+    with open(baseline_path, encoding='utf-8') as handle:
+        baseline = json.load(handle)
+
+    previous = {(r['stage'], r['size']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in current:
+        before = previous.get((result['stage'], result['size']))
+        if not before or not before['median_ms']:
+            continue
+        change = (result['median_ms'] - before['median_ms']) / before['median_ms']
+        if change > threshold:
+            regressions.append({
+                'stage': result['stage'],
+                'size': result['size'],
+                'baseline_ms': before['median_ms'],
+                'current_ms': result['median_ms'],
+                'change': round(change, 3)
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks do pipeline de busca de voos')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Volumes de resultados separados por vírgula')
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+    parser.add_argument('--compare', help='Resultado anterior para detectar regressões')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Piora relativa tolerada na comparação (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    # Logs por requisição distorcem as medições
+    logging.disable(logging.INFO)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = []
+    with FakeProviderServer() as server:
+        for size in sizes:
+            results.extend(run_size(size, server))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes
+        },
+        'results': results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSÃO {regression['stage']} n={regression['size']}: "
+                  f"{regression['baseline_ms']} ms -> {regression['current_ms']} ms "
+                  f"(+{regression['change']:.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+"""
+Backends de cache - Implementações intercambiáveis de ICacheBackend (Strategy Pattern)
+
+- InMemoryLRUCache: LRU no próprio processo (um único worker)
+- SQLiteCache: arquivo SQLite em modo WAL, compartilhado pelos workers do mesmo host
+- RedisCache: cliente mínimo do protocolo Redis (RESP), compartilhado entre hosts
+"""
+import json
+import math
+import socket
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+from urllib.parse import urlparse
+from interfaces import ICacheBackend
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryLRUCache(ICacheBackend):
+    """Cache LRU em memória, limitado por número de entradas"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def keys(self, prefix: str = '') -> List[str]:
+        now = time.time()
+        with self._lock:
+            return [
+                key for key, (_, expires_at) in self._data.items()
+                if key.startswith(prefix) and (expires_at is None or expires_at > now)
+            ]
+
+    def get_backend_name(self) -> str:
+        return 'memory'
+
+
+class SQLiteCache(ICacheBackend):
+    """Cache em arquivo SQLite (WAL), visível para todos os processos do host"""
+
+    def __init__(self, path: str, timeout: float = 5.0, purge_every: int = 1000):
+        """
+        Args:
+            path: Caminho do arquivo do banco
+            timeout: Espera máxima por locks de escrita, em segundos
+            purge_every: Entradas gravadas entre remoções das expiradas (0 = nunca)
+        """
+        self.path = path
+        self.timeout = timeout
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+        logger.info(f"SQLiteCache inicializado em {path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), expires_at)
+        )
+        self._count_writes(1)
+
+    def set_many(self, items: List[Tuple[str, Any, Optional[int]]]) -> None:
+        """Grava o lote em uma única transação (um fsync do WAL por lote)"""
+        now = time.time()
+        rows = [(key, json.dumps(value), now + ttl if ttl else None) for key, value, ttl in items]
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)', rows)
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        self._count_writes(len(rows))
+
+    def _count_writes(self, count: int) -> None:
+        """Entradas expiradas só saem do arquivo quando lidas; a cada purge_every gravações, saem todas"""
+        if not self.purge_every:
+            return
+        with self._writes_lock:
+            self._writes += count
+            if self._writes < self.purge_every:
+                return
+            self._writes = 0
+        removed = self.purge_expired()
+        if removed:
+            logger.info(f"SQLiteCache: {removed} entradas expiradas removidas")
+
+    def delete(self, key: str) -> bool:
+        cursor = self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def keys(self, prefix: str = '') -> List[str]:
+        # Faixa [prefix, prefix + maior code point) usa o índice da chave primária
+        rows = self._connection().execute(
+            'SELECT key FROM cache WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?)',
+            (prefix, prefix + '\U0010ffff', time.time())
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def purge_expired(self) -> int:
+        """Remove entradas expiradas; retorna quantas foram removidas"""
+        cursor = self._connection().execute(
+            'DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),)
+        )
+        return cursor.rowcount
+
+    def get_backend_name(self) -> str:
+        return 'sqlite'
+
+
+class RedisError(Exception):
+    """Erro retornado pelo servidor Redis"""
+    pass
+
+
+class RedisCache(ICacheBackend):
+    """Cliente mínimo do protocolo Redis (RESP2), sem dependências externas"""
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', namespace: str = 'flight:', timeout: float = 2.0):
+        """
+        Args:
+            url: redis://[:senha@]host:porta/db
+            namespace: Prefixo aplicado a todas as chaves
+            timeout: Timeout de conexão e leitura, em segundos
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.namespace = namespace
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        if self.password:
+            self._send_and_read('AUTH', self.password)
+        if self.db:
+            self._send_and_read('SELECT', str(self.db))
+
+    def _disconnect(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                self._local.reader.close()
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        return b''.join(parts)
+
+    def _send_and_read(self, *args) -> Any:
+        self._local.sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError('Conexão com o Redis encerrada')
+        kind, payload = line[:1], line[1:-2]
+
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise RedisError(payload.decode('utf-8'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length == -1:
+                return None
+            # Um elemento com erro (ex.: comando de um EXEC) só é propagado após ler o array
+            # inteiro; do contrário, o restante da resposta seria lido pelo próximo comando
+            items, error = [], None
+            for _ in range(length):
+                try:
+                    items.append(self._read_reply())
+                except RedisError as e:
+                    items.append(None)
+                    error = error or e
+            if error is not None:
+                raise error
+            return items
+        raise RedisError(f"Resposta RESP inesperada: {line!r}")
+
+    def execute(self, *args) -> Any:
+        """Executa um comando, reconectando uma vez em caso de falha de rede"""
+        for attempt in (1, 2):
+            try:
+                if getattr(self._local, 'sock', None) is None:
+                    self._connect()
+                return self._send_and_read(*args)
+            except (OSError, ConnectionError):
+                self._disconnect()
+                if attempt == 2:
+                    raise
+
+    def pipeline(self, commands: List[tuple]) -> List[Any]:
+        """
+        Envia vários comandos de uma vez e lê as respostas na ordem (uma ida e volta de rede)
+
+        Todas as respostas são lidas antes de propagar um erro, para a conexão
+        continuar sincronizada.
+        """
+        for attempt in (1, 2):
+            try:
+                if getattr(self._local, 'sock', None) is None:
+                    self._connect()
+                self._local.sock.sendall(b''.join(self._encode(command) for command in commands))
+                replies, error = [], None
+                for _ in commands:
+                    try:
+                        replies.append(self._read_reply())
+                    except RedisError as e:
+                        replies.append(None)
+                        error = error or e
+                if error is not None:
+                    raise error
+                return replies
+            except (OSError, ConnectionError):
+                self._disconnect()
+                if attempt == 2:
+                    raise
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.execute('GET', self.namespace + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        args = ['SET', self.namespace + key, json.dumps(value)]
+        if ttl:
+            args += ['EX', self._expire_seconds(ttl)]
+        self.execute(*args)
+
+    def set_many(self, items: List[Tuple[str, Any, Optional[int]]]) -> None:
+        """Grava o lote em uma transação MULTI/EXEC enviada em pipeline"""
+        commands = [('MULTI',)]
+        for key, value, ttl in items:
+            command = ('SET', self.namespace + key, json.dumps(value))
+            commands.append(command + ('EX', self._expire_seconds(ttl)) if ttl else command)
+        commands.append(('EXEC',))
+        self.pipeline(commands)
+
+    @staticmethod
+    def _expire_seconds(ttl: float) -> str:
+        """EX aceita só segundos inteiros positivos; frações arredondam para cima"""
+        return str(max(1, math.ceil(ttl)))
+
+    def delete(self, key: str) -> bool:
+        return self.execute('DEL', self.namespace + key) > 0
+
+    def keys(self, prefix: str = '') -> List[str]:
+        pattern = ''.join('\\' + c if c in '*?[]\\' else c for c in self.namespace + prefix) + '*'
+        cursor = b'0'
+        found = []
+        while True:
+            cursor, batch = self.execute('SCAN', cursor, 'MATCH', pattern, 'COUNT', '500')
+            found.extend(key.decode('utf-8')[len(self.namespace):] for key in batch)
+            if cursor in (b'0', 0):
+                return found
+
+    def get_backend_name(self) -> str:
+        return 'redis'
+
+
+def create_cache_backend(kind: Optional[str] = None) -> ICacheBackend:
+    """
+    Cria o backend configurado
+
+    Args:
+        kind: 'memory', 'sqlite' ou 'redis' (padrão: Config.CACHE_BACKEND)
+
+    Returns:
+        Instância de ICacheBackend
+    """
+    kind = (kind or Config.CACHE_BACKEND).lower()
+
+    if kind == 'memory':
+        return InMemoryLRUCache(Config.CACHE_MAX_ENTRIES)
+    if kind == 'sqlite':
+        return SQLiteCache(Config.CACHE_SQLITE_PATH, purge_every=Config.CACHE_SQLITE_PURGE_EVERY)
+    if kind == 'redis':
+        return RedisCache(Config.REDIS_URL)
+    raise ValueError(f"Backend de cache desconhecido: {kind}")
@@ -0,0 +1,59 @@
+"""
+Combinação de trechos - As k combinações mais baratas sem produto cartesiano (Single Responsibility)
+
+Cada lista de candidatos (um por trecho) vem ordenada por custo. Um heap
+parte da combinação com o primeiro candidato de cada lista e, a cada
+retirada, insere os vizinhos que avançam uma posição em uma das listas;
+as combinações saem em ordem crescente de custo total e apenas O(k·n)
+delas são examinadas. Combinações inválidas (ex.: conexão curta demais)
+são descartadas ao sair do heap, sem interromper a expansão dos vizinhos.
+"""
+import heapq
+from typing import Callable, List, Optional, Sequence, Tuple
+
+Combination = Tuple[int, ...]
+
+
+def k_best_combinations(costs: Sequence[Sequence[float]], k: int,
+                        is_valid: Optional[Callable[[Combination], bool]] = None,
+                        max_expansions: Optional[int] = None) -> List[Tuple[float, Combination]]:
+    """
+    Melhores k combinações (um índice por lista) pela soma dos custos
+
+    Args:
+        costs: Custos de cada lista, em ordem crescente
+        k: Quantidade de combinações desejadas
+        is_valid: Filtro aplicado a cada combinação retirada do heap
+        max_expansions: Limite de combinações retiradas (padrão: 50·k), para
+                        parar quando quase todas forem inválidas
+
+    Returns:
+        Pares (custo total, índices), do mais barato ao mais caro
+    """
+    if k <= 0 or not costs or any(not len(column) for column in costs):
+        return []
+
+    max_expansions = max_expansions or 50 * k
+    start: Combination = (0,) * len(costs)
+    heap = [(sum(column[0] for column in costs), start)]
+    seen = {start}
+    best: List[Tuple[float, Combination]] = []
+    expansions = 0
+
+    while heap and len(best) < k and expansions < max_expansions:
+        total, combination = heapq.heappop(heap)
+        expansions += 1
+        if is_valid is None or is_valid(combination):
+            best.append((total, combination))
+
+        for position, index in enumerate(combination):
+            if index + 1 >= len(costs[position]):
+                continue
+            neighbour = combination[:position] + (index + 1,) + combination[position + 1:]
+            if neighbour in seen:
+                continue
+            seen.add(neighbour)
+            column = costs[position]
+            heapq.heappush(heap, (total - column[index] + column[index + 1], neighbour))
+
+    return best
@@ -0,0 +1,144 @@
+"""
+Compressão de respostas e GETs condicionais (Middleware Pattern)
+
+Respostas acima de um tamanho mínimo e com tipo compressível são enviadas
+com brotli (se o pacote estiver instalado) ou gzip, conforme o
+Accept-Encoding do cliente. Respostas com ETag forte e Cache-Control
+público (resultados imutáveis) têm o corpo comprimido guardado em um LRU,
+para que revalidações e acessos repetidos não comprimam de novo.
+"""
+import gzip
+import hashlib
+import logging
+from typing import Iterable, Optional
+
+from flask import Flask, Response, request
+
+from cache_backends import InMemoryLRUCache
+from metrics import COMPRESSION_BYTES
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele, apenas gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'application/javascript',
+    'text/javascript',
+    'image/svg+xml',
+})
+
+ENCODINGS = ('br', 'gzip')
+
+
+def make_etag(*parts) -> str:
+    """ETag determinística a partir das partes que definem a representação"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def if_none_match_tag(etag: str) -> Optional[str]:
+    """
+    Variante da ETag presente no If-None-Match da requisição (None se nenhuma)
+
+    Aceita também as variantes comprimidas ("<etag>-gzip", "<etag>-br") que o
+    middleware devolve com os corpos comprimidos; o 304 deve repetir a variante
+    que o cliente possui.
+    """
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    if if_none_match.star_tag:
+        return etag
+    for tag in (etag, *(f'{etag}-{encoding}' for encoding in ENCODINGS)):
+        if if_none_match.contains(tag):
+            return tag
+    return None
+
+
+class ResponseCompressor:
+    """Compressão negociada para todas as respostas da aplicação"""
+
+    def __init__(self, app: Optional[Flask] = None, min_size: int = 1024, level: int = 6,
+                 cache_entries: int = 256, mimetypes: Iterable[str] = COMPRESSIBLE_MIMETYPES):
+        """
+        Args:
+            app: Aplicação Flask (ou use init_app)
+            min_size: Tamanho mínimo do corpo para comprimir, em bytes
+            level: Nível de compressão do gzip (o brotli usa a qualidade equivalente)
+            cache_entries: Corpos comprimidos de respostas imutáveis mantidos em memória
+            mimetypes: Tipos de conteúdo comprimidos
+        """
+        self.min_size = min_size
+        self.level = level
+        self.mimetypes = frozenset(mimetypes)
+        self.cache = InMemoryLRUCache(cache_entries)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.after_request(self.after_request)
+        available = ', '.join(self.available_encodings())
+        logger.info(f"Compressão de respostas ativa ({available}, mínimo {self.min_size} bytes)")
+
+    @staticmethod
+    def available_encodings():
+        return [encoding for encoding in ENCODINGS if encoding != 'br' or brotli is not None]
+
+    def choose_encoding(self) -> Optional[str]:
+        """Melhor codificação aceita pelo cliente (respeitando q=0)"""
+        accepted = request.accept_encodings
+        best, best_quality = None, 0
+        for encoding in self.available_encodings():
+            quality = accepted[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            # Um nível abaixo do gzip: tempo de compressão parecido, corpo menor
+            return brotli.compress(data, quality=min(self.level - 1, 11))
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def after_request(self, response: Response) -> Response:
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return response
+        if response.direct_passthrough or response.is_streamed:
+            # Streams (SSE, arquivos) seguem sem compressão para não acumular o corpo
+            return response
+        if 'Content-Encoding' in response.headers or response.mimetype not in self.mimetypes:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        cacheable = etag is not None and not weak and response.cache_control.public
+        compressed = self.cache.get(f'{etag}:{encoding}') if cacheable else None
+        if compressed is None:
+            compressed = self.compress(data, encoding)
+            if cacheable:
+                self.cache.set(f'{etag}:{encoding}', compressed)
+
+        COMPRESSION_BYTES.inc(len(data), encoding=encoding, stage='original')
+        COMPRESSION_BYTES.inc(len(compressed), encoding=encoding, stage='compressed')
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if etag is not None:
+            # Cada codificação é uma representação diferente; a ETag forte precisa distinguir
+            response.set_etag(f'{etag}-{encoding}', weak=weak)
+        return response
@@ -35,7 +35,117 @@ class Config:
     MAX_RETRIES = 3
     CACHE_TTL = 3600  # 1 hora em segundos
 
+    # Backend de cache compartilhado: 'memory' (um processo), 'sqlite' (workers do mesmo host) ou 'redis'
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1000))
+    CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', 'flight_cache.db')
+    CACHE_SQLITE_PURGE_EVERY = int(os.getenv('CACHE_SQLITE_PURGE_EVERY', 1000))  # Gravações entre limpezas das expiradas
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', 3600))
+
+    # Compressão de respostas (gzip/brotli) e cache HTTP de resultados imutáveis
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+    COMPRESSION_CACHE_ENTRIES = int(os.getenv('COMPRESSION_CACHE_ENTRIES', 256))
+    RESULTS_HTTP_MAX_AGE = int(os.getenv('RESULTS_HTTP_MAX_AGE', 24 * 3600))
+
+    # Paginação de resultados (/consulta/<id> e /consulta/<id>/view)
+    DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 20))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 100))
+    RESULT_SET_CACHE_ENTRIES = int(os.getenv('RESULT_SET_CACHE_ENTRIES', 64))
+    SEARCH_RETENTION_SECONDS = int(os.getenv('SEARCH_RETENTION_SECONDS', 7 * 24 * 3600))
+    # Write-behind do repositório (backends sqlite/redis): escritas em lotes fora do caminho da requisição
+    REPOSITORY_WRITE_BEHIND = os.getenv('REPOSITORY_WRITE_BEHIND', 'True').lower() == 'true'
+    REPOSITORY_MAX_PENDING = int(os.getenv('REPOSITORY_MAX_PENDING', 1000))
+    REPOSITORY_BATCH_SIZE = int(os.getenv('REPOSITORY_BATCH_SIZE', 100))
+    REPOSITORY_FLUSH_INTERVAL = float(os.getenv('REPOSITORY_FLUSH_INTERVAL', 0.05))
+    # Ofertas em memória para reconstruir resultados gravados por conteúdo
+    REPOSITORY_HOT_OFFERS = int(os.getenv('REPOSITORY_HOT_OFFERS', 20000))
+    # Buscas recentes de cada worker mantidas em memória (sqlite/redis); as demais são lidas do backend
+    REPOSITORY_RECENT_SEARCHES = int(os.getenv('REPOSITORY_RECENT_SEARCHES', 1000))
+
+    # Controle de admissão: pool compartilhado de chamadas aos provedores
+    PROVIDER_MAX_WORKERS = int(os.getenv('PROVIDER_MAX_WORKERS', 32))
+    PROVIDER_MAX_QUEUE = int(os.getenv('PROVIDER_MAX_QUEUE', 64))
+    PROVIDER_TIMEOUT = float(os.getenv('PROVIDER_TIMEOUT', 60))
+    MAX_SEARCHES_PER_CLIENT = int(os.getenv('MAX_SEARCHES_PER_CLIENT', 4))
+
+    # Busca escalonada: 'tiered' consulta provedores por prioridade, 'all' consulta todos de uma vez
+    SEARCH_STRATEGY = os.getenv('SEARCH_STRATEGY', 'tiered')
+    TIER_MIN_RESULTS = int(os.getenv('TIER_MIN_RESULTS', 10))
+    TIER_DEADLINE = float(os.getenv('TIER_DEADLINE', 5))
+    # JSON por rota, ex.: {"GRU-JFK": {"estrategia": "all"}, "*-LIS": {"min_resultados": 20}}
+    ROUTE_SEARCH_STRATEGIES = os.getenv('ROUTE_SEARCH_STRATEGIES', '')
+
+    # Cache negativo por provedor (segundos): sem voos, requisição recusada (4xx) e falha transitória
+    NEGATIVE_CACHE_EMPTY_TTL = int(os.getenv('NEGATIVE_CACHE_EMPTY_TTL', 900))
+    NEGATIVE_CACHE_REJECTED_TTL = int(os.getenv('NEGATIVE_CACHE_REJECTED_TTL', 600))
+    NEGATIVE_CACHE_ERROR_TTL = int(os.getenv('NEGATIVE_CACHE_ERROR_TTL', 30))
+
+    # Base local de aeroportos e expansão para metrópoles/aeroportos próximos
+    AIRPORTS_FILE = os.getenv('AIRPORTS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'airports.csv'))
+    NEARBY_RADIUS_KM = float(os.getenv('NEARBY_RADIUS_KM', 100))
+    MAX_NEARBY_RADIUS_KM = float(os.getenv('MAX_NEARBY_RADIUS_KM', 500))
+    MAX_AIRPORTS_PER_SIDE = int(os.getenv('MAX_AIRPORTS_PER_SIDE', 3))
+    PAIR_SEARCH_WORKERS = int(os.getenv('PAIR_SEARCH_WORKERS', 8))
+    # Pares/trechos aguardando um worker; além disso a busca é recusada com 503
+    PAIR_SEARCH_QUEUE = int(os.getenv('PAIR_SEARCH_QUEUE', 16))
+    # Ida e volta: 'native' (ofertas de ida e volta dos provedores) ou 'combined' (dois trechos só de ida)
+    ROUND_TRIP_MODE = os.getenv('ROUND_TRIP_MODE', 'native')
+    # Intervalo mínimo entre trechos montados a partir de voos só de ida (ida e volta combinada, múltiplos destinos)
+    MIN_CONNECTION_MINUTES = int(os.getenv('MIN_CONNECTION_MINUTES', 120))
+    MAX_MULTI_CITY_RESULTS = int(os.getenv('MAX_MULTI_CITY_RESULTS', 20))
+    AUTOCOMPLETE_LIMIT = int(os.getenv('AUTOCOMPLETE_LIMIT', 8))
+    AUTOCOMPLETE_MAX_LIMIT = int(os.getenv('AUTOCOMPLETE_MAX_LIMIT', 20))
+    AUTOCOMPLETE_HTTP_MAX_AGE = int(os.getenv('AUTOCOMPLETE_HTTP_MAX_AGE', 3600))
+
+    # Gravação/reprodução das respostas dos provedores: '' (desligado), 'record' ou 'replay'
+    PROVIDER_RECORDING_MODE = os.getenv('PROVIDER_RECORDING_MODE', '')
+    PROVIDER_FIXTURES_DIR = os.getenv('PROVIDER_FIXTURES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fixtures'))
+    PROVIDER_REPLAY_LATENCY = float(os.getenv('PROVIDER_REPLAY_LATENCY', 0))  # Fração da latência gravada (0 = sem espera)
+
     # Configurações de busca
     MAX_RESULTS_PER_PROVIDER = 50
     DEFAULT_CURRENCY = 'BRL'
 
+    # Ordenação 'best' (pesos de preço, duração e paradas) e processamento vetorizado de resultados
+    BEST_VALUE_WEIGHT_PRICE = float(os.getenv('BEST_VALUE_WEIGHT_PRICE', 0.6))
+    BEST_VALUE_WEIGHT_DURATION = float(os.getenv('BEST_VALUE_WEIGHT_DURATION', 0.3))
+    BEST_VALUE_WEIGHT_STOPS = float(os.getenv('BEST_VALUE_WEIGHT_STOPS', 0.1))
+    VECTORIZE_MIN_RESULTS = int(os.getenv('VECTORIZE_MIN_RESULTS', 2000))
+
+    # Câmbio: provedores e cache usam sempre a moeda canônica; a conversão é feita na saída
+    CANONICAL_CURRENCY = os.getenv('CANONICAL_CURRENCY', 'BRL')
+    FX_RATES_FILE = os.getenv('FX_RATES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fx_rates.json'))
+    FX_RATES_TTL = int(os.getenv('FX_RATES_TTL', 3600))
+
+    # Profiler por amostragem (desligado por padrão; pode ser ligado em /admin/profiler)
+    PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'False').lower() == 'true'
+    PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0.05))
+    PROFILER_INTERVAL_MS = int(os.getenv('PROFILER_INTERVAL_MS', 10))
+    PROFILER_RETENTION_SECONDS = int(os.getenv('PROFILER_RETENTION_SECONDS', 900))
+
+    # Token exigido nos endpoints /admin (vazio = endpoints desabilitados)
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+
+    # Calendário de tarifas (/calendario)
+    FARE_CALENDAR_MAX_AGE = int(os.getenv('FARE_CALENDAR_MAX_AGE', 6 * 3600))
+    CALENDAR_MAX_LIVE_SEARCHES = int(os.getenv('CALENDAR_MAX_LIVE_SEARCHES', 5))
+    # Buscas do repositório lidas na inicialização: as mais recentes, até esse número e idade (segundos)
+    FARE_CALENDAR_LOAD_SEARCHES = int(os.getenv('FARE_CALENDAR_LOAD_SEARCHES', 1000))
+    FARE_CALENDAR_LOAD_MAX_AGE = int(os.getenv('FARE_CALENDAR_LOAD_MAX_AGE', 7 * 86400))
+
+    # Arquivo histórico colunar (.npz) das buscas feitas nos provedores
+    ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'False').lower() == 'true'
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')
+    ARCHIVE_CHUNK_ROWS = int(os.getenv('ARCHIVE_CHUNK_ROWS', 50000))
+    ARCHIVE_FLUSH_SECONDS = int(os.getenv('ARCHIVE_FLUSH_SECONDS', 300))
+
+    # Monitoramento de preços (/watch)
+    WATCH_DEFAULT_INTERVAL = int(os.getenv('WATCH_DEFAULT_INTERVAL', 300))
+    WATCH_MIN_INTERVAL = int(os.getenv('WATCH_MIN_INTERVAL', 60))
+    WATCH_TTL = int(os.getenv('WATCH_TTL', 24 * 3600))
+    WATCH_MAX_EVENTS = int(os.getenv('WATCH_MAX_EVENTS', 100))
+    WATCH_MAX_CONCURRENT_POLLS = int(os.getenv('WATCH_MAX_CONCURRENT_POLLS', 4))
+    WATCH_LONG_POLL_TIMEOUT = int(os.getenv('WATCH_LONG_POLL_TIMEOUT', 30))
@@ -0,0 +1,112 @@
+"""
+Conversão de moedas - Tabela de câmbio local com validade (Single Responsibility)
+
+Os provedores são consultados sempre na moeda canônica; a conversão para a
+moeda pedida pelo usuário acontece na saída, usando esta tabela. Assim a
+mesma rota buscada em BRL, USD e EUR compartilha uma única entrada de cache.
+"""
+import json
+import logging
+import threading
+import time
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Tuple
+from interfaces import Flight
+
+logger = logging.getLogger(__name__)
+
+RatesLoader = Callable[[], Tuple[str, Dict[str, float]]]
+
+
+def file_rates_loader(path: str) -> RatesLoader:
+    """
+    Cria um loader que lê as cotações de um arquivo JSON local
+
+    Formato: {"base": "BRL", "rates": {"USD": 0.18, ...}}
+    (quantas unidades de cada moeda valem 1 unidade da base)
+    """
+    def load() -> Tuple[str, Dict[str, float]]:
+        with open(path, encoding='utf-8') as handle:
+            data = json.load(handle)
+        return data['base'].upper(), {code.upper(): float(rate) for code, rate in data['rates'].items()}
+
+    return load
+
+
+class FxRateTable:
+    """Tabela de câmbio recarregada do loader quando a validade expira"""
+
+    def __init__(self, loader: RatesLoader, ttl: int = 3600):
+        """
+        Args:
+            loader: Função que retorna (moeda base, cotações)
+            ttl: Validade da tabela em segundos
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.base = ''
+        self._rates: Dict[str, float] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _ensure_fresh(self) -> None:
+        if time.time() - self._loaded_at < self.ttl:
+            return
+
+        with self._lock:
+            if time.time() - self._loaded_at < self.ttl:
+                return
+            try:
+                base, rates = self.loader()
+                rates[base] = 1.0
+                self.base, self._rates = base, rates
+                logger.info(f"Cotações carregadas: base {base}, {len(rates)} moedas")
+            except Exception as e:
+                # Mantém a tabela anterior; tenta de novo no próximo ciclo
+                logger.error(f"Erro ao carregar cotações: {str(e)}")
+            self._loaded_at = time.time()
+
+    def supports(self, currency: str) -> bool:
+        self._ensure_fresh()
+        return currency.upper() in self._rates
+
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """
+        Fator de conversão entre duas moedas
+
+        Returns:
+            Multiplicador ou None se alguma moeda não estiver na tabela
+        """
+        self._ensure_fresh()
+        rates = self._rates
+        source = rates.get(from_currency.upper())
+        target = rates.get(to_currency.upper())
+        if not source or target is None:
+            return None
+        return target / source
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> Optional[float]:
+        """Converte um valor; None se a conversão não for possível"""
+        if from_currency.upper() == to_currency.upper():
+            return amount
+        factor = self.rate(from_currency, to_currency)
+        return round(amount * factor, 2) if factor is not None else None
+
+    def convert_flights(self, flights: List[Flight], to_currency: str) -> List[Flight]:
+        """
+        Retorna cópias dos voos com preço na moeda pedida
+
+        Voos em moedas fora da tabela são mantidos como estão.
+        """
+        to_currency = to_currency.upper()
+        converted = []
+        for flight in flights:
+            if flight.currency.upper() == to_currency:
+                converted.append(flight)
+                continue
+            price = self.convert(flight.price, flight.currency, to_currency)
+            if price is None:
+                converted.append(flight)
+            else:
+                converted.append(replace(flight, price=price, currency=to_currency))
+        return converted
@@ -0,0 +1,175 @@
+"""
+Calendário de tarifas - Índice de menor preço por rota e data (Single Responsibility)
+
+Alimentado pelas buscas feitas nos provedores (listener do FlightSearchService
+sem acertos de cache, que carregariam a hora da leitura e não a da cotação) e
+pelo histórico recente do SearchRepository na inicialização.
+Uma visão mensal é resolvida com uma única consulta à rota no índice.
+"""
+import calendar
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from interfaces import Flight, FlightSearchParams
+
+logger = logging.getLogger(__name__)
+
+RouteKey = Tuple[str, str, str]
+
+
+@dataclass
+class FareCell:
+    """Menor tarifa observada para uma rota em uma data (preço por passageiro)"""
+    price: float
+    currency: str
+    provider: str
+    airline: str
+    observed_at: float
+
+    def to_dict(self, max_age_seconds: int) -> Dict:
+        data = asdict(self)
+        data['observed_at'] = datetime.fromtimestamp(self.observed_at).isoformat()
+        data['stale'] = self.is_stale(max_age_seconds)
+        return data
+
+    def is_stale(self, max_age_seconds: int) -> bool:
+        return time.time() - self.observed_at > max_age_seconds
+
+
+class LowestFareIndex:
+    """Índice (origem, destino, cabine) -> {data: FareCell}"""
+
+    def __init__(self, max_age_seconds: int = 6 * 3600):
+        """
+        Args:
+            max_age_seconds: Idade a partir da qual uma célula é considerada desatualizada
+        """
+        self.max_age_seconds = max_age_seconds
+        self._routes: Dict[RouteKey, Dict[str, FareCell]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, origin: str, destination: str, day: str, cabin: str, cell: FareCell) -> None:
+        """
+        Registra uma observação, mantendo o menor preço ainda válido
+
+        Uma célula desatualizada (ou em outra moeda) é sempre substituída pela
+        observação mais recente; caso contrário fica a menor tarifa.
+        """
+        key = (origin.upper(), destination.upper(), cabin.upper())
+        with self._lock:
+            cells = self._routes.setdefault(key, {})
+            current = cells.get(day)
+            if current is None:
+                cells[day] = cell
+            elif cell.observed_at < current.observed_at and cell.is_stale(self.max_age_seconds):
+                return
+            elif current.is_stale(self.max_age_seconds) or current.currency != cell.currency:
+                cells[day] = cell
+            elif cell.price < current.price:
+                cells[day] = cell
+
+    def record_search(self, params: FlightSearchParams, flights: List[Flight],
+                      observed_at: Optional[float] = None) -> None:
+        """Registra o voo mais barato de uma busca só de ida (sem filtro de paradas)"""
+        if params.return_date or params.max_stops is not None or not flights:
+            return
+
+        cheapest = min(flights, key=lambda flight: flight.price)
+        passengers = params.adults + params.children
+        self.record(
+            params.origin,
+            params.destination,
+            params.departure_date.strftime('%Y-%m-%d'),
+            params.cabin_class.value,
+            FareCell(
+                price=round(cheapest.price / passengers, 2),
+                currency=cheapest.currency,
+                provider=cheapest.provider,
+                airline=cheapest.airline,
+                observed_at=observed_at or time.time()
+            )
+        )
+
+    def load_from_repository(self, repository, max_searches: int = 1000,
+                             max_age_seconds: Optional[float] = None) -> int:
+        """
+        Reconstrói o índice a partir das buscas persistidas
+
+        Só as max_searches buscas mais recentes (e, com max_age_seconds, não
+        mais antigas que isso) são lidas, para que a inicialização não cresça
+        com o repositório.
+
+        Returns:
+            Número de buscas aproveitadas
+        """
+        now = time.time()
+        candidates = []
+        for search in repository.list_all_searches():
+            data = search.get('data') or {}
+            if (data.get('data_volta') or data.get('max_paradas') is not None
+                    or not data.get('origem') or not data.get('destino')):
+                continue
+            observed_at = datetime.fromisoformat(search['timestamp']).timestamp()
+            if max_age_seconds is None or now - observed_at <= max_age_seconds:
+                candidates.append((observed_at, search))
+        candidates = heapq.nlargest(max_searches, candidates, key=lambda item: item[0])
+
+        loaded = 0
+        for observed_at, search in candidates:
+            data = search['data']
+
+            results = repository.get_results(search['id'])
+            if not results:
+                continue
+
+            cheapest = min(results, key=lambda flight: flight['price'])
+            passengers = int(data.get('passageiros', 1)) + int(data.get('criancas', 0))
+            self.record(
+                data['origem'],
+                data['destino'],
+                data['data_ida'],
+                data.get('classe', 'ECONOMY'),
+                FareCell(
+                    price=round(cheapest['price'] / max(passengers, 1), 2),
+                    currency=cheapest['currency'],
+                    provider=cheapest['provider'],
+                    airline=cheapest['airline'],
+                    observed_at=observed_at
+                )
+            )
+            loaded += 1
+
+        logger.info(f"Calendário de tarifas carregado com {loaded} buscas do repositório")
+        return loaded
+
+    def month_view(self, origin: str, destination: str, year: int, month: int,
+                   cabin: str = 'ECONOMY') -> Dict[str, Optional[FareCell]]:
+        """
+        Retorna todas as datas do mês com a menor tarifa conhecida (ou None)
+
+        Args:
+            origin: Código IATA de origem
+            destination: Código IATA de destino
+            year: Ano
+            month: Mês (1-12)
+            cabin: Classe de cabine
+
+        Returns:
+            Dicionário ordenado 'YYYY-MM-DD' -> FareCell | None
+        """
+        days = [date(year, month, day).isoformat() for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+
+        with self._lock:
+            cells = self._routes.get((origin.upper(), destination.upper(), cabin.upper()), {})
+            return {day: cells.get(day) for day in days}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'routes': len(self._routes),
+                'cells': sum(len(cells) for cells in self._routes.values())
+            }
@@ -3,9 +3,24 @@ Serviço de busca de voos - Orquestra múltiplos provedores (Facade Pattern + St
 Segue o princípio Single Responsibility: apenas coordena a busca entre provedores
 """
 import logging
-from typing import List
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from interfaces import IFlightProvider, FlightSearchParams, Flight
+import contextvars
+import time
+from dataclasses import replace
+from datetime import timedelta
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future, TimeoutError as FuturesTimeout, as_completed
+from admission import BoundedExecutor, Overloaded
+from interfaces import (IFlightProvider, FlightSearchParams, Flight, ICacheBackend, ProviderError,
+                        MultiCitySearchParams, Itinerary)
+from metrics import (SEARCH_STAGE_SECONDS, CACHE_REQUESTS, TIER_ESCALATIONS, PROVIDER_CALLS_SKIPPED,
+                     NEGATIVE_CACHE_SUPPRESSED)
+from tracing import span
+from profiler import profiled
+from currency import FxRateTable
+from result_set import FlightResultSet, DEFAULT_BEST_VALUE_WEIGHTS
+from tiering import ALL_PROVIDERS, TierPolicy, TierPolicyResolver, group_by_priority
+from combinations import k_best_combinations
 
 logger = logging.getLogger(__name__)
 
@@ -13,27 +28,112 @@ logger = logging.getLogger(__name__)
 class FlightSearchService:
     """Serviço que agrega resultados de múltiplos provedores de voos"""
 
-    def __init__(self, providers: List[IFlightProvider]):
+    # Critérios de ordenação por voo (empate resolvido pelo preço); 'best' depende do lote e é vetorizado
+    SORT_KEYS = {
+        'price': lambda flight: flight.price,
+        'duration': lambda flight: (flight.duration_minutes, flight.price),
+        'departure': lambda flight: (flight.departure_datetime, flight.price)
+    }
+
+    # Maior limite de paradas com entrada própria consultada na busca de um resultado mais amplo
+    MAX_INDEXED_STOPS = 2
+
+    # Validade das respostas negativas por provedor: sem voos, recusa da requisição (4xx) e falha transitória
+    DEFAULT_NEGATIVE_TTLS = {'empty': 900, 'rejected': 600, 'error': 30}
+
+    def __init__(self, providers: List[IFlightProvider], cache: Optional[ICacheBackend] = None,
+                 cache_ttl: int = 3600, fx: Optional[FxRateTable] = None,
+                 canonical_currency: Optional[str] = None,
+                 best_value_weights: Optional[Dict[str, float]] = None,
+                 vectorize_threshold: int = 2000,
+                 executor: Optional[BoundedExecutor] = None, provider_timeout: float = 60,
+                 tier_resolver: Optional[TierPolicyResolver] = None,
+                 negative_ttls: Optional[Dict[str, int]] = None, pair_workers: int = 8, pair_queue: int = 16,
+                 min_connection_minutes: int = 120):
         """
         Inicializa o serviço com uma lista de provedores
 
         Args:
             providers: Lista de provedores que implementam IFlightProvider
+            cache: Backend de cache para resultados de busca (opcional)
+            cache_ttl: Validade dos resultados em cache, em segundos
+            fx: Tabela de câmbio; com ela os provedores são consultados sempre na moeda canônica
+            canonical_currency: Moeda usada com provedores, cache e listeners
+            best_value_weights: Pesos de preço, duração e paradas na ordenação 'best'
+            vectorize_threshold: Tamanho a partir do qual os resultados são processados em arrays
+            executor: Pool compartilhado das chamadas aos provedores (padrão: um pool próprio)
+            provider_timeout: Tempo máximo de espera pelos provedores, em segundos
+            tier_resolver: Políticas de busca escalonada por rota (sem ele, todos os provedores são consultados)
+            negative_ttls: Validade, por tipo (empty, rejected, error), das respostas vazias ou com
+                           falha de cada provedor no cache negativo; 0 desativa o tipo
+            pair_workers: Buscas de pares de aeroportos coordenadas em paralelo (search_airport_pairs)
+                          e, em outro pool do mesmo tamanho, trechos buscados em paralelo
+            pair_queue: Pares (ou trechos) que podem aguardar um worker; além disso, Overloaded
+            min_connection_minutes: Intervalo mínimo entre a chegada de um trecho e a partida do
+                                    seguinte em itinerários montados com voos só de ida
         """
         self.providers = providers
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.fx = fx
+        self.canonical_currency = canonical_currency.upper() if canonical_currency else None
+        self.best_value_weights = best_value_weights or DEFAULT_BEST_VALUE_WEIGHTS
+        self.vectorize_threshold = vectorize_threshold
+        self.executor = executor or BoundedExecutor()
+        self.provider_timeout = provider_timeout
+        self.tier_resolver = tier_resolver
+        self.negative_ttls = self.DEFAULT_NEGATIVE_TTLS if negative_ttls is None else negative_ttls
+        self.min_connection = timedelta(minutes=min_connection_minutes)
+        # Só coordenam buscas de pares e de trechos; as chamadas aos provedores continuam no pool limitado.
+        # Pools separados: uma busca de par pode esperar por trechos, nunca o contrário
+        self.pair_executor = BoundedExecutor(pair_workers, pair_queue, name='pair-search')
+        self.leg_executor = BoundedExecutor(pair_workers, pair_queue, name='leg-search')
+        self.listeners: List[Tuple[Callable[[FlightSearchParams, List[Flight]], None], bool]] = []
         logger.info(f"FlightSearchService inicializado com {len(providers)} provedores")
 
-    def search_flights(self, params: FlightSearchParams) -> List[Flight]:
+    def add_listener(self, listener: Callable[[FlightSearchParams, List[Flight]], None],
+                     include_cached: bool = True) -> None:
         """
-        Busca voos em todos os provedores disponíveis em paralelo
+        Registra um observador chamado ao fim de cada busca
+
+        Args:
+            listener: Função que recebe os parâmetros e os voos encontrados
+            include_cached: Também notifica respostas servidas pelo cache
+        """
+        self.listeners.append((listener, include_cached))
+
+    def _notify(self, params: FlightSearchParams, flights: List[Flight], cached: bool = False) -> None:
+        """Entrega o resultado aos observadores sem deixar falhas afetarem a busca"""
+        for listener, include_cached in self.listeners:
+            if cached and not include_cached:
+                continue
+            try:
+                listener(params, flights)
+            except Exception as e:
+                logger.error(f"Erro em listener de busca: {str(e)}")
+
+    @profiled
+    def search_flights(self, params: FlightSearchParams, refresh: bool = False,
+                       tier_policy: Optional[TierPolicy] = None) -> List[Flight]:
+        """
+        Busca voos nos provedores disponíveis, em paralelo dentro de cada nível de prioridade
 
         Args:
             params: Parâmetros de busca padronizados
+            refresh: Ignora o cache na leitura (o resultado novo ainda é gravado)
+            tier_policy: Política de escalonamento (padrão: a da rota no tier_resolver)
 
         Returns:
-            Lista de voos encontrados, ordenados por preço
+            Lista de voos encontrados, na ordem pedida em params.sort_by
         """
-        all_flights = []
+        requested_currency = params.currency
+        params = self._canonical_params(params)
+        policy = tier_policy or self._policy_for(params)
+
+        cached_flights = None if refresh else self._get_cached(params, policy)
+        if cached_flights is not None:
+            self._notify(params, cached_flights, cached=True)
+            return self._convert_currency(cached_flights, requested_currency)
 
         # Filtra apenas provedores disponíveis e ordena por prioridade
         available_providers = [p for p in self.providers if p.is_available()]
@@ -43,35 +143,581 @@ class FlightSearchService:
             logger.warning("Nenhum provedor de voos disponível")
             return []
 
-        logger.info(f"Buscando em {len(available_providers)} provedores disponíveis")
+        tiers = group_by_priority(available_providers) if policy.tiered else [available_providers]
+        logger.info(f"Buscando em {len(available_providers)} provedores disponíveis ({len(tiers)} níveis)")
 
-        # Busca em paralelo usando ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=len(available_providers)) as executor:
-            # Submete todas as buscas
-            future_to_provider = {
-                executor.submit(provider.search_flights, params): provider
-                for provider in available_providers
-            }
+        results_by_provider, skipped, failed = self._query_tiers(tiers, params, policy, refresh)
+
+        # Mantém a ordem de prioridade dos provedores, para a remoção de duplicatas ser determinística
+        provider_lists = {
+            provider.get_provider_name(): results_by_provider[provider.get_provider_name()]
+            for provider in available_providers
+            if provider.get_provider_name() in results_by_provider
+        }
+
+        self._set_cached(params, provider_lists, skipped, failed)
+        unique_flights = self._assemble(provider_lists, params)
+
+        logger.info(f"Total de {len(unique_flights)} voos únicos encontrados")
+        self._notify(params, unique_flights)
+        return self._convert_currency(unique_flights, requested_currency)
+
+    def search_airport_pairs(self, params: FlightSearchParams, origins: List[str], destinations: List[str],
+                             tier_policy: Optional[TierPolicy] = None,
+                             combine_round_trip: bool = False, refresh: bool = False) -> List[Flight]:
+        """
+        Busca todas as combinações de origem e destino em paralelo e mescla os resultados
+
+        Cada par é uma busca comum, com cache, escalonamento e listeners
+        próprios; o resultado mesclado passa pela remoção de duplicatas e
+        pela ordenação de params.sort_by.
+
+        Args:
+            params: Parâmetros da busca (origem e destino são substituídos por cada par)
+            origins: Aeroportos de origem
+            destinations: Aeroportos de destino
+            combine_round_trip: Monta ida e volta a partir de trechos só de ida (search_round_trip)
+            refresh: Ignora o cache em cada par (como em search_flights)
+
+        Raises:
+            Overloaded: Se o pair_executor não tiver vagas para todos os pares, ou
+                se nenhum par pôde ser buscado por falta de capacidade
+        """
+        combine_round_trip = combine_round_trip and params.return_date is not None
+        search = partial(self.search_round_trip if combine_round_trip else self.search_flights,
+                         refresh=refresh, tier_policy=tier_policy)
+
+        pairs = [
+            replace(params, origin=origin, destination=destination)
+            for origin in origins for destination in destinations if origin != destination
+        ]
+        if len(pairs) <= 1:
+            return search(pairs[0]) if pairs else []
+
+        logger.info(f"Buscando {len(pairs)} pares de aeroportos: {', '.join(f'{p.origin}-{p.destination}' for p in pairs)}")
+        # Todos os pares são admitidos de uma vez ou a busca é recusada (Overloaded)
+        futures = dict(zip(
+            self.pair_executor.submit_all([(contextvars.copy_context().run, (search, pair)) for pair in pairs]),
+            pairs
+        ))
+
+        flights: List[Flight] = []
+        shed: Optional[Overloaded] = None
+        shed_count = 0
+        for future in as_completed(futures):
+            pair = futures[future]
+            try:
+                flights.extend(future.result())
+            except Overloaded as e:
+                shed, shed_count = e, shed_count + 1
+                logger.warning(f"Par {pair.origin}-{pair.destination} recusado por sobrecarga")
+            except Exception as e:
+                logger.error(f"Erro na busca do par {pair.origin}-{pair.destination}: {str(e)}")
+
+        if shed is not None and shed_count == len(pairs):
+            raise shed
+
+        with span('merge', SEARCH_STAGE_SECONDS, stage='merge'):
+            merged = FlightResultSet.from_flights(flights)
+            if not combine_round_trip:
+                # A chave de duplicata olha só a ida; combinações com voltas diferentes são ofertas distintas
+                merged = merged.dedup()
+            return merged.ranked(params.sort_by, weights=self.best_value_weights).flights()
+
+    def search_round_trip(self, params: FlightSearchParams, refresh: bool = False,
+                          tier_policy: Optional[TierPolicy] = None) -> List[Flight]:
+        """
+        Ida e volta montada a partir de dois trechos só de ida
+
+        Os trechos são buscas comuns só de ida (com cache próprio, compartilhado
+        com o tráfego só de ida e com outras combinações de datas). Os pares são
+        escolhidos por preço total com k_best_combinations, sem gerar o produto
+        cartesiano. Ofertas nativas de ida e volta já em cache (sem nova chamada
+        aos provedores) entram na disputa e prevalecem quando mais baratas.
+
+        Returns:
+            Até params.max_results ofertas, na ordem pedida em params.sort_by
+        """
+        if params.return_date is None:
+            return self.search_flights(params, refresh, tier_policy)
+
+        outbound_params = replace(params, return_date=None, sort_by='price')
+        inbound_params = replace(params, origin=params.destination, destination=params.origin,
+                                 departure_date=params.return_date, return_date=None, sort_by='price')
+        outbound, inbound = self._search_parallel([outbound_params, inbound_params], tier_policy, refresh)
+
+        with span('combine', SEARCH_STAGE_SECONDS, stage='combine'):
+            legs = [outbound, inbound]
+            pairs = k_best_combinations(
+                [[flight.price for flight in outbound], [flight.price for flight in inbound]],
+                params.max_results,
+                is_valid=lambda combination: self._connections_ok(legs, combination)
+            )
+            offers = {}
+            for _, (i, j) in pairs:
+                combined = self._combine_legs(outbound[i], inbound[j])
+                offers[self._round_trip_key(combined)] = combined
+
+            native = self._peek_cached(params, tier_policy or self._policy_for(params)) or []
+            for flight in native:
+                key = self._round_trip_key(flight)
+                if key not in offers or flight.price < offers[key].price:
+                    offers[key] = flight
+
+        logger.info(f"Ida e volta combinada: {len(pairs)} pares de trechos, {len(native)} ofertas nativas em cache")
+        cheapest = sorted(offers.values(), key=lambda flight: flight.price)[:params.max_results]
+        return FlightResultSet.from_flights(cheapest).ranked(params.sort_by, weights=self.best_value_weights).flights()
+
+    def search_multi_city(self, params: MultiCitySearchParams,
+                          tier_policy: Optional[TierPolicy] = None) -> List[Itinerary]:
+        """
+        Itinerários de múltiplos trechos (A→B, B→C, C→A)
+
+        Cada trecho é uma busca comum só de ida, feita em paralelo e com cache
+        próprio. As combinações mais baratas saem de k_best_combinations (um
+        voo por trecho), descartando as que não respeitam a conexão mínima.
+
+        Returns:
+            Até params.max_results itinerários, na ordem pedida em params.sort_by
+        """
+        searches = [replace(leg, return_date=None, sort_by='price') for leg in params.legs]
+        legs = self._search_parallel(searches, tier_policy)
+
+        with span('combine', SEARCH_STAGE_SECONDS, stage='combine'):
+            combinations = k_best_combinations(
+                [[flight.price for flight in flights] for flights in legs],
+                params.max_results,
+                is_valid=lambda combination: self._connections_ok(legs, combination)
+            )
+            itineraries = [
+                Itinerary([flights[index] for flights, index in zip(legs, combination)])
+                for _, combination in combinations
+            ]
+
+        logger.info(f"Múltiplos destinos: {' -> '.join([params.legs[0].origin] + [leg.destination for leg in params.legs])}, "
+                    f"{' x '.join(str(len(flights)) for flights in legs)} voos por trecho, {len(itineraries)} itinerários")
+        ranked = FlightResultSet.from_itineraries(itineraries).ranked(params.sort_by, weights=self.best_value_weights)
+        return ranked.flights()
+
+    def _connections_ok(self, legs: List[List[Flight]], combination: Tuple[int, ...]) -> bool:
+        """Cada voo da combinação parte pelo menos min_connection depois da chegada do anterior"""
+        arrival = None
+        for flights, index in zip(legs, combination):
+            flight = flights[index]
+            if arrival is not None and flight.departure_datetime - arrival < self.min_connection:
+                return False
+            arrival = flight.arrival_datetime
+        return True
+
+    def _search_parallel(self, searches: List[FlightSearchParams],
+                         tier_policy: Optional[TierPolicy] = None, refresh: bool = False) -> List[List[Flight]]:
+        """
+        Executa buscas comuns em paralelo, na ordem recebida
+
+        A última roda na thread atual; as demais no leg_executor, que nunca
+        espera por outras buscas (sem risco de esgotar o próprio pool).
+
+        Raises:
+            Overloaded: Se o leg_executor não tiver vagas para todos os trechos
+        """
+        futures = self.leg_executor.submit_all([
+            (contextvars.copy_context().run, (self.search_flights, search, refresh, tier_policy))
+            for search in searches[:-1]
+        ])
+        last = self.search_flights(searches[-1], refresh, tier_policy)
+        return [future.result() for future in futures] + [last]
+
+    def _peek_cached(self, params: FlightSearchParams, policy: TierPolicy) -> Optional[List[Flight]]:
+        """Resultado em cache da busca, na moeda pedida, sem consultar provedores"""
+        flights = self._get_cached(self._canonical_params(params), policy)
+        return None if flights is None else self._convert_currency(flights, params.currency)
+
+    @staticmethod
+    def _combine_legs(outbound: Flight, inbound: Flight) -> Flight:
+        """
+        Oferta de ida e volta a partir de dois voos só de ida
+
+        Como nas ofertas nativas, paradas e duração são as da ida; os segmentos
+        da volta são marcados com is_return.
+        """
+        same_provider = outbound.provider == inbound.provider
+        same_airline = outbound.airline == inbound.airline
+        return replace(
+            outbound,
+            id=f"{outbound.id}+{inbound.id}",
+            provider=outbound.provider if same_provider else f"{outbound.provider} + {inbound.provider}",
+            airline=outbound.airline if same_airline else f"{outbound.airline}/{inbound.airline}",
+            airline_name=outbound.airline_name if same_airline else None,
+            return_departure_datetime=inbound.departure_datetime,
+            return_arrival_datetime=inbound.arrival_datetime,
+            price=round(outbound.price + inbound.price, 2),
+            available_seats=min(outbound.available_seats, inbound.available_seats),
+            booking_url=outbound.booking_url if same_provider and outbound.booking_url == inbound.booking_url else '',
+            baggage_included=outbound.baggage_included and inbound.baggage_included,
+            segments=outbound.segments + [replace(segment, is_return=True) for segment in inbound.segments]
+        )
+
+    @staticmethod
+    def _round_trip_key(flight: Flight) -> Tuple:
+        """Mesma ida e mesma volta (companhia, voo e horários), venha a oferta nativa ou combinada"""
+        return (
+            flight.airline.split('/')[0],
+            flight.flight_number,
+            flight.departure_datetime.replace(second=0, microsecond=0),
+            flight.return_departure_datetime.replace(second=0, microsecond=0) if flight.return_departure_datetime else None
+        )
+
+    def _policy_for(self, params: FlightSearchParams) -> TierPolicy:
+        if self.tier_resolver is None:
+            return ALL_PROVIDERS
+        return self.tier_resolver.for_route(params.origin, params.destination)
+
+    def _query_tiers(self, tiers: List[List[IFlightProvider]], params: FlightSearchParams,
+                     policy: TierPolicy, refresh: bool = False
+                     ) -> Tuple[Dict[str, List[Flight]], List[str], Dict[str, str]]:
+        """
+        Consulta os níveis em ordem, escalonando enquanto o resultado for insuficiente
+
+        Um nível que estoura o prazo não é abandonado: o próximo é acionado e
+        as respostas atrasadas ainda são aproveitadas até o provider_timeout.
+
+        Returns:
+            (voos por provedor, provedores não consultados,
+             tipo da falha de cada provedor que falhou ou não respondeu a tempo)
+        """
+        started = time.monotonic()
+        results: Dict[str, List[Flight]] = {}
+        failed: Dict[str, str] = {}
+        pending: Dict[Future, IFlightProvider] = {}
+
+        for level, tier in enumerate(tiers):
+            try:
+                pending.update(self._submit(tier, params, refresh))
+            except Overloaded:
+                # Sem vagas no pool: o primeiro nível recusa a busca; nos seguintes, fica o que já chegou
+                if level == 0:
+                    raise
+                logger.warning(f"Escalonamento para o nível {level + 1} recusado por sobrecarga")
+                skipped = [provider for rest in tiers[level:] for provider in rest]
+                break
+
+            if level == len(tiers) - 1:
+                skipped = []
+                break
+
+            wait = policy.deadline if policy.deadline is not None else self.provider_timeout
+            finished = self._collect(pending, results, failed, params, timeout=wait)
+            tier_names = {provider.get_provider_name() for provider in tier}
+
+            if not finished:
+                reason = 'deadline'
+            elif tier_names & failed.keys():
+                reason = 'error'
+            elif self._usable_count(results, params) < policy.min_results:
+                reason = 'few_results'
+            else:
+                skipped = [provider for rest in tiers[level + 1:] for provider in rest]
+                break
+
+            TIER_ESCALATIONS.inc(reason=reason)
+            logger.info(f"Escalonando para o nível {level + 2} ({reason})")
+
+        for provider in skipped:
+            PROVIDER_CALLS_SKIPPED.inc(provider=provider.get_provider_name())
+
+        remaining = max(self.provider_timeout - (time.monotonic() - started), 0)
+        if not self._collect(pending, results, failed, params, timeout=remaining):
+            names = [provider.get_provider_name() for provider in pending.values()]
+            logger.warning(f"Provedores sem resposta em {self.provider_timeout}s: {', '.join(names)}")
+            failed.update((name, 'error') for name in names)
+
+        return results, [provider.get_provider_name() for provider in skipped], failed
+
+    def _submit(self, providers: List[IFlightProvider], params: FlightSearchParams,
+                refresh: bool = False) -> Dict[Future, IFlightProvider]:
+        """
+        Envia as chamadas ao pool compartilhado; sem vagas para todas, levanta Overloaded
+        (cada chamada leva uma cópia do contexto, para propagar o trace)
+        """
+        futures = self.executor.submit_all([
+            (contextvars.copy_context().run, (self._search_provider, provider, params, refresh))
+            for provider in providers
+        ])
+        return dict(zip(futures, providers))
+
+    def _collect(self, pending: Dict[Future, IFlightProvider], results: Dict[str, List[Flight]],
+                 failed: Dict[str, str], params: FlightSearchParams, timeout: float) -> bool:
+        """
+        Coleta as respostas pendentes conforme ficam prontas (removendo-as de pending)
 
-            # Coleta os resultados conforme ficam prontos
-            for future in as_completed(future_to_provider):
-                provider = future_to_provider[future]
+        Returns:
+            True se todas chegaram dentro do timeout
+        """
+        try:
+            for future in as_completed(list(pending), timeout=timeout):
+                provider = pending.pop(future)
+                name = provider.get_provider_name()
                 try:
-                    flights = future.result(timeout=60)
-                    all_flights.extend(flights)
-                    logger.info(f"{provider.get_provider_name()}: {len(flights)} voos encontrados")
+                    flights = future.result()
+                    # Provedores podem responder em outra moeda; normaliza antes de comparar preços
+                    results[name] = self._convert_currency(flights, params.currency)
+                    logger.info(f"{name}: {len(flights)} voos encontrados")
                 except Exception as e:
-                    logger.error(f"Erro no provedor {provider.get_provider_name()}: {str(e)}")
+                    failed[name] = e.kind if isinstance(e, ProviderError) else 'error'
+                    logger.error(f"Erro no provedor {name}: {str(e)}")
+        except FuturesTimeout:
+            return False
+        return True
+
+    @staticmethod
+    def _usable_count(results: Dict[str, List[Flight]], params: FlightSearchParams) -> int:
+        """Voos que entrariam no resultado (limite de paradas e max_results por provedor)"""
+        return sum(
+            min(sum(1 for flight in flights if params.max_stops is None or flight.stops <= params.max_stops),
+                params.max_results)
+            for flights in results.values()
+        )
+
+    def _assemble(self, provider_lists: Dict[str, list], params: FlightSearchParams,
+                  from_dicts: bool = False) -> List[Flight]:
+        """
+        Monta a resposta a partir das listas de cada provedor
+
+        Aplica o limite de paradas e o max_results por provedor (como o próprio
+        provedor faria), remove duplicatas e ordena conforme params.sort_by.
+        Lotes grandes (e o score 'best') usam o FlightResultSet vetorizado.
+
+        Args:
+            provider_lists: Voos de cada provedor, na ordem em que vieram
+            params: Parâmetros da busca
+            from_dicts: As listas contêm dicionários de Flight.to_dict (entradas do cache)
+        """
+        total = sum(len(flights) for flights in provider_lists.values())
+        if params.sort_by == 'best' or total >= self.vectorize_threshold:
+            return self._assemble_vectorized(provider_lists, params, from_dicts)
+
+        all_flights = []
+        for flights in provider_lists.values():
+            if params.max_stops is not None:
+                flights = [
+                    flight for flight in flights
+                    if (flight['stops'] if from_dicts else flight.stops) <= params.max_stops
+                ]
+            flights = flights[:params.max_results]
+            all_flights.extend([Flight.from_dict(flight) for flight in flights] if from_dicts else flights)
 
         # Remove duplicatas baseadas em características similares
-        unique_flights = self._remove_duplicates(all_flights)
+        with span('dedup', SEARCH_STAGE_SECONDS, stage='dedup'):
+            unique_flights = self._remove_duplicates(all_flights)
 
-        # Ordena por preço (mais barato primeiro)
-        unique_flights.sort(key=lambda x: x.price)
+        with span('sort', SEARCH_STAGE_SECONDS, stage='sort'):
+            unique_flights.sort(key=self.SORT_KEYS[params.sort_by])
 
-        logger.info(f"Total de {len(unique_flights)} voos únicos encontrados")
         return unique_flights
 
+    def _assemble_vectorized(self, provider_lists: Dict[str, list], params: FlightSearchParams,
+                             from_dicts: bool) -> List[Flight]:
+        """Mesmo pipeline de _assemble sobre arrays; só os voos devolvidos viram objetos Flight"""
+        items = [flight for flights in provider_lists.values() for flight in flights]
+        results = FlightResultSet.from_dicts(items) if from_dicts else FlightResultSet.from_flights(items)
+
+        with span('dedup', SEARCH_STAGE_SECONDS, stage='dedup'):
+            results = results.filter(max_stops=params.max_stops).head_per_provider(params.max_results).dedup()
+
+        with span('sort', SEARCH_STAGE_SECONDS, stage='sort'):
+            return results.ranked(params.sort_by, weights=self.best_value_weights).flights()
+
+    def _canonical_params(self, params: FlightSearchParams) -> FlightSearchParams:
+        """Troca a moeda da busca pela canônica quando a tabela de câmbio permite converter de volta"""
+        if (self.fx is None or not self.canonical_currency
+                or params.currency == self.canonical_currency
+                or not self.fx.supports(params.currency)):
+            return params
+        return replace(params, currency=self.canonical_currency)
+
+    def _convert_currency(self, flights: List[Flight], currency: str) -> List[Flight]:
+        """Converte os preços para a moeda indicada (sem tabela de câmbio, mantém os voos)"""
+        if self.fx is None or all(flight.currency == currency for flight in flights):
+            return flights
+        with span('fx_conversion'):
+            return self.fx.convert_flights(flights, currency)
+
+    def _cache_key(self, params: FlightSearchParams, max_stops: Optional[int]) -> str:
+        return f"{params.cache_scope()}:{'any' if max_stops is None else max_stops}"
+
+    def _covers(self, entry: Dict, params: FlightSearchParams) -> bool:
+        """
+        Indica se uma entrada do cache contém a resposta exata da busca
+
+        Para cada provedor, a entrada guarda os voos na ordem de preço em que
+        vieram e se a lista foi truncada pelo max_results. Uma lista completa
+        responde qualquer refinamento; uma truncada só responde se, após o
+        filtro de paradas, ainda restarem pelo menos max_results voos.
+        """
+        stored_stops = entry['max_stops']
+        if stored_stops is not None and (params.max_stops is None or params.max_stops > stored_stops):
+            return False
+
+        for provider in entry['providers'].values():
+            if not provider['truncated']:
+                continue
+            flights = provider['flights']
+            if params.max_stops is not None and params.max_stops != stored_stops:
+                flights = [flight for flight in flights if flight['stops'] <= params.max_stops]
+            if len(flights) < params.max_results:
+                return False
+        return True
+
+    def _get_cached(self, params: FlightSearchParams, policy: TierPolicy = ALL_PROVIDERS) -> Optional[List[Flight]]:
+        """
+        Busca no cache uma consulta igual ou mais ampla que a pedida
+
+        Entradas ficam separadas por limite de paradas; uma busca com
+        max_stops=k pode ser respondida pela entrada de k, de limites maiores
+        ou sem limite, desde que _covers confirme que o resultado é exato.
+        Entradas de buscas escalonadas que pularam provedores só respondem
+        buscas escalonadas cujo mínimo de resultados elas atendem.
+
+        Returns:
+            Lista de voos ou None em caso de ausência (ou falha do backend)
+        """
+        if self.cache is None:
+            return None
+
+        candidates: List[Optional[int]] = []
+        if params.max_stops is not None:
+            candidates.extend(range(params.max_stops, max(params.max_stops, self.MAX_INDEXED_STOPS) + 1))
+        candidates.append(None)
+
+        with span('cache_lookup'):
+            for max_stops in candidates:
+                try:
+                    entry = self.cache.get(self._cache_key(params, max_stops))
+                except Exception as e:
+                    logger.warning(f"Falha ao consultar cache ({self.cache.get_backend_name()}): {str(e)}")
+                    return None
+
+                if not isinstance(entry, dict) or not self._covers(entry, params):
+                    continue
+
+                provider_lists = {name: provider['flights'] for name, provider in entry['providers'].items()}
+                flights = self._assemble(provider_lists, params, from_dicts=True)
+                if entry.get('skipped') and (not policy.tiered or len(flights) < policy.min_results):
+                    continue
+
+                exact = max_stops == params.max_stops and entry['max_results'] == params.max_results
+                CACHE_REQUESTS.inc(cache='search', result='hit' if exact else 'derived')
+                logger.info(f"Cache {'hit' if exact else 'derivado'}: {params.origin} -> {params.destination} "
+                            f"({len(flights)} voos)")
+                return flights
+
+        CACHE_REQUESTS.inc(cache='search', result='miss')
+        return None
+
+    def _set_cached(self, params: FlightSearchParams, provider_lists: Dict[str, List[Flight]],
+                    skipped: Optional[List[str]] = None, failed: Optional[Dict[str, str]] = None) -> None:
+        """
+        Armazena resultados não vazios no cache (respostas vazias ficam no cache negativo de cada provedor)
+
+        Um resultado parcial, com provedores que falharam ou não responderam,
+        vale só enquanto a falha fica no cache negativo: depois dela, a
+        próxima busca consulta todos os provedores de novo.
+
+        Args:
+            skipped: Provedores não consultados pela busca escalonada
+            failed: Tipo da falha de cada provedor que falhou (ver ProviderError.kind)
+        """
+        if self.cache is None or not any(provider_lists.values()):
+            return
+
+        ttl = self.cache_ttl
+        if failed:
+            ttl = min([ttl] + [self.negative_ttls.get(kind, 0) for kind in failed.values()])
+            if ttl <= 0:
+                return
+            logger.info(f"Resultado parcial ({', '.join(sorted(failed))} sem resposta) em cache por {ttl}s")
+
+        entry = {
+            'max_results': params.max_results,
+            'max_stops': params.max_stops,
+            'skipped': skipped or [],
+            'providers': {
+                name: {
+                    # Provedores que ignoram o limite de paradas ainda contam como truncados
+                    'truncated': len(flights) >= params.max_results,
+                    'flights': [
+                        flight.to_dict() for flight in flights
+                        if params.max_stops is None or flight.stops <= params.max_stops
+                    ]
+                }
+                for name, flights in provider_lists.items()
+            }
+        }
+
+        try:
+            self.cache.set(self._cache_key(params, params.max_stops), entry, ttl)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar no cache ({self.cache.get_backend_name()}): {str(e)}")
+
+    @profiled
+    def _search_provider(self, provider: IFlightProvider, params: FlightSearchParams,
+                         refresh: bool = False) -> List[Flight]:
+        """
+        Executa a busca em um provedor dentro de um span próprio
+
+        Respostas vazias e falhas recentes do mesmo provedor para a mesma
+        requisição são repetidas a partir do cache negativo, sem nova chamada.
+        """
+        name = provider.get_provider_name()
+        negative = None if refresh else self._get_negative(name, params)
+        if negative is not None:
+            NEGATIVE_CACHE_SUPPRESSED.inc(provider=name, kind=negative['kind'])
+            if negative['kind'] == 'empty':
+                return []
+            raise ProviderError(name, f"{negative['mensagem']} (em cache)", negative['status'])
+
+        with span(f'provider.{name}'):
+            try:
+                flights = provider.search_flights(params)
+            except ProviderError as e:
+                self._set_negative(name, params, e.kind, {'mensagem': str(e), 'status': e.status})
+                raise
+
+        if not flights:
+            self._set_negative(name, params, 'empty', {'mensagem': 'Nenhum voo encontrado', 'status': None})
+        return flights
+
+    def _negative_key(self, provider_name: str, params: FlightSearchParams, max_stops: Optional[int]) -> str:
+        return f"negative:{provider_name}:{params.cache_scope()}:{'any' if max_stops is None else max_stops}"
+
+    def _get_negative(self, provider_name: str, params: FlightSearchParams) -> Optional[Dict]:
+        """
+        Resposta negativa em cache para o provedor e a requisição
+
+        A resposta da mesma busca sem limite de paradas também vale para um
+        limite menor (sem voos, ou a mesma recusa/falha do provedor).
+        """
+        if self.cache is None:
+            return None
+        candidates = [params.max_stops] if params.max_stops is None else [params.max_stops, None]
+        try:
+            for max_stops in candidates:
+                entry = self.cache.get(self._negative_key(provider_name, params, max_stops))
+                if isinstance(entry, dict):
+                    return entry
+        except Exception as e:
+            logger.warning(f"Falha ao consultar cache negativo ({self.cache.get_backend_name()}): {str(e)}")
+        return None
+
+    def _set_negative(self, provider_name: str, params: FlightSearchParams, kind: str, details: Dict) -> None:
+        ttl = self.negative_ttls.get(kind, 0)
+        if self.cache is None or ttl <= 0:
+            return
+        try:
+            self.cache.set(self._negative_key(provider_name, params, params.max_stops), {'kind': kind, **details}, ttl)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar no cache negativo ({self.cache.get_backend_name()}): {str(e)}")
+
     def _remove_duplicates(self, flights: List[Flight]) -> List[Flight]:
         """
         Remove voos duplicados baseados em características chave
@@ -127,8 +773,7 @@ class FlightSearchService:
             Lista com os voos mais rápidos
         """
         flights = self.search_flights(params)
-        flights.sort(key=lambda x: x.duration_minutes)
-        return flights[:limit]
+        return FlightResultSet.from_flights(flights).ranked('duration', limit=limit).flights()
 
     def get_direct_flights(self, params: FlightSearchParams) -> List[Flight]:
         """
@@ -141,6 +786,5 @@ class FlightSearchService:
             Lista com voos diretos
         """
         flights = self.search_flights(params)
-        direct_flights = [f for f in flights if f.stops == 0]
-        return direct_flights
+        return FlightResultSet.from_flights(flights).filter(max_stops=0).flights()
 
@@ -2,8 +2,8 @@
 Interface e modelos de domínio - Define contratos e estruturas de dados (Interface Segregation Principle)
 """
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import List, Optional, Dict
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Dict, Tuple
 from datetime import datetime
 from enum import Enum
 
@@ -16,6 +16,11 @@ class CabinClass(Enum):
     FIRST = "FIRST"
 
 
+# Ordenações aceitas para os resultados (aplicadas localmente, após a agregação);
+# 'best' pondera preço, duração e paradas
+SORT_OPTIONS = ('price', 'duration', 'departure', 'best')
+
+
 @dataclass
 class FlightSearchParams:
     """Parâmetros padronizados para busca de voos"""
@@ -29,6 +34,8 @@ class FlightSearchParams:
     cabin_class: CabinClass = CabinClass.ECONOMY
     currency: str = 'BRL'
     max_results: int = 50
+    max_stops: Optional[int] = None
+    sort_by: str = 'price'
 
     def __post_init__(self):
         """Validação após inicialização"""
@@ -44,6 +51,35 @@ class FlightSearchParams:
         if self.return_date and self.return_date <= self.departure_date:
             raise ValueError("Data de retorno deve ser posterior à data de partida")
 
+        if self.max_results < 1:
+            raise ValueError("max_results deve ser pelo menos 1")
+
+        if self.max_stops is not None and self.max_stops < 0:
+            raise ValueError("Número máximo de paradas não pode ser negativo")
+
+        if self.sort_by not in SORT_OPTIONS:
+            raise ValueError(f"Ordenação inválida. Use: {', '.join(SORT_OPTIONS)}")
+
+    def cache_scope(self) -> str:
+        """
+        Chave determinística da busca no cache, sem os refinamentos locais
+
+        max_results, max_stops e sort_by ficam de fora: buscas que diferem
+        apenas neles podem ser respondidas a partir de um resultado mais amplo.
+        """
+        return ':'.join([
+            'flights',
+            self.origin,
+            self.destination,
+            self.departure_date.strftime('%Y-%m-%d'),
+            self.return_date.strftime('%Y-%m-%d') if self.return_date else '-',
+            str(self.adults),
+            str(self.children),
+            str(self.infants),
+            self.cabin_class.value,
+            self.currency
+        ])
+
 
 @dataclass
 class Airport:
@@ -53,6 +89,57 @@ class Airport:
     city: str
     country: str
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Airport':
+        """Reconstrói a partir do dicionário gerado por Flight.to_dict"""
+        return cls(code=data['code'], name=data['name'], city=data['city'], country=data['country'])
+
+
+@dataclass
+class FlightSegment:
+    """Trecho individual de um itinerário"""
+    carrier: str
+    flight_number: str
+    origin: str
+    destination: str
+    departure_datetime: datetime
+    arrival_datetime: datetime
+    duration_minutes: int = 0
+    aircraft_type: Optional[str] = None
+    operating_carrier: Optional[str] = None
+    is_return: bool = False
+
+    def to_dict(self) -> Dict:
+        """Converte para dicionário"""
+        return {
+            'carrier': self.carrier,
+            'flight_number': self.flight_number,
+            'origin': self.origin,
+            'destination': self.destination,
+            'departure_datetime': self.departure_datetime.isoformat(),
+            'arrival_datetime': self.arrival_datetime.isoformat(),
+            'duration_minutes': self.duration_minutes,
+            'aircraft_type': self.aircraft_type,
+            'operating_carrier': self.operating_carrier,
+            'is_return': self.is_return
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FlightSegment':
+        """Reconstrói a partir do dicionário gerado por to_dict"""
+        return cls(
+            carrier=data['carrier'],
+            flight_number=data['flight_number'],
+            origin=data['origin'],
+            destination=data['destination'],
+            departure_datetime=datetime.fromisoformat(data['departure_datetime']),
+            arrival_datetime=datetime.fromisoformat(data['arrival_datetime']),
+            duration_minutes=data.get('duration_minutes', 0),
+            aircraft_type=data.get('aircraft_type'),
+            operating_carrier=data.get('operating_carrier'),
+            is_return=data.get('is_return', False)
+        )
+
 
 @dataclass
 class Flight:
@@ -71,6 +158,7 @@ class Flight:
     currency: str
 
     airline_logo: Optional[str] = None
+    airline_name: Optional[str] = None
     return_departure_datetime: Optional[datetime] = None
     return_arrival_datetime: Optional[datetime] = None
 
@@ -87,12 +175,15 @@ class Flight:
     flight_number: Optional[str] = None
     aircraft_type: Optional[str] = None
 
+    segments: List[FlightSegment] = field(default_factory=list)
+
     def to_dict(self) -> Dict:
         """Converte para dicionário"""
         return {
             'id': self.id,
             'provider': self.provider,
             'airline': self.airline,
+            'airline_name': self.airline_name,
             'airline_logo': self.airline_logo,
             'origin': {
                 'code': self.origin.code,
@@ -121,16 +212,153 @@ class Flight:
             'baggage_included': self.baggage_included,
             'baggage_weight': self.baggage_weight,
             'flight_number': self.flight_number,
-            'aircraft_type': self.aircraft_type
+            'aircraft_type': self.aircraft_type,
+            'segments': [segment.to_dict() for segment in self.segments]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Flight':
+        """Reconstrói um voo a partir do dicionário gerado por to_dict (ex: vindo do cache)"""
+        return_departure = data.get('return_departure_datetime')
+        return_arrival = data.get('return_arrival_datetime')
+
+        return cls(
+            id=data['id'],
+            provider=data['provider'],
+            airline=data['airline'],
+            airline_name=data.get('airline_name'),
+            airline_logo=data.get('airline_logo'),
+            origin=Airport.from_dict(data['origin']),
+            destination=Airport.from_dict(data['destination']),
+            departure_datetime=datetime.fromisoformat(data['departure_datetime']),
+            arrival_datetime=datetime.fromisoformat(data['arrival_datetime']),
+            return_departure_datetime=datetime.fromisoformat(return_departure) if return_departure else None,
+            return_arrival_datetime=datetime.fromisoformat(return_arrival) if return_arrival else None,
+            price=data['price'],
+            currency=data['currency'],
+            stops=data.get('stops', 0),
+            duration_minutes=data.get('duration_minutes', 0),
+            available_seats=data.get('available_seats', 9),
+            booking_url=data.get('booking_url', ''),
+            cabin_class=data.get('cabin_class', 'ECONOMY'),
+            baggage_included=data.get('baggage_included', False),
+            baggage_weight=data.get('baggage_weight'),
+            flight_number=data.get('flight_number'),
+            aircraft_type=data.get('aircraft_type'),
+            segments=[FlightSegment.from_dict(segment) for segment in data.get('segments', [])]
+        )
+
+
+@dataclass
+class MultiCitySearchParams:
+    """Busca de múltiplos trechos (A→B, B→C, C→A), cada um com sua data"""
+    legs: List[FlightSearchParams]
+    max_results: int = 20           # Itinerários devolvidos
+    sort_by: str = 'price'
+
+    MAX_LEGS = 6
+
+    def __post_init__(self):
+        """Validação após inicialização"""
+        if not 2 <= len(self.legs) <= self.MAX_LEGS:
+            raise ValueError(f"Informe de 2 a {self.MAX_LEGS} trechos")
+
+        if any(leg.return_date for leg in self.legs):
+            raise ValueError("Trechos de uma busca de múltiplos destinos são só de ida")
+
+        if any(later.departure_date < earlier.departure_date for earlier, later in zip(self.legs, self.legs[1:])):
+            raise ValueError("As datas dos trechos devem estar em ordem")
+
+        if len({leg.currency for leg in self.legs}) > 1:
+            raise ValueError("Todos os trechos devem usar a mesma moeda")
+
+        if self.max_results < 1:
+            raise ValueError("max_results deve ser pelo menos 1")
+
+        if self.sort_by not in SORT_OPTIONS:
+            raise ValueError(f"Ordenação inválida. Use: {', '.join(SORT_OPTIONS)}")
+
+
+@dataclass
+class Itinerary:
+    """Itinerário de múltiplos trechos: um voo por trecho, na ordem da viagem"""
+    legs: List[Flight]
+
+    @property
+    def id(self) -> str:
+        return '+'.join(leg.id for leg in self.legs)
+
+    @property
+    def price(self) -> float:
+        return round(sum(leg.price for leg in self.legs), 2)
+
+    @property
+    def currency(self) -> str:
+        return self.legs[0].currency
+
+    @property
+    def stops(self) -> int:
+        return sum(leg.stops for leg in self.legs)
+
+    @property
+    def duration_minutes(self) -> int:
+        """Tempo total em voo (sem a permanência entre os trechos)"""
+        return sum(leg.duration_minutes for leg in self.legs)
+
+    @property
+    def departure_datetime(self) -> datetime:
+        return self.legs[0].departure_datetime
+
+    @property
+    def arrival_datetime(self) -> datetime:
+        return self.legs[-1].arrival_datetime
+
+    def to_dict(self) -> Dict:
+        """Converte para dicionário"""
+        return {
+            'id': self.id,
+            'price': self.price,
+            'currency': self.currency,
+            'stops': self.stops,
+            'duration_minutes': self.duration_minutes,
+            'duration_formatted': f"{self.duration_minutes // 60}h {self.duration_minutes % 60}min",
+            'departure_datetime': self.departure_datetime.isoformat(),
+            'arrival_datetime': self.arrival_datetime.isoformat(),
+            'legs': [leg.to_dict() for leg in self.legs]
         }
 
 
+class ProviderError(Exception):
+    """Falha de um provedor; uma busca sem voos não é erro e retorna lista vazia"""
+
+    # Respostas que dependem só da requisição (ex.: código IATA inválido); repetir não adianta
+    REJECTED_STATUSES = frozenset({400, 404, 422})
+
+    def __init__(self, provider: str, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+
+    @property
+    def kind(self) -> str:
+        """'rejected' para requisições recusadas pelo provedor; 'error' para falhas possivelmente transitórias"""
+        return 'rejected' if self.status in self.REJECTED_STATUSES else 'error'
+
+
 class IFlightProvider(ABC):
     """Interface que todos os provedores de voos devem implementar (Dependency Inversion Principle)"""
 
     @abstractmethod
     def search_flights(self, params: FlightSearchParams) -> List[Flight]:
-        """Busca voos disponíveis"""
+        """
+        Busca voos disponíveis
+
+        Returns:
+            Voos encontrados (lista vazia se não houver voos)
+
+        Raises:
+            ProviderError: Se a chamada ao provedor falhar
+        """
         pass
 
     @abstractmethod
@@ -147,3 +375,43 @@ class IFlightProvider(ABC):
     def get_priority(self) -> int:
         """Retorna a prioridade do provedor (menor número = maior prioridade)"""
         pass
+
+
+class ICacheBackend(ABC):
+    """Interface para backends de cache compartilhado (valores serializáveis em JSON)"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Retorna o valor armazenado ou None se ausente/expirado"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Armazena um valor, opcionalmente com expiração em segundos"""
+        pass
+
+    def set_many(self, items: List[Tuple[str, Any, Optional[int]]]) -> None:
+        """
+        Armazena vários valores (chave, valor, ttl) de uma vez
+
+        Backends com transação ou pipeline gravam o lote em uma única ida ao
+        armazenamento; o padrão grava um a um.
+        """
+        for key, value, ttl in items:
+            self.set(key, value, ttl)
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove uma chave; retorna True se existia"""
+        pass
+
+    @abstractmethod
+    def keys(self, prefix: str = '') -> List[str]:
+        """Lista as chaves válidas que começam com o prefixo"""
+        pass
+
+    @abstractmethod
+    def get_backend_name(self) -> str:
+        """Retorna o nome do backend"""
+        pass
+
@@ -0,0 +1,262 @@
+"""
+Métricas da aplicação - Contadores e histogramas no formato texto do Prometheus (Single Responsibility)
+
+Cada observação custa um lock e uma busca binária nos buckets; a
+renderização do texto só acontece quando /metrics é consultado.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RESULT_COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base comum: nome, descrição, rótulos e lock"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera os rótulos {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """Valor instantâneo, definido diretamente ou lido de uma função no momento da coleta"""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callbacks: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, func: Callable[[], float], **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._callbacks[key] = func
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            callbacks = list(self._callbacks.items())
+        for key, func in callbacks:
+            values[key] = func()
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}" for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    """Histograma com buckets cumulativos no estilo Prometheus"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de rótulos: [contagens por bucket (+Inf no fim), soma, total]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Mede a duração do bloco em segundos"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get_count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+
+        lines = []
+        bounds = self.buckets + (float('inf'),)
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de métricas da aplicação"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets or DEFAULT_LATENCY_BUCKETS))
+
+    def render(self) -> str:
+        """Gera o texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+PROVIDER_HTTP_SECONDS = REGISTRY.histogram(
+    'flight_provider_http_seconds', 'Latência das chamadas HTTP aos provedores', ['provider'])
+PROVIDER_PARSE_SECONDS = REGISTRY.histogram(
+    'flight_provider_parse_seconds', 'Tempo de conversão das respostas dos provedores', ['provider'])
+PROVIDER_RESULTS = REGISTRY.histogram(
+    'flight_provider_results', 'Voos retornados por chamada a cada provedor', ['provider'],
+    buckets=RESULT_COUNT_BUCKETS)
+PROVIDER_ERRORS = REGISTRY.counter(
+    'flight_provider_errors_total', 'Falhas nas chamadas aos provedores', ['provider'])
+SEARCH_STAGE_SECONDS = REGISTRY.histogram(
+    'flight_search_stage_seconds', 'Duração das etapas da busca (validation, dedup, sort, merge, to_dict, repository_write, serialization)',
+    ['stage'])
+CACHE_REQUESTS = REGISTRY.counter(
+    'flight_cache_requests_total', 'Consultas ao cache por resultado (hit/derived/miss)', ['cache', 'result'])
+PARSER_CACHE_HIT_RATIO = REGISTRY.gauge(
+    'flight_parser_cache_hit_ratio', 'Taxa de acerto dos caches de conversão dos parsers', ['cache'])
+COMPRESSION_BYTES = REGISTRY.counter(
+    'flight_http_compression_bytes_total', 'Bytes das respostas antes e depois da compressão', ['encoding', 'stage'])
+WATCH_POLLS = REGISTRY.counter(
+    'flight_watch_polls_total', 'Buscas refeitas pelo monitoramento de preços por resultado (changed/unchanged/failed)',
+    ['result'])
+WATCH_ACTIVE = REGISTRY.gauge(
+    'flight_watch_active', 'Assinaturas e grupos de polling ativos no monitoramento de preços', ['kind'])
+
+EXECUTOR_TASKS = REGISTRY.gauge(
+    'flight_provider_executor_tasks',
+    'Tarefas nos pools limitados (provider-pool, pair-search, leg-search) por estado (running/queued)',
+    ['pool', 'state'])
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    'flight_admission_rejections_total',
+    'Buscas recusadas por falta de capacidade (queue_full/client_limit) por pool (ou client)',
+    ['reason', 'pool'])
+
+TIER_ESCALATIONS = REGISTRY.counter(
+    'flight_search_tier_escalations_total', 'Buscas escalonadas para o próximo nível de provedores por motivo (deadline/error/few_results)',
+    ['reason'])
+PROVIDER_CALLS_SKIPPED = REGISTRY.counter(
+    'flight_provider_calls_skipped_total', 'Chamadas evitadas pela busca escalonada', ['provider'])
+
+NEGATIVE_CACHE_SUPPRESSED = REGISTRY.counter(
+    'flight_provider_negative_cache_total', 'Chamadas evitadas pelo cache negativo por tipo de resposta (empty/rejected/error)',
+    ['provider', 'kind'])
+
+REPOSITORY_WRITES = REGISTRY.counter(
+    'flight_repository_writes_total', 'Escritas do repositório no backend por modo (batched/sync/failed)', ['mode'])
+REPOSITORY_PENDING_WRITES = REGISTRY.gauge(
+    'flight_repository_pending_writes', 'Escritas do repositório aguardando o gravador em segundo plano')
+REPOSITORY_OFFERS = REGISTRY.counter(
+    'flight_repository_offers_total', 'Ofertas dos resultados salvos por situação (new: gravada; reused: já armazenada)',
+    ['result'])
+
+
+def lru_hit_ratio(cached_function: Callable) -> float:
+    """Taxa de acerto de uma função decorada com functools.lru_cache"""
+    info = cached_function.cache_info()
+    total = info.hits + info.misses
+    return info.hits / total if total else 0.0
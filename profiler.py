@@ -0,0 +1,187 @@
+"""
+Profiler por amostragem - Coleta pilhas de uma fração das buscas em produção (Single Responsibility)
+
+Desligado, o decorator @profiled custa apenas a leitura de um atributo.
+Ligado, uma fração das execuções é sorteada; as threads dessas execuções
+(inclusive as dos provedores, que herdam o contexto) são amostradas por
+uma thread de fundo via sys._current_frames(). As pilhas são agregadas
+por segundo e exportadas no formato "collapsed" usado por flamegraph.pl
+e speedscope.
+"""
+import functools
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_sampled: ContextVar[bool] = ContextVar('profiler_sampled', default=False)
+
+
+class SamplingProfiler:
+    """Profiler estatístico restrito às threads das execuções sorteadas"""
+
+    def __init__(self, sample_rate: float = 0.1, interval: float = 0.01, retention_seconds: int = 900,
+                 max_depth: int = 64):
+        """
+        Args:
+            sample_rate: Fração das execuções que serão amostradas (0 a 1)
+            interval: Intervalo entre amostras, em segundos
+            retention_seconds: Janela máxima de pilhas mantida em memória
+            max_depth: Profundidade máxima de cada pilha
+        """
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.retention_seconds = retention_seconds
+        self.max_depth = max_depth
+        self.total_samples = 0
+
+        self._active_threads: Dict[int, int] = {}
+        self._buckets: Deque[Tuple[int, Counter]] = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, sample_rate: Optional[float] = None) -> None:
+        """Liga o profiler e a thread de amostragem"""
+        with self._lock:
+            if sample_rate is not None:
+                self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+            if self.enabled:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self.enabled = True
+            self._thread.start()
+        logger.info(f"Profiler ligado (amostragem de {self.sample_rate:.0%} das execuções)")
+
+    def stop(self) -> None:
+        """Desliga o profiler; as pilhas já coletadas continuam disponíveis"""
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            self._stop.set()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        logger.info("Profiler desligado")
+
+    def profiled(self, func: Callable) -> Callable:
+        """Decorator que amostra uma fração das execuções de `func`"""
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+
+            inherited = _sampled.get()
+            if not inherited and random.random() >= self.sample_rate:
+                return func(*args, **kwargs)
+
+            token = _sampled.set(True)
+            self._track(1)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._track(-1)
+                _sampled.reset(token)
+
+        return wrapper
+
+    def _track(self, delta: int) -> None:
+        """Registra (ou libera) a thread atual para amostragem; aninhamentos são contados"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            depth = self._active_threads.get(thread_id, 0) + delta
+            if depth > 0:
+                self._active_threads[thread_id] = depth
+            else:
+                self._active_threads.pop(thread_id, None)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                thread_ids = list(self._active_threads)
+            if not thread_ids:
+                continue
+
+            frames = sys._current_frames()
+            stacks = [self._collapse(frames[thread_id]) for thread_id in thread_ids if thread_id in frames]
+            if stacks:
+                self._record(stacks)
+
+    def _collapse(self, frame) -> str:
+        """Converte um frame em pilha 'raiz;...;folha'"""
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            module = code.co_filename.rsplit('/', 1)[-1]
+            names.append(f"{code.co_name} ({module}:{frame.f_lineno})")
+            frame = frame.f_back
+        names.reverse()
+        return ';'.join(names)
+
+    def _record(self, stacks) -> None:
+        second = int(time.time())
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != second:
+                self._buckets.append((second, Counter()))
+                limit = second - self.retention_seconds
+                while self._buckets and self._buckets[0][0] < limit:
+                    self._buckets.popleft()
+            bucket = self._buckets[-1][1]
+            for stack in stacks:
+                bucket[stack] += 1
+            self.total_samples += len(stacks)
+
+    def collapsed(self, seconds: int = 60) -> str:
+        """
+        Pilhas agregadas da janela pedida, no formato collapsed
+
+        Args:
+            seconds: Tamanho da janela (a partir de agora, para trás)
+
+        Returns:
+            Uma linha por pilha: "frame;frame;frame contagem"
+        """
+        since = int(time.time()) - seconds
+        merged = Counter()
+        with self._lock:
+            for second, bucket in self._buckets:
+                if second >= since:
+                    merged.update(bucket)
+        return ''.join(f"{stack} {count}\n" for stack, count in merged.most_common())
+
+    def status(self) -> dict:
+        with self._lock:
+            active = len(self._active_threads)
+            window = (self._buckets[-1][0] - self._buckets[0][0] + 1) if self._buckets else 0
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'interval_ms': self.interval * 1000,
+            'retention_seconds': self.retention_seconds,
+            'active_threads': active,
+            'total_samples': self.total_samples,
+            'window_seconds': window
+        }
+
+
+profiler = SamplingProfiler(
+    sample_rate=Config.PROFILER_SAMPLE_RATE,
+    interval=Config.PROFILER_INTERVAL_MS / 1000,
+    retention_seconds=Config.PROFILER_RETENTION_SECONDS
+)
+profiled = profiler.profiled
+
+if Config.PROFILER_ENABLED:
+    profiler.start()
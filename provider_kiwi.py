@@ -3,10 +3,13 @@ Provedor Kiwi.com - Implementação concreta usando API real (Open/Closed Princi
 """
 import requests
 import logging
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from interfaces import IFlightProvider, FlightSearchParams, Flight, Airport
+from interfaces import IFlightProvider, FlightSearchParams, Flight, ProviderError, Airport
 from config import Config
+from metrics import PROVIDER_HTTP_SECONDS, PROVIDER_PARSE_SECONDS, PROVIDER_RESULTS, PROVIDER_ERRORS
+from tracing import span
+from airports import AirportDirectory
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +17,19 @@ logger = logging.getLogger(__name__)
 class KiwiFlightProvider(IFlightProvider):
     """Provedor de voos usando API Kiwi.com (Tequila API) - API gratuita com dados reais"""
 
-    def __init__(self):
+    def __init__(self, airports: Optional[AirportDirectory] = None,
+                 session: Optional[requests.Session] = None):
+        """
+        Args:
+            airports: Base local usada para preencher nome, cidade e país dos aeroportos
+            session: Sessão HTTP (padrão: uma própria, que reaproveita conexões); permite
+                     gravar e reproduzir as respostas (ver recording.py)
+        """
         self.api_key = Config.KIWI_API_KEY
         self.base_url = Config.KIWI_BASE_URL
         self.timeout = Config.REQUEST_TIMEOUT
+        self.session = session or requests.Session()
+        self.airports = airports
 
     def search_flights(self, params: FlightSearchParams) -> List[Flight]:
         """Busca voos reais na API Kiwi.com"""
@@ -42,32 +54,53 @@ class KiwiFlightProvider(IFlightProvider):
                 'flight_type': 'round' if params.return_date else 'oneway'
             }
 
+            if params.max_stops is not None:
+                query_params['max_stopovers'] = params.max_stops
+
             if params.return_date:
                 query_params['return_from'] = params.return_date.strftime('%d/%m/%Y')
                 query_params['return_to'] = params.return_date.strftime('%d/%m/%Y')
 
             logger.info(f"Buscando voos Kiwi: {params.origin} -> {params.destination}")
 
-            response = requests.get(
-                f'{self.base_url}/v2/search',
-                headers=headers,
-                params=query_params,
-                timeout=self.timeout
-            )
+            with span(f'{self.get_provider_name()}.http', PROVIDER_HTTP_SECONDS, provider=self.get_provider_name()):
+                response = self.session.get(
+                    f'{self.base_url}/v2/search',
+                    headers=headers,
+                    params=query_params,
+                    timeout=self.timeout
+                )
             response.raise_for_status()
 
-            data = response.json()
-            flights = self._parse_flights(data, params)
+            with span(f'{self.get_provider_name()}.parse', PROVIDER_PARSE_SECONDS, provider=self.get_provider_name()):
+                data = response.json()
+                flights = self._parse_flights(data, params)
+            PROVIDER_RESULTS.observe(len(flights), provider=self.get_provider_name())
 
             logger.info(f"Kiwi: {len(flights)} voos encontrados")
             return flights
 
         except requests.exceptions.RequestException as e:
+            PROVIDER_ERRORS.inc(provider=self.get_provider_name())
             logger.error(f"Erro na requisição Kiwi: {str(e)}")
-            return []
+            status = e.response.status_code if e.response is not None else None
+            raise ProviderError(self.get_provider_name(), f"Erro na requisição Kiwi: {str(e)}", status) from e
         except Exception as e:
+            PROVIDER_ERRORS.inc(provider=self.get_provider_name())
             logger.error(f"Erro ao processar resposta Kiwi: {str(e)}")
-            return []
+            raise ProviderError(self.get_provider_name(), f"Erro ao processar resposta Kiwi: {str(e)}") from e
+
+    def _get_airport(self, code: str, city: Optional[str], country: Optional[dict]) -> Airport:
+        """Aeroporto da base local; fora dela, com a cidade e o país informados pela Kiwi"""
+        airport = self.airports.to_airport(code) if self.airports else None
+        if airport is not None:
+            return airport
+        return Airport(
+            code=code,
+            name=city or code,
+            city=city or '',
+            country=country.get('name', '') if isinstance(country, dict) else ''
+        )
 
     def _parse_flights(self, data: dict, params: FlightSearchParams) -> List[Flight]:
         """Converte resposta da API para modelo padronizado"""
@@ -79,21 +112,9 @@ class KiwiFlightProvider(IFlightProvider):
                 if not route:
                     continue
 
-                # Informações do aeroporto de origem
-                origin = Airport(
-                    code=route['flyFrom'],
-                    name=route.get('cityFrom', route['flyFrom']),
-                    city=route.get('cityFrom', ''),
-                    country=route.get('countryFrom', {}).get('name', '') if isinstance(route.get('countryFrom'), dict) else ''
-                )
-
-                # Informações do aeroporto de destino
-                destination = Airport(
-                    code=route['flyTo'],
-                    name=route.get('cityTo', route['flyTo']),
-                    city=route.get('cityTo', ''),
-                    country=route.get('countryTo', {}).get('name', '') if isinstance(route.get('countryTo'), dict) else ''
-                )
+                # Informações dos aeroportos de origem e destino
+                origin = self._get_airport(route['flyFrom'], route.get('cityFrom'), route.get('countryFrom'))
+                destination = self._get_airport(route['flyTo'], route.get('cityTo'), route.get('countryTo'))
 
                 # Datas e horários
                 departure_dt = datetime.fromtimestamp(route['dTime'])
@@ -0,0 +1,266 @@
+"""
+Gravação e reprodução de provedores - Respostas reais como fixtures comprimidas (Decorator Pattern)
+
+Em modo 'record', cada requisição HTTP feita por um provedor (parâmetros e
+resposta bruta, com o tempo que levou) é gravada em um arquivo .json.gz do
+FixtureStore. Em modo 'replay', as mesmas requisições são respondidas a
+partir das gravações, sem rede e sem credenciais reais, opcionalmente com a
+latência gravada; o parser do provedor continua sendo exercitado com os
+payloads reais, o que torna benchmarks e testes de carga reprodutíveis.
+
+A gravação acontece na sessão HTTP injetada no provedor. Provedores sem
+atributo `session` são gravados no nível do resultado (voos ou erro).
+Credenciais nunca são gravadas: parâmetros secretos ficam fora da chave e
+tokens de acesso são substituídos nas respostas.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from http import HTTPStatus
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from interfaces import IFlightProvider, FlightSearchParams, Flight, ProviderError
+
+logger = logging.getLogger(__name__)
+
+MODES = ('record', 'replay')
+
+# Campos omitidos da chave e das gravações (credenciais enviadas ou recebidas)
+SECRET_FIELDS = frozenset({'apikey', 'api_key', 'client_id', 'client_secret', 'access_token', 'refresh_token'})
+REDACTED = 'replay-redacted'
+
+
+class FixtureStore:
+    """Diretório de gravações, um arquivo gzip por requisição, com as lidas mantidas em memória"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._loaded: Dict[str, Optional[dict]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(*parts) -> str:
+        """Chave determinística de uma requisição (ordem dos parâmetros não importa)"""
+        encoded = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:32]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json.gz')
+
+    def load(self, key: str) -> Optional[dict]:
+        """Gravação da requisição ou None; cada arquivo é lido e descomprimido uma única vez"""
+        if key in self._loaded:
+            return self._loaded[key]
+        try:
+            with gzip.open(self._path(key), 'rt', encoding='utf-8') as handle:
+                entry = json.load(handle)
+        except FileNotFoundError:
+            entry = None
+        with self._lock:
+            self._loaded[key] = entry
+        return entry
+
+    def save(self, key: str, entry: dict) -> None:
+        """Grava (ou regrava) a requisição; o arquivo só aparece completo (rename atômico)"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with gzip.open(temporary, 'wt', encoding='utf-8') as handle:
+            json.dump(entry, handle, ensure_ascii=False)
+        os.replace(temporary, path)
+        with self._lock:
+            self._loaded[key] = entry
+
+    def __len__(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(1 for name in os.listdir(self.directory) if name.endswith('.json.gz'))
+
+
+def _public(values: Optional[dict]) -> Dict:
+    """Parâmetros sem credenciais"""
+    return {name: value for name, value in (values or {}).items() if name.lower() not in SECRET_FIELDS}
+
+
+def _redact(body: str) -> str:
+    """Substitui tokens e segredos de uma resposta JSON (respostas que não são JSON ficam como estão)"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(data, dict) and SECRET_FIELDS.intersection(data):
+        data = {name: REDACTED if name in SECRET_FIELDS else value for name, value in data.items()}
+        return json.dumps(data)
+    return body
+
+
+class _FixtureSession(ABC):
+    """Base das sessões de gravação e reprodução: mesma interface get/post de requests.Session"""
+
+    def __init__(self, store: FixtureStore, provider_name: str):
+        self.store = store
+        self.provider_name = provider_name
+
+    def _key(self, method: str, url: str, params: Optional[dict], data: Optional[dict]) -> str:
+        # Só o caminho entra na chave: as gravações valem para qualquer base_url (ex.: servidor simulado)
+        return self.store.key_for(self.provider_name, method, urlsplit(url).path, _public(params), _public(data))
+
+    def get(self, url: str, params: Optional[dict] = None, **kwargs) -> requests.Response:
+        return self.request('GET', url, params=params, **kwargs)
+
+    def post(self, url: str, data: Optional[dict] = None, **kwargs) -> requests.Response:
+        return self.request('POST', url, data=data, **kwargs)
+
+    @abstractmethod
+    def request(self, method: str, url: str, params: Optional[dict] = None, data: Optional[dict] = None,
+                **kwargs) -> requests.Response:
+        """Resolve a requisição (gravando ou reproduzindo) e devolve a resposta"""
+
+
+class RecordingSession(_FixtureSession):
+    """Faz a requisição real e grava parâmetros, status, corpo e tempo de resposta"""
+
+    def __init__(self, store: FixtureStore, provider_name: str, session: Optional[requests.Session] = None):
+        super().__init__(store, provider_name)
+        self.session = session or requests.Session()
+
+    def request(self, method: str, url: str, params: Optional[dict] = None, data: Optional[dict] = None,
+                **kwargs) -> requests.Response:
+        started = time.perf_counter()
+        response = self.session.request(method, url, params=params, data=data, **kwargs)
+        elapsed = time.perf_counter() - started
+
+        self.store.save(self._key(method, url, params, data), {
+            'request': {'method': method, 'path': urlsplit(url).path, 'params': _public(params)},
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', 'application/json'),
+            'body': _redact(response.text),
+            'elapsed': round(elapsed, 4),
+            'recorded_at': datetime.now().isoformat()
+        })
+        return response
+
+
+class ReplaySession(_FixtureSession):
+    """Responde a partir das gravações; requisições não gravadas falham como erro de conexão"""
+
+    def __init__(self, store: FixtureStore, provider_name: str, latency_scale: float = 0):
+        """
+        Args:
+            latency_scale: Fração da latência gravada simulada antes de responder (0 responde na hora)
+        """
+        super().__init__(store, provider_name)
+        self.latency_scale = latency_scale
+
+    def request(self, method: str, url: str, params: Optional[dict] = None, data: Optional[dict] = None,
+                **kwargs) -> requests.Response:
+        entry = self.store.load(self._key(method, url, params, data))
+        if entry is None:
+            raise requests.exceptions.ConnectionError(
+                f"Sem gravação de {self.provider_name} para {method} {urlsplit(url).path} {_public(params)}"
+            )
+
+        if self.latency_scale > 0:
+            time.sleep(entry['elapsed'] * self.latency_scale)
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        try:
+            response.reason = HTTPStatus(entry['status']).phrase
+        except ValueError:
+            response.reason = ''
+        response.headers['Content-Type'] = entry['content_type']
+        response._content = entry['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = url
+        return response
+
+
+class RecordReplayProvider(IFlightProvider):
+    """
+    Envolve um provedor para gravar suas respostas ou reproduzi-las
+
+    Em replay, credenciais ausentes recebem valores fictícios (como em
+    benchmarks.fake_providers.point_providers_to): nenhuma requisição sai
+    da máquina.
+    """
+
+    def __init__(self, provider: IFlightProvider, store: FixtureStore, mode: str, latency_scale: float = 0):
+        """
+        Args:
+            provider: Provedor envolvido
+            store: Onde as gravações são lidas e escritas
+            mode: 'record' ou 'replay'
+            latency_scale: Em replay, fração da latência gravada que é simulada
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo de gravação inválido. Use: {', '.join(MODES)}")
+        self.provider = provider
+        self.store = store
+        self.mode = mode
+        self.latency_scale = latency_scale
+        name = provider.get_provider_name()
+
+        # Provedores com sessão HTTP injetável são gravados no nível das respostas brutas
+        self.records_http = hasattr(provider, 'session')
+        if self.records_http:
+            if mode == 'record':
+                provider.session = RecordingSession(store, name, provider.session)
+            else:
+                provider.session = ReplaySession(store, name, latency_scale)
+                for credential in ('api_key', 'api_secret'):
+                    if hasattr(provider, credential) and not getattr(provider, credential):
+                        setattr(provider, credential, REDACTED)
+        logger.info(f"{name}: modo {mode} em {store.directory} "
+                    f"({'respostas HTTP' if self.records_http else 'resultados'})")
+
+    def search_flights(self, params: FlightSearchParams) -> List[Flight]:
+        if self.records_http:
+            return self.provider.search_flights(params)
+        return self._search_results(params)
+
+    def _search_results(self, params: FlightSearchParams) -> List[Flight]:
+        """Gravação no nível do resultado, para provedores sem sessão HTTP"""
+        key = self.store.key_for(self.get_provider_name(), 'search', params.cache_scope(),
+                                 params.max_results, params.max_stops)
+        if self.mode == 'replay':
+            entry = self.store.load(key)
+            if entry is None:
+                raise ProviderError(self.get_provider_name(), f"Sem gravação para {params.cache_scope()}")
+            if self.latency_scale > 0:
+                time.sleep(entry['elapsed'] * self.latency_scale)
+            if 'error' in entry:
+                raise ProviderError(self.get_provider_name(), entry['error'], entry.get('status'))
+            return [Flight.from_dict(flight) for flight in entry['flights']]
+
+        started = time.perf_counter()
+        entry = {'request': {'scope': params.cache_scope()}, 'recorded_at': datetime.now().isoformat()}
+        try:
+            flights = self.provider.search_flights(params)
+            entry['flights'] = [flight.to_dict() for flight in flights]
+            return flights
+        except ProviderError as e:
+            entry.update(error=str(e), status=e.status)
+            raise
+        finally:
+            entry['elapsed'] = round(time.perf_counter() - started, 4)
+            if 'flights' in entry or 'error' in entry:
+                self.store.save(key, entry)
+
+    def get_provider_name(self) -> str:
+        return self.provider.get_provider_name()
+
+    def is_available(self) -> bool:
+        return self.mode == 'replay' or self.provider.is_available()
+
+    def get_priority(self) -> int:
+        return self.provider.get_priority()
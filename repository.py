@@ -1,23 +1,216 @@
 """
 Repositório de buscas - Gerencia persistência de dados (Repository Pattern)
 Segue o princípio Single Responsibility: apenas gerencia dados de buscas
+
+Resultados são gravados por conteúdo: cada oferta distinta (hash dos campos
+que não mudam entre buscas) é armazenada uma vez, e a busca guarda apenas as
+referências e, em colunas, os campos voláteis (id, preço, assentos e link de
+reserva). Buscas repetidas da mesma rota reaproveitam quase todas as ofertas;
+a leitura reconstrói os voos a partir de um LRU quente de ofertas. No backend,
+ofertas valem o dobro da retenção e são regravadas quando referenciadas após
+uma retenção inteira: nunca expiram antes das buscas que as usam. Sem backend,
+cada oferta é liberada quando a última busca que a referencia é removida.
+
+Com backend, a memória local guarda só as buscas mais recentes deste
+processo (LRU limitado, com a mesma retenção do backend). Com write-behind,
+as escritas no backend saem do caminho da requisição: ficam numa fila de
+pendências gravada em lotes, uma transação por lote, por uma thread própria,
+e as leituras de buscas ainda não gravadas são atendidas pela fila.
 """
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from itertools import islice
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+import threading
+import time
 import uuid
+import atexit
 import logging
+from interfaces import ICacheBackend
+from cache_backends import InMemoryLRUCache
+from metrics import REPOSITORY_WRITES, REPOSITORY_PENDING_WRITES, REPOSITORY_OFFERS
 
 logger = logging.getLogger(__name__)
 
 
+class WriteBehindQueue:
+    """
+    Escritas pendentes no backend, gravadas em lotes por uma thread própria
+
+    Uma chave reescrita antes de ser gravada (ex.: save_search seguido de
+    save_timing) ocupa uma única posição e é gravada uma vez, com o valor
+    mais recente. Com a fila cheia ou já encerrada, a escrita é feita na
+    hora, no backend, por quem a pediu.
+    """
+
+    def __init__(self, backend: ICacheBackend, max_pending: int = 1000, batch_size: int = 100,
+                 flush_interval: float = 0.05, max_retry_delay: float = 5.0):
+        """
+        Args:
+            backend: Destino das escritas
+            max_pending: Chaves pendentes no máximo
+            batch_size: Chaves por transação
+            flush_interval: Espera após a primeira pendência, para juntar as próximas no mesmo lote
+            max_retry_delay: Maior intervalo entre tentativas quando o backend falha
+        """
+        self.backend = backend
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retry_delay = max_retry_delay
+        self._pending: "OrderedDict[str, Tuple[Any, Optional[int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._failures = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='repository-writer', daemon=True)
+        self._thread.start()
+        REPOSITORY_PENDING_WRITES.set_function(lambda: len(self._pending))
+
+    def put(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        with self._wakeup:
+            queued = not self._closed and (key in self._pending or len(self._pending) < self.max_pending)
+            if queued:
+                self._pending[key] = (value, ttl)
+                self._wakeup.notify()
+        if not queued:
+            self.backend.set(key, value, ttl)
+            REPOSITORY_WRITES.inc(mode='sync')
+
+    def get(self, key: str) -> Optional[Any]:
+        """Valor ainda não gravado da chave (None se não houver pendência)"""
+        with self._lock:
+            entry = self._pending.get(key)
+        return entry[0] if entry is not None else None
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def flush(self) -> bool:
+        """
+        Grava todas as pendências, em lotes de batch_size
+
+        Returns:
+            False se o backend falhou (as pendências restantes continuam na fila)
+        """
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = list(islice(self._pending.items(), self.batch_size))
+                if not batch:
+                    return True
+                try:
+                    self.backend.set_many([(key, value, ttl) for key, (value, ttl) in batch])
+                except Exception as e:
+                    REPOSITORY_WRITES.inc(len(batch), mode='failed')
+                    logger.error(f"Erro ao gravar lote do repositório ({len(batch)} chaves): {str(e)}")
+                    return False
+                REPOSITORY_WRITES.inc(len(batch), mode='batched')
+                with self._lock:
+                    # Uma chave reescrita durante a gravação continua pendente com o valor novo
+                    for key, entry in batch:
+                        if self._pending.get(key) is entry:
+                            del self._pending[key]
+
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+            time.sleep(self.flush_interval)
+            if self.flush():
+                self._failures = 0
+            else:
+                self._failures += 1
+                time.sleep(min(self.flush_interval * 2 ** self._failures, self.max_retry_delay))
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Encerra o gravador e grava o que estiver pendente (escritas seguintes são síncronas)"""
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join(timeout)
+        if not self.flush():
+            logger.error(f"{len(self._pending)} escritas do repositório não foram gravadas no encerramento")
+
+
 class SearchRepository:
     """Repositório para gerenciar buscas e resultados"""
 
-    def __init__(self):
-        """Inicializa o repositório com armazenamento em memória"""
+    SEARCH_PREFIX = 'repo:search:'
+    RESULTS_PREFIX = 'repo:results:'
+    OFFER_PREFIX = 'repo:offer:'
+
+    # Campos que mudam entre buscas da mesma oferta: guardados por busca, fora do conteúdo endereçado
+    VOLATILE_FIELDS = ('id', 'price', 'available_seats', 'booking_url')
+
+    def __init__(self, backend: Optional[ICacheBackend] = None, retention_seconds: Optional[int] = None,
+                 write_behind: bool = False, max_pending: int = 1000, batch_size: int = 100,
+                 flush_interval: float = 0.05, hot_offers: int = 20000, recent_searches: int = 1000):
+        """
+        Inicializa o repositório com armazenamento em memória
+
+        Args:
+            backend: Backend compartilhado (SQLite/Redis) para que um search_id criado
+                em um worker seja encontrado pelos demais (opcional)
+            retention_seconds: Validade das buscas no backend (None = sem expiração)
+            write_behind: Grava no backend em segundo plano, em lotes (ver WriteBehindQueue);
+                outros workers enxergam a busca após até flush_interval
+            max_pending, batch_size, flush_interval: Limites da fila de write-behind
+            hot_offers: Ofertas mantidas em memória (com backend) para reconstruir resultados
+            recent_searches: Buscas e resultados deste processo mantidos em memória (com backend)
+        """
+        # Sem backend, buscas e resultados ficam só aqui; com backend, em um LRU limitado
         self.searches: Dict[str, dict] = {}
-        self.results: Dict[str, List[dict]] = {}
-        logger.info("SearchRepository inicializado")
+        self.results: Dict[str, dict] = {}
+        self.recent = InMemoryLRUCache(2 * recent_searches)
+        # Sem backend, as ofertas ficam só aqui (com o número de referências);
+        # com backend, o LRU guarda (oferta, momento da gravação)
+        self.offers: Dict[str, dict] = {}
+        self.offer_refs: Dict[str, int] = {}
+        self.hot_offers = InMemoryLRUCache(hot_offers)
+        self.backend = backend
+        self.retention_seconds = retention_seconds
+        self.writer = None
+        if backend is not None and write_behind:
+            self.writer = WriteBehindQueue(backend, max_pending, batch_size, flush_interval)
+        backend_name = backend.get_backend_name() if backend else 'memória local'
+        logger.info(f"SearchRepository inicializado ({backend_name}{', write-behind' if self.writer else ''})")
+
+    @property
+    def offer_ttl(self) -> Optional[int]:
+        """Validade das ofertas no backend: o dobro da retenção das buscas"""
+        return 2 * self.retention_seconds if self.retention_seconds else None
+
+    def _store(self, key: str, value: Any, ttl: Optional[int]) -> None:
+        """Escreve no backend, direto ou pela fila de write-behind"""
+        if not key.startswith(self.OFFER_PREFIX):
+            self.recent.set(key, value, ttl)
+        if self.writer is not None:
+            self.writer.put(key, value, ttl)
+        else:
+            self.backend.set(key, value, ttl)
+
+    def flush(self) -> None:
+        """Grava as escritas pendentes do write-behind"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self) -> None:
+        """Encerra o gravador em segundo plano, gravando as pendências"""
+        if self.writer is not None:
+            self.writer.close()
+
+    def register_exit_flush(self) -> None:
+        """Grava as escritas pendentes quando o processo termina"""
+        if self.writer is not None:
+            atexit.register(self.close)
 
     def save_search(self, search_data: dict) -> str:
         """
@@ -31,27 +224,149 @@ class SearchRepository:
         """
         search_id = str(uuid.uuid4())
 
-        self.searches[search_id] = {
+        search = {
             'id': search_id,
             'data': search_data,
             'timestamp': datetime.now().isoformat(),
             'status': 'completed'
         }
 
+        if self.backend is None:
+            self.searches[search_id] = search
+        else:
+            self._store(self.SEARCH_PREFIX + search_id, search, self.retention_seconds)
+
         logger.info(f"Busca salva com ID: {search_id}")
         return search_id
 
+    @classmethod
+    def offer_key(cls, flight: dict) -> str:
+        """Endereço da oferta: hash dos campos não voláteis, independente da ordem das chaves"""
+        stable = {name: value for name, value in flight.items() if name not in cls.VOLATILE_FIELDS}
+        encoded = json.dumps(stable, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.blake2b(encoded.encode('utf-8'), digest_size=12).hexdigest()
+
+    def _put_offer(self, key: str, flight: dict) -> None:
+        """Armazena a oferta referenciada por uma nova busca, garantindo que viva pelo menos tanto quanto ela"""
+        if self.backend is None:
+            if key not in self.offers:
+                self.offers[key] = {name: value for name, value in flight.items() if name not in self.VOLATILE_FIELDS}
+                REPOSITORY_OFFERS.inc(result='new')
+            else:
+                REPOSITORY_OFFERS.inc(result='reused')
+            self.offer_refs[key] = self.offer_refs.get(key, 0) + 1
+            return
+
+        now = time.time()
+        cached = self.hot_offers.get(key)
+        # Gravada há menos de uma retenção, a oferta (válida por duas) ainda dura mais que a nova busca
+        if cached is not None and cached[1] is not None and (
+                self.retention_seconds is None or now - cached[1] < self.retention_seconds):
+            REPOSITORY_OFFERS.inc(result='reused')
+            return
+
+        offer = cached[0] if cached is not None else {
+            name: value for name, value in flight.items() if name not in self.VOLATILE_FIELDS
+        }
+        self._store(self.OFFER_PREFIX + key, offer, self.offer_ttl)
+        self.hot_offers.set(key, (offer, now))
+        REPOSITORY_OFFERS.inc(result='new')
+
+    def _get_offer(self, key: str) -> Optional[dict]:
+        if self.backend is None:
+            return self.offers.get(key)
+
+        cached = self.hot_offers.get(key)
+        if cached is not None:
+            return cached[0]
+        offer = self.writer.get(self.OFFER_PREFIX + key) if self.writer is not None else None
+        if offer is None:
+            offer = self.backend.get(self.OFFER_PREFIX + key)
+        if offer is not None:
+            # Lida do backend: a idade da gravação é desconhecida, então a próxima busca a regrava
+            self.hot_offers.set(key, (offer, None))
+        return offer
+
+    def _compact(self, results: List[dict]) -> dict:
+        """Referências às ofertas e colunas com os campos voláteis de cada voo"""
+        refs = []
+        volatile = {name: [] for name in self.VOLATILE_FIELDS}
+        for flight in results:
+            key = self.offer_key(flight)
+            self._put_offer(key, flight)
+            refs.append(key)
+            for name, column in volatile.items():
+                column.append(flight.get(name))
+        return {'offers': refs, **volatile}
+
+    def _expand(self, record) -> List[dict]:
+        """Reconstrói os voos de uma busca (listas completas, do formato anterior, passam direto)"""
+        if isinstance(record, list):
+            return record
+
+        results = []
+        columns = [(name, record[name]) for name in self.VOLATILE_FIELDS]
+        for position, key in enumerate(record['offers']):
+            offer = self._get_offer(key)
+            if offer is None:
+                logger.warning(f"Oferta {key} não encontrada (expirada?); voo omitido")
+                continue
+            flight = dict(offer)
+            for name, column in columns:
+                flight[name] = column[position]
+            results.append(flight)
+        return results
+
+    def _release_offers(self, record) -> None:
+        """Sem backend, descarta as ofertas que nenhuma outra busca referencia"""
+        if self.backend is not None or not isinstance(record, dict):
+            return
+        for key in record['offers']:
+            refs = self.offer_refs.get(key, 0) - 1
+            if refs > 0:
+                self.offer_refs[key] = refs
+            else:
+                self.offer_refs.pop(key, None)
+                self.offers.pop(key, None)
+
+    @staticmethod
+    def _count(record) -> int:
+        if not record:
+            return 0
+        return len(record) if isinstance(record, list) else len(record['offers'])
+
     def save_results(self, search_id: str, results: List[dict]) -> None:
         """
         Salva os resultados de uma busca
 
         Args:
             search_id: ID da busca
-            results: Lista de resultados
+            results: Lista de resultados (dicionários de Flight.to_dict)
         """
-        self.results[search_id] = results
+        record = self._compact(results)
+
+        if self.backend is None:
+            self._release_offers(self.results.get(search_id))
+            self.results[search_id] = record
+        else:
+            self._store(self.RESULTS_PREFIX + search_id, record, self.retention_seconds)
+
         logger.info(f"Resultados salvos para busca {search_id}: {len(results)} voos")
 
+    def save_timing(self, search_id: str, timing: dict) -> None:
+        """
+        Anexa o detalhamento de tempo por etapa a uma busca
+
+        Args:
+            search_id: ID da busca
+            timing: Breakdown gerado pelo trace da requisição
+        """
+        search = self.get_search(search_id)
+        if search is not None:
+            search['timing'] = timing
+            if self.backend is not None:
+                self._store(self.SEARCH_PREFIX + search_id, search, self.retention_seconds)
+
     def get_search(self, search_id: str) -> Optional[dict]:
         """
         Recupera uma busca pelo ID
@@ -62,7 +377,9 @@ class SearchRepository:
         Returns:
             Dados da busca ou None se não encontrada
         """
-        return self.searches.get(search_id)
+        if self.backend is None:
+            return self.searches.get(search_id)
+        return self._load(self.SEARCH_PREFIX + search_id)
 
     def get_results(self, search_id: str) -> Optional[List[dict]]:
         """
@@ -74,7 +391,20 @@ class SearchRepository:
         Returns:
             Lista de resultados ou None se não encontrada
         """
-        return self.results.get(search_id)
+        if self.backend is None:
+            record = self.results.get(search_id)
+        else:
+            record = self._load(self.RESULTS_PREFIX + search_id)
+        return self._expand(record) if record is not None else None
+
+    def _load(self, key: str) -> Optional[Any]:
+        """Lê do LRU local, das escritas ainda pendentes ou do backend, nessa ordem"""
+        value = self.recent.get(key)
+        if value is None and self.writer is not None:
+            value = self.writer.get(key)
+        if value is None:
+            value = self.backend.get(key)
+        return value
 
     def list_all_searches(self) -> List[dict]:
         """
@@ -83,7 +413,13 @@ class SearchRepository:
         Returns:
             Lista com todas as buscas
         """
-        return list(self.searches.values())
+        if self.backend is None:
+            return list(self.searches.values())
+
+        # As buscas vêm do backend: as pendências deste processo entram antes
+        self.flush()
+        searches = (self._load(key) for key in self.backend.keys(self.SEARCH_PREFIX))
+        return [search for search in searches if search is not None]
 
     def get_search_stats(self) -> dict:
         """
@@ -92,8 +428,16 @@ class SearchRepository:
         Returns:
             Dicionário com estatísticas
         """
-        total_searches = len(self.searches)
-        total_results = sum(len(results) for results in self.results.values())
+        if self.backend is None:
+            total_searches = len(self.searches)
+            total_results = sum(self._count(record) for record in self.results.values())
+        else:
+            # As contagens vêm do backend: as pendências deste processo entram antes
+            self.flush()
+            total_searches = len(self.backend.keys(self.SEARCH_PREFIX))
+            total_results = sum(
+                self._count(self.backend.get(key)) for key in self.backend.keys(self.RESULTS_PREFIX)
+            )
 
         return {
             'total_searches': total_searches,
@@ -111,11 +455,19 @@ class SearchRepository:
         Returns:
             True se removido com sucesso, False caso contrário
         """
-        if search_id in self.searches:
-            del self.searches[search_id]
-            if search_id in self.results:
-                del self.results[search_id]
+        if self.backend is None:
+            removed = self.searches.pop(search_id, None) is not None
+            self._release_offers(self.results.pop(search_id, None))
+        else:
+            removed = self.recent.delete(self.SEARCH_PREFIX + search_id)
+            self.recent.delete(self.RESULTS_PREFIX + search_id)
+            if self.writer is not None:
+                self.writer.discard(self.SEARCH_PREFIX + search_id)
+                self.writer.discard(self.RESULTS_PREFIX + search_id)
+            removed = self.backend.delete(self.SEARCH_PREFIX + search_id) or removed
+            self.backend.delete(self.RESULTS_PREFIX + search_id)
+
+        if removed:
             logger.info(f"Busca {search_id} removida")
-            return True
-        return False
+        return removed
 
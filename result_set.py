@@ -0,0 +1,242 @@
+"""
+Conjunto de resultados vetorizado - Filtros e ranking sobre arrays NumPy (Single Responsibility)
+
+Preço, duração, paradas, partida e códigos (companhia, provedor, aeroportos,
+número do voo) de cada voo ficam em arrays; filtros, remoção de duplicatas,
+ordenação e o score de "melhor custo-benefício" operam sobre índices. Os
+objetos Flight só são materializados para a página efetivamente devolvida,
+o que evita reconstruir milhares de voos vindos do cache.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from interfaces import Flight, Itinerary
+
+DEFAULT_BEST_VALUE_WEIGHTS = {'price': 0.6, 'duration': 0.3, 'stops': 0.1}
+
+
+def _encode(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Codificação por dicionário na ordem de primeira ocorrência
+
+    Um dict do Python é mais rápido que np.unique (que ordena strings) para os
+    poucos milhares de voos de uma busca; só a igualdade dos códigos importa.
+
+    Returns:
+        (dicionário de valores, códigos int64)
+    """
+    table: Dict[str, int] = {}
+    codes = np.fromiter((table.setdefault(value, len(table)) for value in values), dtype=np.int64, count=len(values))
+    return np.array(list(table), dtype=str), codes
+
+
+class FlightResultSet:
+    """Seleção (array de índices) sobre colunas de um lote de voos"""
+
+    def __init__(self, items: List, columns: Dict[str, np.ndarray], materialize: Callable[[object], Flight],
+                 index: Optional[np.ndarray] = None):
+        """
+        Args:
+            items: Voos originais (Flight ou dicionários de Flight.to_dict)
+            columns: Arrays alinhados com items
+            materialize: Converte um item em Flight
+            index: Posições selecionadas, na ordem atual (padrão: todas)
+        """
+        self._items = items
+        self._columns = columns
+        self._materialize = materialize
+        self.index = np.arange(len(items)) if index is None else index
+
+    @classmethod
+    def from_flights(cls, flights: List[Flight]) -> 'FlightResultSet':
+        return cls._build(
+            flights,
+            lambda flight: flight,
+            price=[flight.price for flight in flights],
+            duration=[flight.duration_minutes for flight in flights],
+            stops=[flight.stops for flight in flights],
+            departure=[flight.departure_datetime.timestamp() for flight in flights],
+            airline=[flight.airline for flight in flights],
+            provider=[flight.provider for flight in flights],
+            origin=[flight.origin.code for flight in flights],
+            destination=[flight.destination.code for flight in flights],
+            flight_number=[str(flight.flight_number) for flight in flights]
+        )
+
+    @classmethod
+    def from_dicts(cls, flights: List[Dict]) -> 'FlightResultSet':
+        """Constrói a partir de dicionários (cache/repositório) sem criar objetos Flight"""
+        return cls._build(
+            flights,
+            Flight.from_dict,
+            price=[flight['price'] for flight in flights],
+            duration=[flight['duration_minutes'] for flight in flights],
+            stops=[flight['stops'] for flight in flights],
+            departure=[datetime.fromisoformat(flight['departure_datetime']).timestamp() for flight in flights],
+            airline=[flight['airline'] for flight in flights],
+            provider=[flight['provider'] for flight in flights],
+            origin=[flight['origin']['code'] for flight in flights],
+            destination=[flight['destination']['code'] for flight in flights],
+            flight_number=[str(flight['flight_number']) for flight in flights]
+        )
+
+    @classmethod
+    def from_itineraries(cls, itineraries: List[Itinerary]) -> 'FlightResultSet':
+        """Itinerários de múltiplos trechos (flights() devolve os próprios itinerários)"""
+        return cls._build(
+            itineraries,
+            lambda itinerary: itinerary,
+            price=[itinerary.price for itinerary in itineraries],
+            duration=[itinerary.duration_minutes for itinerary in itineraries],
+            stops=[itinerary.stops for itinerary in itineraries],
+            departure=[itinerary.departure_datetime.timestamp() for itinerary in itineraries],
+            airline=['/'.join(leg.airline for leg in itinerary.legs) for itinerary in itineraries],
+            provider=['/'.join(leg.provider for leg in itinerary.legs) for itinerary in itineraries],
+            origin=[itinerary.legs[0].origin.code for itinerary in itineraries],
+            destination=[itinerary.legs[-1].destination.code for itinerary in itineraries],
+            flight_number=['/'.join(str(leg.flight_number) for leg in itinerary.legs) for itinerary in itineraries]
+        )
+
+    @classmethod
+    def _build(cls, items: List, materialize: Callable, price, duration, stops, departure,
+               airline, provider, origin, destination, flight_number) -> 'FlightResultSet':
+        airline_dict, airline_codes = _encode(airline)
+        provider_dict, provider_codes = _encode(provider)
+        columns = {
+            'price': np.array(price, dtype=np.float64),
+            'duration': np.array(duration, dtype=np.int64),
+            'stops': np.array(stops, dtype=np.int64),
+            'departure': np.array(departure, dtype=np.int64),
+            'airline': airline_codes,
+            'airline_dict': airline_dict,
+            'provider': provider_codes,
+            'provider_dict': provider_dict,
+            'origin': _encode(origin)[1],
+            'destination': _encode(destination)[1],
+            'flight_number': _encode(flight_number)[1]
+        }
+        return cls(items, columns, materialize)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _select(self, index: np.ndarray) -> 'FlightResultSet':
+        return FlightResultSet(self._items, self._columns, self._materialize, index)
+
+    def column(self, name: str) -> np.ndarray:
+        """Valores da coluna para a seleção atual"""
+        return self._columns[name][self.index]
+
+    def _codes_for(self, dictionary: str, values: Iterable[str]) -> np.ndarray:
+        return np.flatnonzero(np.isin(self._columns[dictionary], list(values)))
+
+    def filter(self, max_stops: Optional[int] = None, max_price: Optional[float] = None,
+               max_duration: Optional[int] = None, airlines: Optional[Iterable[str]] = None,
+               providers: Optional[Iterable[str]] = None) -> 'FlightResultSet':
+        """Aplica os filtros informados (combinados com E) como máscaras booleanas"""
+        mask = np.ones(len(self.index), dtype=bool)
+        if max_stops is not None:
+            mask &= self.column('stops') <= max_stops
+        if max_price is not None:
+            mask &= self.column('price') <= max_price
+        if max_duration is not None:
+            mask &= self.column('duration') <= max_duration
+        if airlines is not None:
+            mask &= np.isin(self.column('airline'), self._codes_for('airline_dict', airlines))
+        if providers is not None:
+            mask &= np.isin(self.column('provider'), self._codes_for('provider_dict', providers))
+        return self._select(self.index[mask])
+
+    def head_per_provider(self, limit: int) -> 'FlightResultSet':
+        """Mantém os `limit` primeiros voos de cada provedor, preservando a ordem atual"""
+        providers = self.column('provider')
+        order = np.argsort(providers, kind='stable')
+        grouped = providers[order]
+        starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+        # Posição de cada voo dentro do seu provedor
+        rank = np.arange(len(grouped)) - np.repeat(starts, np.diff(np.r_[starts, len(grouped)]))
+        keep = np.sort(order[rank < limit])
+        return self._select(self.index[keep])
+
+    def dedup(self) -> 'FlightResultSet':
+        """
+        Remove duplicatas com a mesma chave de FlightSearchService._remove_duplicates
+        (companhia, origem, destino, partida ao minuto, número do voo), mantendo a primeira
+        """
+        if not len(self.index):
+            return self
+        keys = np.stack([
+            self.column('airline'),
+            self.column('origin'),
+            self.column('destination'),
+            self.column('departure') // 60,
+            self.column('flight_number')
+        ], axis=1)
+        _, first = np.unique(keys, axis=0, return_index=True)
+        return self._select(self.index[np.sort(first)])
+
+    def best_value_scores(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Score ponderado de preço, duração e paradas (menor é melhor)
+
+        Cada critério é normalizado para 0..1 dentro da seleção atual, para
+        que os pesos não dependam da moeda ou da rota.
+        """
+        weights = weights or DEFAULT_BEST_VALUE_WEIGHTS
+        score = np.zeros(len(self.index))
+        for name, weight in weights.items():
+            if not weight:
+                continue
+            values = self.column(name).astype(np.float64)
+            spread = values.max() - values.min() if len(values) else 0
+            if spread > 0:
+                score += weight * (values - values.min()) / spread
+        return score
+
+    def ranked(self, sort_by: str = 'price', limit: Optional[int] = None,
+               weights: Optional[Dict[str, float]] = None) -> 'FlightResultSet':
+        """
+        Ordena a seleção (empates resolvidos pelo preço e depois pela posição original)
+
+        A ordem é total e determinística: páginas sucessivas de uma mesma
+        seleção nunca repetem nem pulam voos.
+
+        Args:
+            sort_by: price, duration, departure ou best
+            limit: Quando menor que a seleção, ordena só os candidatos ao topo
+                   (os que não passam do `limit`-ésimo valor do critério) e devolve `limit` voos
+            weights: Pesos do score 'best'
+        """
+        price = self.column('price')
+        if sort_by == 'price':
+            primary = price
+        elif sort_by == 'best':
+            primary = self.best_value_scores(weights)
+        else:
+            primary = self.column(sort_by)
+
+        candidates = np.arange(len(self.index))
+        if limit is not None and limit < len(candidates):
+            # Todos os empatados com o limit-ésimo valor entram, para o desempate ser o mesmo da ordem completa
+            kth = np.partition(primary, limit - 1)[limit - 1]
+            candidates = np.flatnonzero(primary <= kth)
+
+        order = candidates[np.lexsort((self.index[candidates], price[candidates], primary[candidates]))][:limit]
+        return self._select(self.index[order])
+
+    def flights(self, offset: int = 0, limit: Optional[int] = None) -> List[Flight]:
+        """Materializa apenas os voos da página pedida"""
+        end = None if limit is None else offset + limit
+        return [self._materialize(self._items[position]) for position in self.index[offset:end]]
+
+    def rows(self, offset: int = 0, limit: Optional[int] = None) -> List:
+        """Itens originais da página pedida, sem conversão (ex.: dicionários prontos para JSON)"""
+        end = None if limit is None else offset + limit
+        return [self._items[position] for position in self.index[offset:end]]
+
+    def airline_counts(self) -> Dict[str, int]:
+        """Quantidade de voos por companhia na seleção atual"""
+        counts = np.bincount(self.column('airline'), minlength=len(self._columns['airline_dict']))
+        return {airline: int(count) for airline, count in zip(self._columns['airline_dict'], counts) if count}
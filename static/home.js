@@ -72,7 +72,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
         if (formData.origem.length !== 3 || formData.destino.length !== 3) {
-            showError('Códigos de aeroporto devem ter 3 letras (ex: GRU, GIG, SLZ)');
+            showError('Escolha um aeroporto da lista ou use o código de 3 letras (ex: GRU, GIG, SAO)');
             loading.classList.add('hidden');
             return;
         }
@@ -173,15 +173,104 @@ style.textContent = `
 `;
 document.head.appendChild(style);
 
-// Validação em tempo real dos códigos de aeroporto
-const airportCodes = ['GRU', 'GIG', 'SLZ', 'BSB', 'FOR', 'SSA', 'REC', 'MAO', 'BEL', 'CWB',
-                     'POA', 'FLN', 'VCP', 'CGH', 'SDU', 'CNF', 'NAT', 'MCZ', 'THE', 'VIX',
-                     'JFK', 'LAX', 'MIA', 'ORD', 'LHR', 'CDG', 'FCO', 'MAD', 'LIS'];
+// Autocomplete de aeroportos e cidades (GET /aeroportos) com validação do código digitado
+function setupAirportAutocomplete(input) {
+    const list = document.createElement('ul');
+    list.className = 'autocomplete-list hidden';
+    input.setAttribute('autocomplete', 'off');
+    input.parentNode.style.position = 'relative';
+    input.parentNode.appendChild(list);
+
+    let suggestions = [];
+    let active = -1;
+    let timer = null;
+    let lastQuery = '';
+
+    function close() {
+        list.classList.add('hidden');
+        active = -1;
+    }
+
+    function choose(index) {
+        const suggestion = suggestions[index];
+        if (!suggestion) return;
+        input.value = suggestion.codigo;
+        validateAirportCode(input, suggestions);
+        close();
+    }
+
+    function render() {
+        list.innerHTML = '';
+        suggestions.forEach((suggestion, index) => {
+            const item = document.createElement('li');
+            item.className = 'autocomplete-item' + (index === active ? ' active' : '');
+            const detail = suggestion.tipo === 'cidade'
+                ? `Todos os aeroportos (${suggestion.aeroportos.join(', ')})`
+                : `${suggestion.nome}`;
+            item.innerHTML = `
+                <i class="fas fa-${suggestion.tipo === 'cidade' ? 'city' : 'plane'}"></i>
+                <strong>${suggestion.codigo}</strong>
+                <span>${suggestion.cidade}, ${suggestion.pais} — ${detail}</span>
+            `;
+            // mousedown dispara antes do blur do campo
+            item.addEventListener('mousedown', function(e) {
+                e.preventDefault();
+                choose(index);
+            });
+            list.appendChild(item);
+        });
+        list.classList.toggle('hidden', suggestions.length === 0);
+    }
+
+    async function fetchSuggestions(query) {
+        lastQuery = query;
+        if (query.length < 2) {
+            suggestions = [];
+            render();
+            validateAirportCode(input, suggestions);
+            return;
+        }
+        try {
+            const response = await fetch(`/aeroportos?q=${encodeURIComponent(query)}`);
+            const data = await response.json();
+            // Ignora respostas de consultas já substituídas por outra digitação
+            if (query !== lastQuery) return;
+            suggestions = data.resultados || [];
+            active = -1;
+            render();
+            validateAirportCode(input, suggestions);
+        } catch (error) {
+            console.error('Erro no autocomplete:', error);
+        }
+    }
+
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        timer = setTimeout(() => fetchSuggestions(this.value.trim()), 150);
+    });
+
+    input.addEventListener('keydown', function(e) {
+        if (list.classList.contains('hidden')) return;
+        if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+            e.preventDefault();
+            const step = e.key === 'ArrowDown' ? 1 : -1;
+            active = (active + step + suggestions.length) % suggestions.length;
+            render();
+        } else if (e.key === 'Enter' && active >= 0) {
+            e.preventDefault();
+            choose(active);
+        } else if (e.key === 'Escape') {
+            close();
+        }
+    });
+
+    input.addEventListener('blur', close);
+}
 
-function validateAirportCode(input) {
+function validateAirportCode(input, suggestions) {
     const value = input.value.toUpperCase();
     if (value.length === 3) {
-        if (airportCodes.includes(value)) {
+        if (suggestions.some(suggestion => suggestion.codigo === value)) {
             input.style.borderColor = 'var(--secondary-color)';
             input.style.background = '#ecfdf5';
         } else {
@@ -194,13 +283,8 @@ function validateAirportCode(input) {
     }
 }
 
-document.getElementById('origem').addEventListener('input', function() {
-    validateAirportCode(this);
-});
-
-document.getElementById('destino').addEventListener('input', function() {
-    validateAirportCode(this);
-});
+setupAirportAutocomplete(document.getElementById('origem'));
+setupAirportAutocomplete(document.getElementById('destino'));
 
 // Atalhos de teclado
 document.addEventListener('keydown', function(e) {
@@ -1,12 +1,10 @@
-// Funções de filtro e ordenação dos voos
+// Filtros, ordenação e paginação são aplicados no servidor (query string de /consulta/<id>/view)
 
-// Dados dos voos (serão preenchidos dinamicamente)
 let allFlights = [];
-let currentFilter = 'all';
 
 // Inicialização
 document.addEventListener('DOMContentLoaded', function() {
-    // Carrega todos os cartões de voos
+    // Carrega os cartões da página atual
     allFlights = Array.from(document.querySelectorAll('.flight-card'));
 
     // Adiciona animação de entrada
@@ -15,92 +13,21 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
-// Função para filtrar voos
-function filterFlights(filterType) {
-    currentFilter = filterType;
-
-    // Atualiza botões ativos
-    document.querySelectorAll('.filter-btn').forEach(btn => {
-        btn.classList.remove('active');
-    });
-    event.target.closest('.filter-btn').classList.add('active');
-
-    // Aplica filtro
-    allFlights.forEach(card => {
-        card.classList.remove('hidden');
-
-        switch(filterType) {
-            case 'direct':
-                const stops = parseInt(card.dataset.stops);
-                if (stops > 0) {
-                    card.classList.add('hidden');
-                }
-                break;
-            case 'cheapest':
-                // Mostra apenas os 5 mais baratos
-                const sortedByPrice = [...allFlights].sort((a, b) => {
-                    return parseFloat(a.dataset.price) - parseFloat(b.dataset.price);
-                });
-                if (sortedByPrice.indexOf(card) >= 5) {
-                    card.classList.add('hidden');
-                }
-                break;
-            case 'all':
-            default:
-                // Mostra todos
-                break;
-        }
-    });
-
-    // Anima a entrada
-    animateFilteredCards();
-}
-
-// Função para ordenar voos
-function sortFlights(sortType) {
-    // Atualiza botões ativos
-    document.querySelectorAll('.filter-btn').forEach(btn => {
-        btn.classList.remove('active');
-    });
-    event.target.closest('.filter-btn').classList.add('active');
-
-    const flightsList = document.getElementById('flightsList');
-    const sortedFlights = [...allFlights];
-
-    switch(sortType) {
-        case 'price':
-            sortedFlights.sort((a, b) => {
-                return parseFloat(a.dataset.price) - parseFloat(b.dataset.price);
-            });
-            break;
-        case 'duration':
-            sortedFlights.sort((a, b) => {
-                return parseInt(a.dataset.duration) - parseInt(b.dataset.duration);
-            });
-            break;
+// Navega para a mesma busca com um parâmetro alterado (volta para a primeira página)
+function updateQuery(name, value) {
+    const url = new URL(window.location.href);
+    if (value === null || value === '') {
+        url.searchParams.delete(name);
+    } else {
+        url.searchParams.set(name, value);
     }
-
-    // Remove todos os cartões
-    flightsList.innerHTML = '';
-
-    // Adiciona os cartões ordenados
-    sortedFlights.forEach((card, index) => {
-        card.style.animationDelay = `${index * 0.05}s`;
-        flightsList.appendChild(card);
-    });
-
-    allFlights = sortedFlights;
+    url.searchParams.delete('page');
+    window.location.href = url.toString();
 }
 
-// Função para animar cartões filtrados
-function animateFilteredCards() {
-    const visibleCards = allFlights.filter(card => !card.classList.contains('hidden'));
-    visibleCards.forEach((card, index) => {
-        card.style.animation = 'none';
-        setTimeout(() => {
-            card.style.animation = `slideIn 0.5s ease-out ${index * 0.05}s both`;
-        }, 10);
-    });
+// Filtro por companhia aérea
+function applyAirlineFilter(airline) {
+    updateQuery('airline', airline);
 }
 
 // Função para formatar moeda
@@ -209,9 +136,9 @@ function printResults() {
 document.addEventListener('keydown', function(e) {
     // Esc para resetar filtros
     if (e.key === 'Escape') {
-        const allButton = document.querySelector('.filter-btn[onclick*="all"]');
-        if (allButton) {
-            allButton.click();
+        const url = new URL(window.location.href);
+        if (url.search) {
+            window.location.href = url.pathname;
         }
     }
 
@@ -0,0 +1,40 @@
+"""
+Testes da expansão de metrópoles e aeroportos próximos
+"""
+from airports import AirportDirectory, AirportInfo
+
+
+def airport(code: str, metro: str, latitude: float, longitude: float) -> AirportInfo:
+    return AirportInfo(code=code, name=code, city=metro or code, metro=metro, country='GB',
+                       latitude=latitude, longitude=longitude)
+
+
+AIRPORTS = [
+    airport('LHR', 'LON', 51.47, -0.45),
+    airport('LGW', 'LON', 51.15, -0.19),
+    airport('STN', 'LON', 51.89, 0.24),
+    airport('LTN', 'LON', 51.87, -0.37),
+    airport('LCY', 'LON', 51.51, 0.06),
+    airport('SOU', '', 50.95, -1.36),
+    airport('BHX', '', 52.45, -1.75),
+    airport('MAN', '', 53.35, -2.27),
+]
+
+
+def test_metro_airports_are_never_truncated():
+    directory = AirportDirectory(AIRPORTS)
+    assert directory.expand('LON', max_airports=3) == ['LHR', 'LGW', 'STN', 'LTN', 'LCY']
+    assert directory.expand('lon', include_nearby=True, radius_km=150, max_airports=3) == \
+        ['LHR', 'LGW', 'STN', 'LTN', 'LCY']
+
+
+def test_nearby_additions_respect_max_airports():
+    directory = AirportDirectory(AIRPORTS)
+    assert directory.expand('LHR', include_nearby=True, radius_km=150, max_airports=3) == ['LHR', 'LCY', 'LGW']
+
+
+def test_nearby_radius_is_clamped():
+    directory = AirportDirectory(AIRPORTS, max_radius_km=100)
+    assert [code for code, _ in directory.nearby('LHR', 10_000)] == \
+        [code for code, _ in directory.nearby('LHR', 100)]
+    assert 'MAN' not in dict(directory.nearby('LHR', 10_000))
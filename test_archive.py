@@ -0,0 +1,62 @@
+"""
+Testes do arquivo histórico: varredura com filtros e gravação periódica
+"""
+import glob
+import os
+import time
+from datetime import datetime, timedelta
+
+from archive import ResultArchive, scan
+from interfaces import Airport, Flight, FlightSearchParams
+
+GRU = Airport(code='GRU', name='Guarulhos', city='São Paulo', country='BR')
+LIS = Airport(code='LIS', name='Lisboa', city='Lisboa', country='PT')
+
+
+def build_flights(provider: str, airline: str, count: int):
+    start = datetime.now() + timedelta(days=30)
+    return [
+        Flight(
+            id=f'{provider}-{i}', provider=provider, airline=airline, origin=GRU, destination=LIS,
+            departure_datetime=start + timedelta(hours=i), arrival_datetime=start + timedelta(hours=i + 11),
+            price=1000.0 + i, currency='BRL', stops=i % 2, duration_minutes=660,
+            flight_number=f'{airline}{i}'
+        )
+        for i in range(count)
+    ]
+
+
+def search_params() -> FlightSearchParams:
+    return FlightSearchParams(origin='GRU', destination='LIS', departure_date=datetime.now() + timedelta(days=30))
+
+
+def test_scan_filters_by_provider_and_codes_ignoring_case(tmp_path):
+    archive = ResultArchive(str(tmp_path), flush_seconds=0)
+    archive.record_search(search_params(), build_flights('Amadeus', 'TP', 3))
+    archive.record_search(search_params(), build_flights('Kiwi.com', 'LA', 5))
+    archive.flush()
+
+    assert len(scan(str(tmp_path), provider='Amadeus')['price']) == 3
+    assert len(scan(str(tmp_path), provider='KIWI.COM')['price']) == 5
+    assert list(scan(str(tmp_path), airline='la', origin='gru')['provider']) == ['Kiwi.com'] * 5
+    assert len(scan(str(tmp_path), provider='Amadeus', max_stops=0)['price']) == 2
+    assert len(scan(str(tmp_path), provider='Outro')['price']) == 0
+
+
+def test_pending_rows_are_flushed_without_new_searches(tmp_path):
+    archive = ResultArchive(str(tmp_path), flush_seconds=0.2)
+    try:
+        archive.record_search(search_params(), build_flights('Amadeus', 'TP', 2))
+        deadline = time.time() + 5
+        while not glob.glob(os.path.join(str(tmp_path), 'results-*.npz')) and time.time() < deadline:
+            time.sleep(0.05)
+        assert len(scan(str(tmp_path), provider='Amadeus')['price']) == 2
+    finally:
+        archive.close()
+
+
+def test_close_flushes_buffer(tmp_path):
+    archive = ResultArchive(str(tmp_path), flush_seconds=300)
+    archive.record_search(search_params(), build_flights('Kiwi.com', 'LA', 4))
+    archive.close()
+    assert len(scan(str(tmp_path))['price']) == 4
@@ -0,0 +1,94 @@
+"""
+Testes dos backends compartilhados (SQLite e Redis) com o repositório de buscas
+"""
+import time
+
+import pytest
+
+from benchmarks.fake_redis import FakeRedisServer
+from cache_backends import RedisCache, RedisError, SQLiteCache
+from repository import SearchRepository
+from test_repository import flight_dict
+
+
+@pytest.fixture
+def redis_server():
+    with FakeRedisServer() as server:
+        yield server
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def backend_factory(request, tmp_path):
+    """Cria clientes independentes do mesmo armazenamento, como em workers diferentes"""
+    if request.param == 'sqlite':
+        path = str(tmp_path / 'cache.db')
+        return lambda: SQLiteCache(path)
+    server = request.getfixturevalue('redis_server')
+    return lambda: RedisCache(server.url)
+
+
+@pytest.mark.parametrize('write_behind', [False, True])
+def test_search_saved_by_one_worker_resolves_in_another(backend_factory, write_behind):
+    worker = SearchRepository(backend=backend_factory(), retention_seconds=3600, write_behind=write_behind)
+    results = [flight_dict(1), flight_dict(2, price=1500.0)]
+    search_id = worker.save_search({'origem': 'GRU', 'destino': 'LIS'})
+    worker.save_results(search_id, results)
+    worker.save_timing(search_id, {'total_ms': 12.5})
+    worker.flush()
+
+    other = SearchRepository(backend=backend_factory(), retention_seconds=3600)
+    search = other.get_search(search_id)
+    assert search['data'] == {'origem': 'GRU', 'destino': 'LIS'}
+    assert search['timing'] == {'total_ms': 12.5}
+    assert other.get_results(search_id) == results
+    assert [item['id'] for item in other.list_all_searches()] == [search_id]
+    assert other.get_search_stats()['total_results'] == 2
+
+    assert other.delete_search(search_id)
+    assert other.get_search(search_id) is None
+    worker.close()
+
+
+def test_backend_basic_operations(backend_factory):
+    backend = backend_factory()
+    backend.set('a:1', {'x': 1}, 60)
+    backend.set_many([('a:2', [1, 2], 60), ('b:1', 'texto', None)])
+    assert backend.get('a:1') == {'x': 1}
+    assert backend.get('a:2') == [1, 2]
+    assert sorted(backend.keys('a:')) == ['a:1', 'a:2']
+    assert backend.delete('a:1')
+    assert not backend.delete('a:1')
+    assert backend.get('a:1') is None
+
+
+def test_redis_error_inside_exec_keeps_connection_in_sync(redis_server):
+    cache = RedisCache(redis_server.url)
+    with pytest.raises(RedisError):
+        cache.pipeline([('MULTI',), ('NOSUCHCOMMAND',), ('SET', 'flight:k', '"v"'), ('EXEC',)])
+
+    cache.set('depois', {'ok': True})
+    assert cache.get('depois') == {'ok': True}
+    assert cache.get('k') == 'v'
+
+
+def test_redis_fractional_ttl_is_rounded_up(redis_server):
+    cache = RedisCache(redis_server.url)
+    cache.set('curto', 1, 0.5)
+    cache.set_many([('curto:2', 2, 0.2)])
+    assert cache.get('curto') == 1
+    assert cache.get('curto:2') == 2
+
+
+def test_sqlite_purges_expired_entries_every_n_writes(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), purge_every=3)
+    cache.set('velha', 1, 60)
+    clock = time.time() + 120
+    monkeypatch.setattr(time, 'time', lambda: clock)
+
+    def stored_keys():
+        return [row[0] for row in cache._connection().execute('SELECT key FROM cache')]
+
+    cache.set('nova:1', 1, 60)
+    assert 'velha' in stored_keys()
+    cache.set_many([('nova:2', 2, 60)])
+    assert sorted(stored_keys()) == ['nova:1', 'nova:2']
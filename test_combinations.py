@@ -0,0 +1,66 @@
+"""
+Testes de k_best_combinations contra a enumeração completa
+"""
+import itertools
+import random
+
+import pytest
+
+from combinations import k_best_combinations
+
+
+def brute_force(costs, is_valid=None):
+    combinations = [
+        (sum(costs[position][index] for position, index in enumerate(combination)), combination)
+        for combination in itertools.product(*(range(len(column)) for column in costs))
+        if is_valid is None or is_valid(combination)
+    ]
+    return sorted(combinations)
+
+
+def random_costs(rnd, lists, length):
+    return [sorted(rnd.choice([100, 150, 200, 250]) + rnd.random() for _ in range(length)) for _ in range(lists)]
+
+
+def test_matches_brute_force_order():
+    rnd = random.Random(42)
+    for lists in (1, 2, 3):
+        costs = random_costs(rnd, lists, 6)
+        expected = brute_force(costs)
+        for k in (1, 5, 20, len(expected)):
+            best = k_best_combinations(costs, k)
+            assert [total for total, _ in best] == pytest.approx([total for total, _ in expected[:k]])
+            assert len(set(combination for _, combination in best)) == len(best)
+            for total, combination in best:
+                assert total == pytest.approx(sum(costs[position][index] for position, index in enumerate(combination)))
+
+
+def test_invalid_combinations_are_skipped_without_losing_order():
+    rnd = random.Random(7)
+    costs = random_costs(rnd, 3, 5)
+
+    def is_valid(combination):
+        return combination[0] != combination[1]
+
+    best = k_best_combinations(costs, 15, is_valid=is_valid)
+    expected = brute_force(costs, is_valid)[:15]
+    assert [total for total, _ in best] == pytest.approx([total for total, _ in expected])
+    assert all(is_valid(combination) for _, combination in best)
+
+
+def test_max_expansions_stops_when_almost_everything_is_invalid():
+    costs = [[1.0] * 50, [1.0] * 50]
+    checked = []
+
+    def is_valid(combination):
+        checked.append(combination)
+        return False
+
+    assert k_best_combinations(costs, 3, is_valid=is_valid, max_expansions=40) == []
+    assert len(checked) == 40
+
+
+def test_empty_inputs():
+    assert k_best_combinations([], 3) == []
+    assert k_best_combinations([[1.0], []], 3) == []
+    assert k_best_combinations([[1.0, 2.0]], 0) == []
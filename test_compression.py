@@ -0,0 +1,96 @@
+"""
+Testes da compressão negociada e dos GETs condicionais com ETags por codificação
+"""
+import gzip
+import json
+
+import pytest
+from flask import Flask, Response, jsonify
+
+import compression
+from compression import ResponseCompressor, if_none_match_tag, make_etag
+
+BODY = {'voos': [{'id': f'voo-{i}', 'preco': 1000 + i} for i in range(200)]}
+
+
+@pytest.fixture
+def compressor():
+    return ResponseCompressor(min_size=256)
+
+
+@pytest.fixture
+def client(compressor):
+    app = Flask(__name__)
+    compressor.init_app(app)
+
+    @app.route('/resultado')
+    def resultado():
+        etag = make_etag('json', 'busca-1')
+        cached_tag = if_none_match_tag(etag)
+        if cached_tag:
+            response = Response(status=304)
+            response.set_etag(cached_tag)
+            return response
+        response = jsonify(BODY)
+        response.set_etag(etag)
+        response.cache_control.public = True
+        return response
+
+    @app.route('/pequeno')
+    def pequeno():
+        return jsonify({'ok': True})
+
+    @app.route('/binario')
+    def binario():
+        return Response(b'\0' * 4096, mimetype='application/octet-stream')
+
+    with app.test_client() as client:
+        yield client
+
+
+def test_gzip_when_it_is_the_only_accepted_encoding(client):
+    response = client.get('/resultado', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data)) == BODY
+    assert response.get_etag() == (f"{make_etag('json', 'busca-1')}-gzip", False)
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_brotli_is_preferred_when_available(client):
+    if compression.brotli is None:
+        pytest.skip('brotli não instalado')
+    response = client.get('/resultado', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(compression.brotli.decompress(response.data)) == BODY
+
+
+def test_quality_zero_is_respected(client):
+    response = client.get('/resultado', headers={'Accept-Encoding': 'gzip;q=0, br;q=0'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == BODY
+    assert response.get_etag() == (make_etag('json', 'busca-1'), False)
+
+
+def test_small_and_binary_responses_are_not_compressed(client):
+    assert 'Content-Encoding' not in client.get('/pequeno', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/binario', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_revalidation_returns_304_with_the_client_variant(client):
+    first = client.get('/resultado', headers={'Accept-Encoding': 'gzip'})
+    tag, _ = first.get_etag()
+
+    again = client.get('/resultado', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{tag}"'})
+    assert again.status_code == 304
+    assert again.get_etag() == (tag, False)
+    assert again.data == b''
+
+
+def test_immutable_bodies_are_compressed_once(client, compressor, monkeypatch):
+    calls = []
+    original = compressor.compress
+    monkeypatch.setattr(compressor, 'compress', lambda data, encoding: calls.append(encoding) or original(data, encoding))
+
+    for _ in range(3):
+        client.get('/resultado', headers={'Accept-Encoding': 'gzip'})
+    assert calls == ['gzip']
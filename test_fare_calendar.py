@@ -0,0 +1,106 @@
+"""
+Testes do calendário de tarifas: regras de substituição das células
+"""
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from fare_calendar import FareCell, LowestFareIndex
+from interfaces import ProviderError
+
+DAY = '2030-03-01'
+
+
+def cell(price: float, age: float = 0, currency: str = 'BRL') -> FareCell:
+    return FareCell(price=price, currency=currency, provider='Kiwi.com', airline='LA',
+                    observed_at=time.time() - age)
+
+
+def current(index: LowestFareIndex) -> FareCell:
+    return index.month_view('GRU', 'LIS', 2030, 3)[DAY]
+
+
+def test_keeps_lowest_fresh_price():
+    index = LowestFareIndex(max_age_seconds=3600)
+    index.record('gru', 'lis', DAY, 'economy', cell(1200))
+    index.record('GRU', 'LIS', DAY, 'ECONOMY', cell(1000))
+    index.record('GRU', 'LIS', DAY, 'ECONOMY', cell(1100))
+    assert current(index).price == 1000
+
+
+def test_stale_cell_is_replaced_by_newer_higher_price():
+    index = LowestFareIndex(max_age_seconds=3600)
+    index.record('GRU', 'LIS', DAY, 'ECONOMY', cell(900, age=7200))
+    index.record('GRU', 'LIS', DAY, 'ECONOMY', cell(1300))
+    assert current(index).price == 1300
+
+
+def test_older_stale_observation_never_replaces_current():
+    index = LowestFareIndex(max_age_seconds=3600)
+    index.record('GRU', 'LIS', DAY, 'ECONOMY', cell(1300))
+    index.record('GRU', 'LIS', DAY, 'ECONOMY', cell(500, age=7200))
+    assert current(index).price == 1300
+
+
+def test_currency_change_replaces_cell():
+    index = LowestFareIndex(max_age_seconds=3600)
+    index.record('GRU', 'LIS', DAY, 'ECONOMY', cell(1000))
+    index.record('GRU', 'LIS', DAY, 'ECONOMY', cell(200, currency='EUR'))
+    assert (current(index).price, current(index).currency) == (200, 'EUR')
+
+
+def test_cabins_are_separate_routes():
+    index = LowestFareIndex()
+    index.record('GRU', 'LIS', DAY, 'ECONOMY', cell(1000))
+    index.record('GRU', 'LIS', DAY, 'BUSINESS', cell(5000))
+    assert current(index).price == 1000
+    assert index.month_view('GRU', 'LIS', 2030, 3, cabin='BUSINESS')[DAY].price == 5000
+
+
+@pytest.mark.parametrize('failure', [ProviderError('Kiwi.com', 'Bad Gateway', 502), RuntimeError('falha inesperada')])
+def test_failed_live_search_keeps_indexed_day(monkeypatch, failure):
+    import app as app_module
+
+    day = date.today() + timedelta(days=40)
+    index = LowestFareIndex(max_age_seconds=3600)
+    index.record('GRU', 'LIS', day.isoformat(), 'ECONOMY', cell(900, age=7200))
+    monkeypatch.setattr(app_module, 'fare_index', index)
+
+    def failing_search(params, *args, **kwargs):
+        raise failure
+    monkeypatch.setattr(app_module.flight_service, 'search_flights', failing_search)
+
+    with app_module.app.test_client() as client:
+        response = client.get(f'/calendario?origem=GRU&destino=LIS&mes={day:%Y-%m}&moeda=BRL&max_buscas=3')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['buscas_ao_vivo'] == 3
+    assert next(d for d in body['dias'] if d['data'] == day.isoformat())['price'] == 900
+
+
+def test_cached_hits_do_not_refresh_observation_time():
+    from app import fare_index, flight_service
+
+    assert (fare_index.record_search, False) in flight_service.listeners
+
+
+def test_load_from_repository_reads_only_recent_searches():
+    from repository import SearchRepository
+    from test_repository import flight_dict
+
+    repository = SearchRepository()
+    for offset, price in [(10, 1000.0), (3, 1200.0), (1, 1100.0)]:
+        day = f'2030-03-{offset:02d}'
+        search_id = repository.save_search({'origem': 'GRU', 'destino': 'LIS', 'data_ida': day, 'passageiros': 1})
+        repository.save_results(search_id, [flight_dict(offset, price=price)])
+    old_id = next(item['id'] for item in repository.list_all_searches() if item['data']['data_ida'] == '2030-03-10')
+    repository.searches[old_id]['timestamp'] = '2020-01-01T00:00:00'
+
+    index = LowestFareIndex()
+    assert index.load_from_repository(repository, max_searches=1) == 1
+    assert index.month_view('GRU', 'LIS', 2030, 3)['2030-03-01'].price == 1100.0
+
+    index = LowestFareIndex()
+    assert index.load_from_repository(repository, max_age_seconds=86400) == 2
+    assert index.month_view('GRU', 'LIS', 2030, 3)['2030-03-10'] is None
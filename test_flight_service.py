@@ -0,0 +1,297 @@
+"""
+Testes do FlightSearchService com provedores em memória: cache, cache negativo, escalonamento
+e múltiplos destinos
+"""
+import itertools
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+
+from admission import Overloaded
+from cache_backends import InMemoryLRUCache
+from flight_service import FlightSearchService
+from interfaces import Airport, Flight, FlightSearchParams, IFlightProvider, MultiCitySearchParams, ProviderError
+from tiering import ALL_PROVIDERS, TierPolicy
+
+GRU = Airport(code='GRU', name='Guarulhos', city='São Paulo', country='BR')
+LIS = Airport(code='LIS', name='Lisboa', city='Lisboa', country='PT')
+
+
+class StubProvider(IFlightProvider):
+    """Provedor que responde com voos fixos (ou falha) e conta as chamadas"""
+
+    def __init__(self, name: str, flights: List[Flight], priority: int = 1, error: ProviderError = None,
+                 delay: float = 0):
+        self.name = name
+        self.flights = flights
+        self.priority = priority
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    def search_flights(self, params: FlightSearchParams) -> List[Flight]:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [flight for flight in self.flights
+                if params.max_stops is None or flight.stops <= params.max_stops][:params.max_results]
+
+    def get_provider_name(self) -> str:
+        return self.name
+
+    def is_available(self) -> bool:
+        return True
+
+    def get_priority(self) -> int:
+        return self.priority
+
+
+class RecordingCache(InMemoryLRUCache):
+    """Cache em memória que guarda o TTL de cada gravação"""
+
+    def __init__(self):
+        super().__init__(max_entries=1000)
+        self.ttls = {}
+
+    def set(self, key, value, ttl=None):
+        self.ttls[key] = ttl
+        super().set(key, value, ttl)
+
+
+def build_flights(provider: str, count: int, airline: str = 'LA') -> List[Flight]:
+    start = datetime.now() + timedelta(days=30)
+    return [
+        Flight(
+            id=f'{provider}-{i}', provider=provider, airline=airline, origin=GRU, destination=LIS,
+            departure_datetime=start + timedelta(hours=i), arrival_datetime=start + timedelta(hours=i + 11),
+            price=1000.0 + 10 * i, currency='BRL', stops=i % 3, duration_minutes=660,
+            flight_number=f'{airline}{i}'
+        )
+        for i in range(count)
+    ]
+
+
+def search_params(**overrides) -> FlightSearchParams:
+    values = dict(origin='GRU', destination='LIS', departure_date=datetime.now() + timedelta(days=30))
+    values.update(overrides)
+    return FlightSearchParams(**values)
+
+
+@pytest.fixture
+def cache():
+    return RecordingCache()
+
+
+def test_partial_result_is_cached_only_for_the_error_ttl(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 5))
+    amadeus = StubProvider('Amadeus', [], error=ProviderError('Amadeus', 'Timeout', 503))
+    service = FlightSearchService([kiwi, amadeus], cache=cache, cache_ttl=3600)
+
+    flights = service.search_flights(search_params())
+
+    assert len(flights) == 5
+    entry_ttls = [ttl for key, ttl in cache.ttls.items() if not key.startswith('negative:')]
+    assert entry_ttls == [FlightSearchService.DEFAULT_NEGATIVE_TTLS['error']]
+
+
+def test_partial_result_is_not_cached_when_error_ttl_is_disabled(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 5))
+    amadeus = StubProvider('Amadeus', [], error=ProviderError('Amadeus', 'Timeout', 503))
+    service = FlightSearchService([kiwi, amadeus], cache=cache, negative_ttls={'empty': 900, 'error': 0})
+
+    service.search_flights(search_params())
+    service.search_flights(search_params())
+
+    assert kiwi.calls == 2
+    assert amadeus.calls == 2
+
+
+def test_complete_result_uses_cache_ttl(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 5))
+    amadeus = StubProvider('Amadeus', build_flights('Amadeus', 5, airline='TP'))
+    service = FlightSearchService([kiwi, amadeus], cache=cache, cache_ttl=3600)
+
+    service.search_flights(search_params())
+    service.search_flights(search_params())
+
+    assert list(cache.ttls.values()) == [3600]
+    assert kiwi.calls == amadeus.calls == 1
+
+
+def ids(flights: List[Flight]) -> List[str]:
+    return [flight.id for flight in flights]
+
+
+def test_narrower_search_is_derived_from_cached_entry(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 12))
+    service = FlightSearchService([kiwi], cache=cache)
+    fresh = FlightSearchService([StubProvider('Kiwi.com', build_flights('Kiwi.com', 12))])
+
+    service.search_flights(search_params(max_results=50))
+    for narrower in (dict(max_stops=1), dict(max_stops=0, max_results=3), dict(max_results=5, sort_by='duration')):
+        assert ids(service.search_flights(search_params(**narrower))) == \
+            ids(fresh.search_flights(search_params(**narrower)))
+    assert kiwi.calls == 1
+
+
+def test_truncated_entry_does_not_answer_stricter_stop_filter(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 30))
+    service = FlightSearchService([kiwi], cache=cache)
+
+    service.search_flights(search_params(max_results=5))
+    flights = service.search_flights(search_params(max_results=5, max_stops=0))
+
+    # Os 5 voos em cache têm só 2 diretos; a lista truncada não garante os 5 mais baratos diretos
+    assert kiwi.calls == 2
+    assert len(flights) == 5 and all(flight.stops == 0 for flight in flights)
+
+
+def test_broader_search_is_not_answered_by_narrower_entry(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 12))
+    service = FlightSearchService([kiwi], cache=cache)
+    service.search_flights(search_params(max_stops=0))
+    service.search_flights(search_params())
+    assert kiwi.calls == 2
+
+
+def test_empty_response_is_negatively_cached(cache):
+    empty = StubProvider('Amadeus', [])
+    service = FlightSearchService([empty], cache=cache)
+    assert service.search_flights(search_params()) == []
+    assert service.search_flights(search_params()) == []
+    # A resposta sem limite de paradas vale também para um limite menor
+    assert service.search_flights(search_params(max_stops=0)) == []
+    assert empty.calls == 1
+
+    service.search_flights(search_params(), refresh=True)
+    assert empty.calls == 2
+
+
+@pytest.mark.parametrize('status, kind', [(503, 'error'), (400, 'rejected')])
+def test_provider_failure_is_negatively_cached(cache, status, kind):
+    failing = StubProvider('Amadeus', [], error=ProviderError('Amadeus', 'Falha', status))
+    service = FlightSearchService([failing], cache=cache)
+    service.search_flights(search_params())
+    service.search_flights(search_params())
+
+    assert failing.calls == 1
+    negative = {key: ttl for key, ttl in cache.ttls.items() if key.startswith('negative:')}
+    assert list(negative.values()) == [FlightSearchService.DEFAULT_NEGATIVE_TTLS[kind]]
+
+
+def tiered_service(cache, first_tier: StubProvider, second_tier_count: int = 5):
+    second = StubProvider('Amadeus', build_flights('Amadeus', second_tier_count, airline='TP'), priority=2)
+    return FlightSearchService([first_tier, second], cache=cache), second
+
+
+def test_second_tier_is_skipped_when_first_has_enough_results(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 10))
+    service, amadeus = tiered_service(cache, kiwi)
+    flights = service.search_flights(search_params(), tier_policy=TierPolicy(min_results=10))
+    assert amadeus.calls == 0
+    assert {flight.provider for flight in flights} == {'Kiwi.com'}
+
+
+def test_escalates_on_few_results(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 3))
+    service, amadeus = tiered_service(cache, kiwi)
+    flights = service.search_flights(search_params(), tier_policy=TierPolicy(min_results=10))
+    assert amadeus.calls == 1
+    assert {flight.provider for flight in flights} == {'Kiwi.com', 'Amadeus'}
+
+
+def test_escalates_on_error(cache):
+    kiwi = StubProvider('Kiwi.com', [], error=ProviderError('Kiwi.com', 'Falha', 500))
+    service, amadeus = tiered_service(cache, kiwi)
+    flights = service.search_flights(search_params(), tier_policy=TierPolicy(min_results=1))
+    assert amadeus.calls == 1
+    assert len(flights) == 5
+
+
+def test_escalates_on_deadline_and_keeps_late_results(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 10), delay=0.3)
+    service, amadeus = tiered_service(cache, kiwi)
+    flights = service.search_flights(search_params(), tier_policy=TierPolicy(min_results=1, deadline=0.05))
+    assert amadeus.calls == 1
+    assert {flight.provider for flight in flights} == {'Kiwi.com', 'Amadeus'}
+
+
+def test_entry_with_skipped_tier_does_not_answer_search_of_all_providers(cache):
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 10))
+    service, amadeus = tiered_service(cache, kiwi)
+    service.search_flights(search_params(), tier_policy=TierPolicy(min_results=10))
+    service.search_flights(search_params(), tier_policy=TierPolicy(min_results=10))
+    assert (kiwi.calls, amadeus.calls) == (1, 0)
+
+    service.search_flights(search_params(), tier_policy=ALL_PROVIDERS)
+    assert amadeus.calls == 1
+
+
+class RouteProvider(StubProvider):
+    """Voos da rota e data pedidas: um por hora a partir das 6h, preços variados"""
+
+    AIRPORTS = {code: Airport(code=code, name=code, city=code, country='XX') for code in ('GRU', 'LIS', 'MAD')}
+
+    def __init__(self):
+        super().__init__('Kiwi.com', [])
+
+    def search_flights(self, params: FlightSearchParams) -> List[Flight]:
+        self.calls += 1
+        day = params.departure_date.replace(hour=6, minute=0, second=0, microsecond=0)
+        return sorted((
+            Flight(
+                id=f'{params.origin}{params.destination}-{hour}', provider=self.name, airline='LA',
+                origin=self.AIRPORTS[params.origin], destination=self.AIRPORTS[params.destination],
+                departure_datetime=day + timedelta(hours=hour), arrival_datetime=day + timedelta(hours=hour + 3),
+                price=float(500 + (hour * 37) % 11 * 20), currency='BRL', duration_minutes=180,
+                flight_number=f'LA{hour}'
+            )
+            for hour in range(12)
+        ), key=lambda flight: flight.price)
+
+
+def test_multi_city_returns_cheapest_valid_itineraries_in_order():
+    service = FlightSearchService([RouteProvider()], min_connection_minutes=120)
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=30)
+    # Trechos no mesmo dia: parte das combinações não respeita a conexão mínima
+    legs = [search_params(origin='GRU', destination='LIS', departure_date=day),
+            search_params(origin='LIS', destination='MAD', departure_date=day),
+            search_params(origin='MAD', destination='GRU', departure_date=day + timedelta(days=3))]
+    itineraries = service.search_multi_city(MultiCitySearchParams(legs, max_results=10))
+
+    candidates = [RouteProvider().search_flights(leg) for leg in legs]
+    valid_prices = sorted(
+        sum(flight.price for flight in combination)
+        for combination in itertools.product(*candidates)
+        if all(later.departure_datetime - earlier.arrival_datetime >= timedelta(minutes=120)
+               for earlier, later in zip(combination, combination[1:]))
+    )
+    assert [itinerary.price for itinerary in itineraries] == pytest.approx(valid_prices[:10])
+    for itinerary in itineraries:
+        assert [flight.origin.code for flight in itinerary.legs] == ['GRU', 'LIS', 'MAD']
+        for earlier, later in zip(itinerary.legs, itinerary.legs[1:]):
+            assert later.departure_datetime - earlier.arrival_datetime >= timedelta(minutes=120)
+
+
+def test_pair_fan_out_beyond_pool_capacity_is_refused():
+    kiwi = StubProvider('Kiwi.com', build_flights('Kiwi.com', 3))
+    service = FlightSearchService([kiwi], pair_workers=1, pair_queue=1)
+    with pytest.raises(Overloaded):
+        service.search_airport_pairs(search_params(), ['GRU', 'CGH', 'VCP'], ['LIS'])
+    assert kiwi.calls == 0
+
+    assert len(service.search_airport_pairs(search_params(), ['GRU', 'CGH'], ['LIS'])) > 0
+
+
+def test_leg_fan_out_beyond_pool_capacity_is_refused():
+    service = FlightSearchService([RouteProvider()], pair_workers=1, pair_queue=0)
+    day = datetime.now() + timedelta(days=30)
+    legs = [search_params(origin='GRU', destination='LIS', departure_date=day),
+            search_params(origin='LIS', destination='MAD', departure_date=day + timedelta(days=2)),
+            search_params(origin='MAD', destination='GRU', departure_date=day + timedelta(days=4))]
+    with pytest.raises(Overloaded):
+        service.search_multi_city(MultiCitySearchParams(legs))
@@ -0,0 +1,61 @@
+"""
+Testes da paginação de GET /consulta/<search_id>: as páginas se somam na ordenação completa
+"""
+import pytest
+
+from app import app, search_repository
+from test_result_set import build_flights, full_order
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def stored_search(count: int, seed: int) -> tuple:
+    flights = build_flights(count, seed=seed)
+    search_id = search_repository.save_search({'origem': 'GRU', 'destino': 'LIS'})
+    search_repository.save_results(search_id, [flight.to_dict() for flight in flights])
+    return search_id, flights
+
+
+def fetch_all_pages(client, search_id: str, sort: str, page_size: int) -> list:
+    first = client.get(f'/consulta/{search_id}?sort={sort}&page_size={page_size}').get_json()
+    ids = [voo['id'] for voo in first['voos']]
+    for page in range(2, first['paginacao']['total_paginas'] + 1):
+        body = client.get(f'/consulta/{search_id}?sort={sort}&page_size={page_size}&page={page}').get_json()
+        ids.extend(voo['id'] for voo in body['voos'])
+    return ids
+
+
+@pytest.mark.parametrize('sort', ['duration', 'price', 'departure'])
+def test_pages_add_up_to_full_ordering(client, sort):
+    search_id, flights = stored_search(230, seed=11)
+    ids = fetch_all_pages(client, search_id, sort, page_size=20)
+    assert ids == full_order(flights, sort)
+    assert len(set(ids)) == len(flights)
+
+
+def test_page_is_the_same_on_every_request(client):
+    search_id, _ = stored_search(120, seed=4)
+    url = f'/consulta/{search_id}?sort=duration&page=3&page_size=15'
+    first = client.get(url)
+    again = client.get(url)
+    assert first.get_json()['voos'] == again.get_json()['voos']
+    assert first.headers['ETag'] == again.headers['ETag']
+
+
+def test_invalid_html_page_params_are_rejected_before_searching(client, monkeypatch):
+    from app import flight_service
+
+    def unexpected_search(*args, **kwargs):
+        raise AssertionError('a busca não deveria ser feita')
+    monkeypatch.setattr(flight_service, 'search_airport_pairs', unexpected_search)
+    before = len(search_repository.list_all_searches())
+
+    response = client.post('/consulta?format=html&page_size=0',
+                           json={'origem': 'GRU', 'destino': 'LIS', 'data_ida': '2030-03-01', 'passageiros': 1})
+    assert response.status_code == 400
+    assert len(search_repository.list_all_searches()) == before
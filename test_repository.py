@@ -0,0 +1,183 @@
+"""
+Testes do SearchRepository: ofertas endereçadas por conteúdo, retenção e write-behind
+"""
+import threading
+import time
+
+import pytest
+
+from cache_backends import InMemoryLRUCache
+from repository import SearchRepository, WriteBehindQueue
+
+
+def flight_dict(number: int, price: float = 1000.0, seats: int = 9) -> dict:
+    return {
+        'id': f'offer-{number}-{price}',
+        'provider': 'Kiwi.com',
+        'airline': 'LA',
+        'flight_number': f'LA{number}',
+        'origin': {'code': 'GRU', 'name': 'Guarulhos', 'city': 'São Paulo', 'country': 'BR'},
+        'destination': {'code': 'LIS', 'name': 'Lisboa', 'city': 'Lisboa', 'country': 'PT'},
+        'departure_datetime': f'2030-03-01T{number % 24:02d}:00:00',
+        'arrival_datetime': f'2030-03-01T{(number + 11) % 24:02d}:00:00',
+        'price': price,
+        'currency': 'BRL',
+        'stops': number % 2,
+        'duration_minutes': 660,
+        'available_seats': seats,
+        'booking_url': f'https://example.com/{number}/{price}'
+    }
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class GatedBackend(InMemoryLRUCache):
+    """Backend cujas gravações em lote esperam uma liberação (simula um backend lento)"""
+
+    def __init__(self):
+        super().__init__(max_entries=10000)
+        self.gate = threading.Event()
+        self.batches = []
+
+    def set_many(self, items):
+        self.gate.wait(5)
+        self.batches.append([key for key, _, _ in items])
+        super().set_many(items)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(time, 'time', fake)
+    return fake
+
+
+def test_results_round_trip_with_volatile_fields():
+    repository = SearchRepository()
+    results = [flight_dict(1), flight_dict(2, price=1500.0, seats=3)]
+    search_id = repository.save_search({'origem': 'GRU'})
+    repository.save_results(search_id, results)
+    assert repository.get_results(search_id) == results
+
+
+def test_repeated_searches_share_offers():
+    repository = SearchRepository()
+    first = repository.save_search({})
+    repository.save_results(first, [flight_dict(1), flight_dict(2)])
+    second = repository.save_search({})
+    repository.save_results(second, [flight_dict(1, price=900.0), flight_dict(2, price=1100.0)])
+
+    assert len(repository.offers) == 2
+    assert [flight['price'] for flight in repository.get_results(second)] == [900.0, 1100.0]
+    assert [flight['price'] for flight in repository.get_results(first)] == [1000.0, 1000.0]
+
+
+def test_delete_search_releases_unreferenced_offers():
+    repository = SearchRepository()
+    first = repository.save_search({})
+    repository.save_results(first, [flight_dict(1), flight_dict(2)])
+    second = repository.save_search({})
+    repository.save_results(second, [flight_dict(2), flight_dict(3)])
+
+    repository.delete_search(first)
+    assert set(repository.offers) == {SearchRepository.offer_key(flight_dict(n)) for n in (2, 3)}
+    assert len(repository.get_results(second)) == 2
+
+    repository.delete_search(second)
+    assert repository.offers == {}
+    assert repository.offer_refs == {}
+
+
+@pytest.mark.parametrize('moment', [30, 49, 51, 99, 101, 150, 199])
+def test_offers_outlive_every_search_that_references_them(clock, moment):
+    retention = 100
+    backend = InMemoryLRUCache(10000)
+    writer = SearchRepository(backend=backend, retention_seconds=retention)
+    start = clock.now
+    writer.save_results(writer.save_search({}), [flight_dict(1), flight_dict(2)])
+
+    # A mesma oferta referenciada de novo mais tarde, sem buscas posteriores que a regravem
+    clock.now = start + moment
+    search_id = writer.save_search({})
+    writer.save_results(search_id, [flight_dict(1, price=1200.0), flight_dict(2)])
+
+    # Outro worker (sem ofertas quentes) lendo a busca no último instante antes de ela expirar
+    clock.now = start + moment + retention - 0.5
+    reader = SearchRepository(backend=backend, retention_seconds=retention)
+    results = reader.get_results(search_id)
+    assert results is not None and [flight['price'] for flight in results] == [1200.0, 1000.0]
+
+
+def test_local_copies_are_bounded_with_backend():
+    backend = InMemoryLRUCache(10000)
+    repository = SearchRepository(backend=backend, recent_searches=5)
+    search_ids = []
+    for number in range(20):
+        search_id = repository.save_search({'n': number})
+        repository.save_results(search_id, [flight_dict(number)])
+        search_ids.append(search_id)
+
+    assert repository.searches == {} and repository.results == {}
+    assert len(repository.recent.keys()) <= 10
+    for number, search_id in enumerate(search_ids):
+        assert repository.get_search(search_id)['data'] == {'n': number}
+        assert repository.get_results(search_id)[0]['flight_number'] == f'LA{number}'
+
+
+def test_local_copies_follow_retention(clock):
+    repository = SearchRepository(backend=InMemoryLRUCache(10000), retention_seconds=100)
+    search_id = repository.save_search({})
+    repository.save_results(search_id, [flight_dict(1)])
+
+    clock.now += 99
+    assert repository.get_search(search_id) is not None
+    clock.now += 2
+    assert repository.get_search(search_id) is None
+    assert repository.get_results(search_id) is None
+
+
+def test_write_behind_reads_pending_searches_evicted_from_memory():
+    backend = GatedBackend()
+    repository = SearchRepository(backend=backend, write_behind=True, recent_searches=1, flush_interval=0)
+    try:
+        search_ids = []
+        for number in range(3):
+            search_id = repository.save_search({'n': number})
+            repository.save_results(search_id, [flight_dict(number)])
+            search_ids.append(search_id)
+
+        # Nada gravado ainda: a primeira busca saiu do LRU e só existe na fila
+        assert backend.get(SearchRepository.SEARCH_PREFIX + search_ids[0]) is None
+        assert repository.get_search(search_ids[0])['data'] == {'n': 0}
+        assert repository.get_results(search_ids[0])[0]['flight_number'] == 'LA0'
+
+        backend.gate.set()
+        repository.flush()
+        reader = SearchRepository(backend=backend)
+        assert [reader.get_search(search_id)['data']['n'] for search_id in search_ids] == [0, 1, 2]
+    finally:
+        backend.gate.set()
+        repository.close()
+
+
+def test_write_behind_coalesces_rewrites_of_the_same_key():
+    backend = GatedBackend()
+    backend.gate.set()
+    queue = WriteBehindQueue(backend, batch_size=2, flush_interval=0.2)
+    try:
+        queue.put('a', 1)
+        queue.put('b', 2)
+        queue.put('a', 3)
+        queue.put('c', 4)
+        assert queue.get('a') == 3
+        assert queue.flush()
+        assert backend.batches == [['a', 'b'], ['c']]
+        assert backend.get('a') == 3 and queue.get('a') is None
+    finally:
+        queue.close()
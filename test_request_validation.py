@@ -0,0 +1,32 @@
+"""
+Testes da validação dos corpos de busca (erros 400 em vez de 500)
+"""
+import pytest
+
+from app import parse_multi_city_request, parse_search_request
+from config import Config
+
+BODY = {'origem': 'GRU', 'destino': 'LIS', 'data_ida': '2030-03-01', 'passageiros': 1}
+LEGS = [{'origem': 'GRU', 'destino': 'LIS', 'data_ida': '2030-03-01'},
+        {'origem': 'LIS', 'destino': 'GRU', 'data_ida': '2030-03-10'}]
+
+
+@pytest.mark.parametrize('value', [0, -5, 'muitos', '', None, 2.5, [10], True])
+def test_invalid_max_results_is_a_400(value):
+    params, erro = parse_search_request({**BODY, 'max_resultados': value})
+    assert params is None
+    assert erro['erro'] == 'max_resultados inválido'
+
+    params, erro = parse_multi_city_request({'passageiros': 1, 'trechos': LEGS, 'max_resultados': value})
+    assert params is None
+    assert erro['erro'] == 'max_resultados inválido'
+
+
+def test_max_results_is_clamped():
+    params, _ = parse_search_request({**BODY, 'max_resultados': 10_000})
+    assert params.max_results == Config.MAX_RESULTS_PER_PROVIDER
+    params, _ = parse_search_request({**BODY, 'max_resultados': '7'})
+    assert params.max_results == 7
+
+    params, _ = parse_multi_city_request({'passageiros': 1, 'trechos': LEGS, 'max_resultados': 10_000})
+    assert params.max_results == Config.MAX_MULTI_CITY_RESULTS
@@ -0,0 +1,76 @@
+"""
+Testes do FlightResultSet: ordenação determinística e paginação
+"""
+import random
+from datetime import datetime, timedelta
+
+from interfaces import Airport, Flight
+from result_set import FlightResultSet
+
+GRU = Airport(code='GRU', name='Guarulhos', city='São Paulo', country='BR')
+LIS = Airport(code='LIS', name='Lisboa', city='Lisboa', country='PT')
+
+
+def build_flights(count: int, seed: int = 1):
+    """Voos com muitos empates de duração e de preço"""
+    rnd = random.Random(seed)
+    start = datetime.now() + timedelta(days=30)
+    return [
+        Flight(
+            id=f'f{i}', provider='Kiwi.com', airline=rnd.choice(['LA', 'G3', 'TP']),
+            origin=GRU, destination=LIS,
+            departure_datetime=start + timedelta(minutes=rnd.randint(0, 10) * 30),
+            arrival_datetime=start + timedelta(hours=11),
+            price=float(rnd.choice([1000, 1200, 1500])),
+            currency='BRL', stops=rnd.randint(0, 2),
+            duration_minutes=rnd.choice([600, 660, 720]),
+            flight_number=f'LA{i}'
+        )
+        for i in range(count)
+    ]
+
+
+def full_order(flights, sort_by):
+    key = {
+        'duration': lambda f: f.duration_minutes,
+        'price': lambda f: f.price,
+        'departure': lambda f: f.departure_datetime
+    }[sort_by]
+    return [f.id for _, f in sorted(enumerate(flights), key=lambda item: (key(item[1]), item[1].price, item[0]))]
+
+
+def test_ranked_with_limit_matches_full_order():
+    flights = build_flights(200)
+    result_set = FlightResultSet.from_flights(flights)
+    expected = full_order(flights, 'duration')
+    for limit in (1, 20, 57, 199):
+        ranked = result_set.ranked('duration', limit=limit)
+        assert [f.id for f in ranked.flights()] == expected[:limit]
+
+
+def test_pages_cover_full_ordering_without_repeats():
+    flights = build_flights(200, seed=7)
+    result_set = FlightResultSet.from_flights(flights)
+    page_size = 20
+    pages = []
+    for page in range(10):
+        offset = page * page_size
+        ranked = result_set.ranked('duration', limit=offset + page_size)
+        pages.extend(f.id for f in ranked.flights(offset, page_size))
+    assert pages == full_order(flights, 'duration')
+    assert len(set(pages)) == 200
+
+
+def test_ranked_is_stable_across_calls():
+    result_set = FlightResultSet.from_flights(build_flights(100, seed=3))
+    first = [f.id for f in result_set.ranked('duration', limit=30).flights()]
+    for _ in range(5):
+        assert [f.id for f in result_set.ranked('duration', limit=30).flights()] == first
+
+
+def test_ranked_after_filter_keeps_ties_deterministic():
+    flights = build_flights(150, seed=5)
+    selected = FlightResultSet.from_flights(flights).filter(max_stops=1)
+    kept = [f for f in flights if f.stops <= 1]
+    ranked = selected.ranked('price', limit=25)
+    assert [f.id for f in ranked.flights()] == full_order(kept, 'price')[:25]
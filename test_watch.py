@@ -0,0 +1,65 @@
+"""
+Testes do monitoramento de preços: a busca monitorada é a mesma de /consulta
+"""
+from datetime import datetime, timedelta
+from typing import List
+
+from config import Config
+from flight_service import FlightSearchService
+from interfaces import Airport, Flight, FlightSearchParams
+from repository import SearchRepository
+from test_flight_service import StubProvider
+from watch import WatchManager
+
+
+class PairProvider(StubProvider):
+    """Um voo por par de aeroportos pedido; registra os pares consultados"""
+
+    def __init__(self):
+        super().__init__('Kiwi.com', [])
+        self.pairs = []
+
+    def search_flights(self, params: FlightSearchParams) -> List[Flight]:
+        self.pairs.append((params.origin, params.destination))
+        departure = params.departure_date.replace(hour=10)
+        return [Flight(
+            id=f'{params.origin}{params.destination}', provider=self.name, airline='LA',
+            origin=Airport(code=params.origin, name=params.origin, city=params.origin, country='XX'),
+            destination=Airport(code=params.destination, name=params.destination, city=params.destination, country='XX'),
+            departure_datetime=departure, arrival_datetime=departure + timedelta(hours=10),
+            price=1000.0, currency='BRL', duration_minutes=600, flight_number=f'LA{len(self.pairs)}'
+        )]
+
+
+def watch_params() -> FlightSearchParams:
+    return FlightSearchParams(origin='SAO', destination='LIS', departure_date=datetime.now() + timedelta(days=30))
+
+
+def test_watch_searches_every_expanded_airport_pair():
+    provider = PairProvider()
+    manager = WatchManager(FlightSearchService([provider]), SearchRepository())
+    watch, snapshot = manager.subscribe(watch_params(), {'origem': 'SAO', 'destino': 'LIS'},
+                                        origins=['GRU', 'CGH'], destinations=['LIS'])
+    assert sorted(provider.pairs) == [('CGH', 'LIS'), ('GRU', 'LIS')]
+    assert sorted(flight['origin']['code'] for flight in snapshot['voos']) == ['CGH', 'GRU']
+
+    provider.pairs.clear()
+    manager._poll(manager._groups[watch.group_key])
+    assert sorted(provider.pairs) == [('CGH', 'LIS'), ('GRU', 'LIS')]
+    manager.shutdown()
+
+
+def test_expanded_and_plain_watches_are_separate_groups():
+    params = watch_params()
+    assert WatchManager.group_key(params, ['SAO'], ['LIS']) != WatchManager.group_key(params, ['GRU', 'CGH'], ['LIS'])
+
+
+def test_watch_is_refused_with_a_shared_cache_backend(monkeypatch):
+    from app import app
+
+    monkeypatch.setattr(Config, 'CACHE_BACKEND', 'redis')
+    with app.test_client() as client:
+        response = client.post('/watch', json={'origem': 'GRU', 'destino': 'LIS', 'data_ida': '2030-03-01',
+                                                'passageiros': 1})
+    assert response.status_code == 501
+    assert response.get_json()['erro'] == 'Monitoramento indisponível'
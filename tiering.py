@@ -0,0 +1,104 @@
+"""
+Busca escalonada - Provedores consultados por nível de prioridade (Strategy Pattern)
+
+Os provedores de prioridade 1 (APIs gratuitas) são consultados primeiro. O
+nível seguinte (ex.: Amadeus, que é pago) só é acionado quando o anterior
+falha, não responde dentro do prazo ou traz menos voos que o mínimo. A
+política pode ser definida por rota (Config.ROUTE_SEARCH_STRATEGIES) e
+sobrescrita em cada requisição.
+"""
+import json
+from dataclasses import dataclass, replace
+from itertools import groupby
+from typing import Dict, List, Optional
+
+from interfaces import IFlightProvider
+
+STRATEGIES = ('tiered', 'all')
+
+
+@dataclass(frozen=True)
+class TierPolicy:
+    """Como os níveis de provedores são consultados em uma busca"""
+    tiered: bool = True
+    min_results: int = 10           # Voos utilizáveis abaixo dos quais o próximo nível é consultado
+    deadline: Optional[float] = 5.0  # Segundos de espera por um nível antes de acionar o próximo
+
+    def __post_init__(self):
+        if self.min_results < 0:
+            raise ValueError("O mínimo de resultados por nível não pode ser negativo")
+        if self.deadline is not None and self.deadline <= 0:
+            raise ValueError("O prazo por nível deve ser positivo")
+
+
+ALL_PROVIDERS = TierPolicy(tiered=False)
+
+
+def group_by_priority(providers: List[IFlightProvider]) -> List[List[IFlightProvider]]:
+    """Agrupa provedores (já ordenados por prioridade) em níveis"""
+    return [list(tier) for _, tier in groupby(providers, key=lambda provider: provider.get_priority())]
+
+
+def parse_route_strategies(spec: str) -> Dict[str, Dict]:
+    """
+    Lê as políticas por rota de um JSON
+
+    Exemplo: {"GRU-JFK": {"estrategia": "all"}, "*-LIS": {"min_resultados": 20, "prazo": 3}}
+    As chaves aceitam "*" no lugar da origem ou do destino.
+    """
+    if not spec:
+        return {}
+    routes = json.loads(spec)
+    return {route.upper(): options for route, options in routes.items()}
+
+
+class TierPolicyResolver:
+    """Combina a política padrão, a da rota e a da requisição (nessa ordem de precedência crescente)"""
+
+    def __init__(self, default_strategy: str = 'tiered', min_results: int = 10,
+                 deadline: Optional[float] = 5.0, routes: Optional[Dict[str, Dict]] = None):
+        """
+        Args:
+            default_strategy: 'tiered' ou 'all'
+            min_results: Mínimo de voos do nível para não escalonar
+            deadline: Prazo por nível, em segundos (None espera o timeout dos provedores)
+            routes: Políticas por rota ("GRU-JFK", "GRU-*", "*-JFK") com as chaves
+                    estrategia, min_resultados e prazo
+        """
+        self.default = self._build(TierPolicy(min_results=min_results, deadline=deadline), default_strategy)
+        self.routes = {route: self._options(self.default, options) for route, options in (routes or {}).items()}
+
+    @staticmethod
+    def _build(policy: TierPolicy, strategy: Optional[str]) -> TierPolicy:
+        if strategy is None:
+            return policy
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia inválida. Use: {', '.join(STRATEGIES)}")
+        return replace(policy, tiered=strategy == 'tiered')
+
+    def _options(self, base: TierPolicy, options: Dict) -> TierPolicy:
+        policy = base
+        if options.get('min_resultados') is not None:
+            policy = replace(policy, min_results=int(options['min_resultados']))
+        if 'prazo' in options:
+            policy = replace(policy, deadline=float(options['prazo']) if options['prazo'] is not None else None)
+        return self._build(policy, options.get('estrategia'))
+
+    def for_route(self, origin: str, destination: str) -> TierPolicy:
+        for route in (f'{origin}-{destination}', f'{origin}-*', f'*-{destination}'):
+            if route in self.routes:
+                return self.routes[route]
+        return self.default
+
+    def resolve(self, origin: str, destination: str, options: Optional[Dict] = None) -> TierPolicy:
+        """
+        Política efetiva de uma busca
+
+        Args:
+            options: Sobrescritas da requisição (estrategia, min_resultados, prazo)
+
+        Raises:
+            ValueError: Estratégia ou limites inválidos
+        """
+        policy = self.for_route(origin, destination)
+        return self._options(policy, options) if options else policy
@@ -0,0 +1,93 @@
+"""
+Rastreamento de requisições - Registra o tempo de cada etapa de uma busca (Single Responsibility)
+
+O trace corrente vive em um ContextVar; para que os spans das threads dos
+provedores caiam no trace da requisição, as tarefas devem ser submetidas
+com contextvars.copy_context().run (veja FlightSearchService).
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from metrics import Histogram
+
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('current_trace', default=None)
+
+
+class Trace:
+    """Coleção de spans de uma requisição"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._start = time.perf_counter()
+        self._spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, end: float, attributes: Dict) -> None:
+        span = {
+            'name': name,
+            'start_ms': round((start - self._start) * 1000, 3),
+            'duration_ms': round((end - start) * 1000, 3),
+            'thread': threading.current_thread().name
+        }
+        if attributes:
+            span['attributes'] = attributes
+        with self._lock:
+            self._spans.append(span)
+
+    def breakdown(self) -> Dict:
+        """
+        Resumo do trace para resposta/persistência
+
+        Returns:
+            Dicionário com tempo total e spans ordenados pelo início
+        """
+        with self._lock:
+            spans = sorted(self._spans, key=lambda s: s['start_ms'])
+        return {
+            'trace': self.name,
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            'spans': spans
+        }
+
+
+def start_trace(name: str) -> Trace:
+    """Inicia um novo trace no contexto atual"""
+    trace = Trace(name)
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace() -> None:
+    """Remove o trace do contexto atual"""
+    _current_trace.set(None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, metric: Optional[Histogram] = None, attributes: Optional[Dict] = None,
+         **labels) -> Iterator[None]:
+    """
+    Mede um bloco, registrando-o no trace corrente e, opcionalmente, em um histograma
+
+    Args:
+        name: Nome do span (ex: 'dedup', 'Kiwi.com.http')
+        metric: Histograma que também recebe a duração
+        attributes: Informações extras anexadas ao span
+        **labels: Rótulos do histograma
+    """
+    trace = _current_trace.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        if metric is not None:
+            metric.observe(end - start, **labels)
+        if trace is not None:
+            trace.add_span(name, start, end, attributes or {})
@@ -0,0 +1,429 @@
+"""
+Monitoramento de preços - Assinaturas que recebem apenas as mudanças de uma busca (Observer Pattern)
+
+Assinaturas de buscas idênticas compartilham um único grupo de polling: a
+busca é refeita no menor intervalo pedido entre elas, o resultado vira um
+snapshot no SearchRepository e a diferença para o snapshot anterior (voos
+novos, removidos e preços alterados) é publicada como um evento numerado.
+Clientes consomem os eventos a partir de um cursor, por long-poll ou SSE.
+
+As assinaturas vivem na memória do processo; como um worker não enxerga
+as assinaturas dos outros, a API só aceita monitoramentos com o backend de
+cache 'memory' (um único processo).
+
+A busca monitorada é a mesma de /consulta: códigos de metrópole e
+aeroportos próximos viram os pares de aeroportos de search_airport_pairs.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from interfaces import FlightSearchParams
+from metrics import WATCH_POLLS, WATCH_ACTIVE
+
+logger = logging.getLogger(__name__)
+
+
+def flight_key(flight: Dict) -> str:
+    """
+    Identidade estável de um voo entre buscas
+
+    Usa as mesmas características de FlightSearchService._remove_duplicates;
+    o id dos provedores não serve, pois muda a cada resposta.
+    """
+    return '|'.join([
+        flight['airline'],
+        flight['origin']['code'],
+        flight['destination']['code'],
+        flight['departure_datetime'][:16],
+        str(flight['flight_number'])
+    ])
+
+
+def diff_results(previous: List[Dict], current: List[Dict]) -> Dict:
+    """
+    Compara dois snapshots de resultados
+
+    Returns:
+        {'novos': [voo], 'removidos': [chave], 'precos_alterados': [...]}
+        (listas vazias quando nada mudou)
+    """
+    before = {flight_key(flight): flight for flight in previous}
+    after = {flight_key(flight): flight for flight in current}
+
+    novos = [dict(flight, chave=key) for key, flight in after.items() if key not in before]
+    removidos = [key for key in before if key not in after]
+    precos_alterados = [
+        {
+            'chave': key,
+            'preco_anterior': before[key]['price'],
+            'preco_atual': flight['price'],
+            'variacao': round(flight['price'] - before[key]['price'], 2),
+            'moeda': flight['currency']
+        }
+        for key, flight in after.items()
+        if key in before and flight['price'] != before[key]['price']
+    ]
+
+    return {'novos': novos, 'removidos': removidos, 'precos_alterados': precos_alterados}
+
+
+def has_changes(delta: Dict) -> bool:
+    return bool(delta['novos'] or delta['removidos'] or delta['precos_alterados'])
+
+
+@dataclass
+class WatchEvent:
+    """Mudanças observadas em uma nova busca do grupo"""
+    seq: int
+    search_id: str
+    timestamp: str
+    delta: Dict
+
+    def to_dict(self) -> Dict:
+        return {'seq': self.seq, 'search_id': self.search_id, 'timestamp': self.timestamp, **self.delta}
+
+
+@dataclass
+class Watch:
+    """Assinatura de um cliente"""
+    id: str
+    group_key: str
+    interval: int
+    created_at: float
+    last_seen: float
+
+    def to_dict(self) -> Dict:
+        return {
+            'watch_id': self.id,
+            'intervalo': self.interval,
+            'criado_em': datetime.fromtimestamp(self.created_at).isoformat(),
+            'ultimo_acesso': datetime.fromtimestamp(self.last_seen).isoformat()
+        }
+
+
+@dataclass
+class WatchGroup:
+    """Busca compartilhada por todas as assinaturas idênticas"""
+    key: str
+    params: FlightSearchParams
+    search_data: Dict
+    interval: int
+    next_poll_at: float
+    origins: List[str] = field(default_factory=list)
+    destinations: List[str] = field(default_factory=list)
+    combine_round_trip: bool = False
+    last_search_id: Optional[str] = None
+    last_poll_at: Optional[float] = None
+    seq: int = 0
+    events: Deque[WatchEvent] = field(default_factory=deque)
+    watch_ids: Set[str] = field(default_factory=set)
+    polling: bool = False
+
+
+class WatchManager:
+    """Gerencia assinaturas, agenda os pollings e entrega as diferenças"""
+
+    def __init__(self, flight_service, repository, default_interval: int = 300, min_interval: int = 60,
+                 ttl: int = 86400, max_events: int = 100, max_concurrent_polls: int = 4):
+        """
+        Args:
+            flight_service: FlightSearchService usado nas buscas
+            repository: SearchRepository onde os snapshots são gravados
+            default_interval: Intervalo entre buscas quando o cliente não informa, em segundos
+            min_interval: Menor intervalo aceito, em segundos
+            ttl: Tempo sem acesso após o qual a assinatura é removida, em segundos
+            max_events: Eventos mantidos por grupo para clientes atrasados
+            max_concurrent_polls: Buscas de grupos diferentes executadas ao mesmo tempo
+        """
+        self.flight_service = flight_service
+        self.repository = repository
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.ttl = ttl
+        self.max_events = max_events
+        self.max_concurrent_polls = max_concurrent_polls
+
+        self._watches: Dict[str, Watch] = {}
+        self._groups: Dict[str, WatchGroup] = {}
+        self._condition = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._scheduler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        WATCH_ACTIVE.set_function(lambda: len(self._watches), kind='watches')
+        WATCH_ACTIVE.set_function(lambda: len(self._groups), kind='groups')
+
+    @staticmethod
+    def group_key(params: FlightSearchParams, origins: List[str], destinations: List[str],
+                  combine_round_trip: bool = False) -> str:
+        """A ordenação não altera o conjunto de voos, então não separa grupos"""
+        return (f"{params.cache_scope()}:{params.max_results}:{params.max_stops}:"
+                f"{','.join(origins)}:{','.join(destinations)}:{int(combine_round_trip)}")
+
+    def subscribe(self, params: FlightSearchParams, search_data: Dict,
+                  interval: Optional[int] = None, origins: Optional[List[str]] = None,
+                  destinations: Optional[List[str]] = None,
+                  combine_round_trip: bool = False) -> Tuple[Watch, Dict]:
+        """
+        Cria uma assinatura, reaproveitando o grupo de uma busca idêntica
+
+        Args:
+            params: Parâmetros da busca monitorada
+            search_data: Corpo original da requisição (gravado com os snapshots)
+            interval: Intervalo desejado entre buscas, em segundos
+            origins: Aeroportos de origem já expandidos (padrão: params.origin)
+            destinations: Aeroportos de destino já expandidos (padrão: params.destination)
+            combine_round_trip: Monta ida e volta a partir de trechos só de ida
+
+        Returns:
+            (assinatura, snapshot atual com search_id, cursor e voos)
+        """
+        interval = max(int(interval or self.default_interval), self.min_interval)
+        origins = origins or [params.origin]
+        destinations = destinations or [params.destination]
+        key = self.group_key(params, origins, destinations, combine_round_trip)
+        now = time.time()
+
+        with self._condition:
+            group = self._groups.get(key)
+            if group is None:
+                group = WatchGroup(key=key, params=params, search_data=search_data,
+                                   interval=interval, next_poll_at=now + interval, origins=origins,
+                                   destinations=destinations, combine_round_trip=combine_round_trip)
+                self._groups[key] = group
+            group.interval = min(group.interval, interval)
+            group.next_poll_at = min(group.next_poll_at, now + group.interval)
+
+            watch = Watch(id=str(uuid.uuid4()), group_key=key, interval=interval, created_at=now, last_seen=now)
+            self._watches[watch.id] = watch
+            group.watch_ids.add(watch.id)
+            needs_snapshot = group.last_search_id is None
+
+        if needs_snapshot:
+            try:
+                self._take_initial_snapshot(group)
+            except Exception:
+                # Sem snapshot inicial (ex.: provedores sobrecarregados) a assinatura não é criada
+                self.unsubscribe(watch.id)
+                raise
+
+        self._ensure_scheduler()
+        logger.info(f"Assinatura {watch.id} em {key} ({len(group.watch_ids)} no grupo)")
+        return watch, self.snapshot(watch.id)
+
+    def _take_initial_snapshot(self, group: WatchGroup) -> None:
+        """Primeira busca do grupo; pode vir do cache, como uma consulta comum"""
+        flights = [flight.to_dict() for flight in self._search(group)]
+        search_id = self._save_snapshot(group, flights)
+        with self._condition:
+            if group.last_search_id is None:
+                group.last_search_id = search_id
+                group.last_poll_at = time.time()
+
+    def unsubscribe(self, watch_id: str) -> bool:
+        with self._condition:
+            watch = self._watches.pop(watch_id, None)
+            if watch is None:
+                return False
+            self._detach(watch)
+            self._condition.notify_all()
+        logger.info(f"Assinatura {watch_id} removida")
+        return True
+
+    def _detach(self, watch: Watch) -> None:
+        """Remove a assinatura do grupo (chamado com o lock adquirido)"""
+        group = self._groups.get(watch.group_key)
+        if group is None:
+            return
+        group.watch_ids.discard(watch.id)
+        if not group.watch_ids:
+            del self._groups[watch.group_key]
+        else:
+            group.interval = min(self._watches[watch_id].interval for watch_id in group.watch_ids)
+
+    def get_watch(self, watch_id: str) -> Optional[Dict]:
+        with self._condition:
+            watch = self._watches.get(watch_id)
+            if watch is None:
+                return None
+            group = self._groups[watch.group_key]
+            return {
+                **watch.to_dict(),
+                'cursor': group.seq,
+                'search_id': group.last_search_id,
+                'assinaturas_no_grupo': len(group.watch_ids),
+                'ultima_busca': datetime.fromtimestamp(group.last_poll_at).isoformat() if group.last_poll_at else None,
+                'proxima_busca': datetime.fromtimestamp(group.next_poll_at).isoformat()
+            }
+
+    def snapshot(self, watch_id: str) -> Optional[Dict]:
+        """Resultado completo mais recente do grupo, com a chave de cada voo"""
+        with self._condition:
+            watch = self._watches.get(watch_id)
+            if watch is None:
+                return None
+            group = self._groups[watch.group_key]
+            search_id, cursor = group.last_search_id, group.seq
+
+        flights = (self.repository.get_results(search_id) if search_id else None) or []
+        return {
+            'search_id': search_id,
+            'cursor': cursor,
+            'voos': [dict(flight, chave=flight_key(flight)) for flight in flights]
+        }
+
+    def changes(self, watch_id: str, cursor: int, timeout: float = 0) -> Optional[Dict]:
+        """
+        Eventos posteriores ao cursor, esperando até `timeout` segundos por um novo
+
+        Returns:
+            {'cursor', 'eventos'} ou, se o cliente perdeu eventos já descartados,
+            {'cursor', 'reset': True, 'snapshot'}; None se a assinatura não existe
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            while True:
+                watch = self._watches.get(watch_id)
+                if watch is None:
+                    return None
+                watch.last_seen = time.time()
+                group = self._groups[watch.group_key]
+
+                if group.seq > cursor:
+                    oldest = group.events[0].seq if group.events else group.seq + 1
+                    if cursor < oldest - 1:
+                        break
+                    events = [event.to_dict() for event in group.events if event.seq > cursor]
+                    return {'cursor': group.seq, 'eventos': events}
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return {'cursor': group.seq, 'eventos': []}
+                self._condition.wait(remaining)
+
+        # Cursor anterior ao histórico mantido: o cliente recomeça do snapshot atual
+        snapshot = self.snapshot(watch_id)
+        if snapshot is None:
+            return None
+        return {'cursor': snapshot['cursor'], 'reset': True, 'snapshot': snapshot}
+
+    def stream(self, watch_id: str, cursor: int, keepalive: float = 15) -> Iterator[str]:
+        """
+        Eventos no formato Server-Sent Events até a assinatura ser removida
+
+        Comentários de keepalive mantêm a conexão aberta entre as mudanças.
+        """
+        while True:
+            result = self.changes(watch_id, cursor, timeout=keepalive)
+            if result is None:
+                yield 'event: fim\ndata: {}\n\n'
+                return
+
+            if result.get('reset'):
+                yield f"id: {result['cursor']}\nevent: snapshot\ndata: {json.dumps(result['snapshot'])}\n\n"
+            elif result['eventos']:
+                for event in result['eventos']:
+                    yield f"id: {event['seq']}\nevent: delta\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield ': keepalive\n\n'
+            cursor = result['cursor']
+
+    def _ensure_scheduler(self) -> None:
+        with self._condition:
+            if self._scheduler is not None and self._scheduler.is_alive():
+                return
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_polls,
+                                                thread_name_prefix='watch-poll')
+            self._scheduler = threading.Thread(target=self._run, name='watch-scheduler', daemon=True)
+            self._scheduler.start()
+
+    def shutdown(self) -> None:
+        """Para o agendador; as assinaturas continuam registradas"""
+        self._stop.set()
+        with self._condition:
+            scheduler, executor = self._scheduler, self._executor
+            self._scheduler = None
+        if scheduler is not None:
+            scheduler.join()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(1.0):
+            now = time.time()
+            due = []
+            with self._condition:
+                for watch in [w for w in self._watches.values() if now - w.last_seen > self.ttl]:
+                    logger.info(f"Assinatura {watch.id} expirada")
+                    del self._watches[watch.id]
+                    self._detach(watch)
+
+                for group in self._groups.values():
+                    if not group.polling and group.last_search_id and group.next_poll_at <= now:
+                        group.polling = True
+                        due.append(group)
+
+            for group in due:
+                self._executor.submit(self._poll, group)
+
+    def _poll(self, group: WatchGroup) -> None:
+        """Refaz a busca do grupo e publica a diferença para o snapshot anterior"""
+        try:
+            flights = [flight.to_dict() for flight in self._search(group, refresh=True)]
+            previous = self.repository.get_results(group.last_search_id) or []
+
+            # Resposta vazia após resultados é tratada como falha dos provedores, não como "tudo removido"
+            if not flights and previous:
+                WATCH_POLLS.inc(result='failed')
+                logger.warning(f"Busca vazia no grupo {group.key}; snapshot mantido")
+                return
+
+            delta = diff_results(previous, flights)
+            if not has_changes(delta):
+                WATCH_POLLS.inc(result='unchanged')
+                return
+
+            search_id = self._save_snapshot(group, flights)
+            with self._condition:
+                group.seq += 1
+                group.events.append(WatchEvent(group.seq, search_id, datetime.now().isoformat(), delta))
+                while len(group.events) > self.max_events:
+                    group.events.popleft()
+                group.last_search_id = search_id
+                self._condition.notify_all()
+
+            WATCH_POLLS.inc(result='changed')
+            logger.info(f"Grupo {group.key}: {len(delta['novos'])} novos, {len(delta['removidos'])} removidos, "
+                        f"{len(delta['precos_alterados'])} preços alterados")
+        except Exception as e:
+            WATCH_POLLS.inc(result='failed')
+            logger.error(f"Erro ao atualizar grupo {group.key}: {str(e)}")
+        finally:
+            with self._condition:
+                group.polling = False
+                group.last_poll_at = time.time()
+                group.next_poll_at = group.last_poll_at + group.interval
+
+    def _search(self, group: WatchGroup, refresh: bool = False):
+        """Mesma busca de /consulta: todos os pares de aeroportos do grupo"""
+        return self.flight_service.search_airport_pairs(group.params, group.origins, group.destinations,
+                                                        combine_round_trip=group.combine_round_trip,
+                                                        refresh=refresh)
+
+    def _save_snapshot(self, group: WatchGroup, flights: List[Dict]) -> str:
+        search_id = self.repository.save_search(dict(group.search_data, monitoramento=True))
+        self.repository.save_results(search_id, flights)
+        return search_id
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {'assinaturas': len(self._watches), 'grupos': len(self._groups)}